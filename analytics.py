@@ -0,0 +1,268 @@
+import json
+import pandas as pd
+import dashboard_data
+from stats import LEAGUES, STATS
+
+# Rolling league averages are kept for these window lengths (seasons)
+ROLLING_WINDOWS = [5, 10]
+
+# Shortest run of consecutive titles kept as a streak
+MIN_STREAK = 2
+
+# Career and rolling tables, maintained by refresh_analytics() in the same
+# transaction as every write to leaders
+ANALYTICS_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS agg_player_titles (
+        player_id INTEGER NOT NULL,
+        stat_id INTEGER NOT NULL,
+        league_id INTEGER NOT NULL,
+        titles INTEGER NOT NULL,
+        first_year INTEGER NOT NULL,
+        last_year INTEGER NOT NULL,
+        PRIMARY KEY (player_id, stat_id, league_id)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS agg_team_titles (
+        team_id INTEGER NOT NULL,
+        stat_id INTEGER NOT NULL,
+        league_id INTEGER NOT NULL,
+        titles INTEGER NOT NULL,
+        first_year INTEGER NOT NULL,
+        last_year INTEGER NOT NULL,
+        PRIMARY KEY (team_id, stat_id, league_id)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS agg_decade_titles (
+        decade INTEGER NOT NULL,
+        stat_id INTEGER NOT NULL,
+        league_id INTEGER NOT NULL,
+        player_id INTEGER NOT NULL,
+        titles INTEGER NOT NULL,
+        PRIMARY KEY (decade, stat_id, league_id, player_id)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS agg_streaks (
+        stat_id INTEGER NOT NULL,
+        league_id INTEGER NOT NULL,
+        player_id INTEGER NOT NULL,
+        first_year INTEGER NOT NULL,
+        last_year INTEGER NOT NULL,
+        seasons INTEGER NOT NULL,
+        PRIMARY KEY (stat_id, league_id, player_id, first_year)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS agg_rolling_avg (
+        stat_id INTEGER NOT NULL,
+        league_id INTEGER NOT NULL,
+        window_years INTEGER NOT NULL,
+        year INTEGER NOT NULL,
+        avg_value REAL NOT NULL,
+        seasons INTEGER NOT NULL,
+        PRIMARY KEY (stat_id, league_id, window_years, year)
+    ) WITHOUT ROWID
+    """
+]
+
+ANALYTICS_TABLES = ['agg_player_titles', 'agg_team_titles', 'agg_decade_titles', 'agg_streaks', 'agg_rolling_avg']
+
+def titles_query(key, source='leaders'):
+    """Titles with first and last season per <key>_id, stat and league"""
+    return f"""
+        SELECT {key}_id, stat_id, league_id, COUNT(*), MIN(year), MAX(year)
+        FROM {source}
+        GROUP BY {key}_id, stat_id, league_id
+    """
+
+def decade_titles_query(source='leaders'):
+    return f"""
+        SELECT year / 10 * 10 AS decade, stat_id, league_id, player_id, COUNT(*)
+        FROM {source}
+        GROUP BY decade, stat_id, league_id, player_id
+    """
+
+def streaks_query(source='leaders'):
+    """Runs of at least MIN_STREAK consecutive titles.
+
+    Gaps and islands: year minus the row number is constant along a run of
+    consecutive seasons.
+    """
+    return f"""
+        SELECT stat_id, league_id, player_id, MIN(year) AS first_year, MAX(year) AS last_year, COUNT(*)
+        FROM (
+            SELECT stat_id, league_id, player_id, year,
+                   year - ROW_NUMBER() OVER (PARTITION BY stat_id, league_id, player_id ORDER BY year) AS run
+            FROM {source}
+        )
+        GROUP BY stat_id, league_id, player_id, run
+        HAVING COUNT(*) >= {MIN_STREAK}
+    """
+
+def rolling_query(source='leaders'):
+    """Average of the last N seasons' leader values for every window N.
+
+    SQLite slides the sum along the partition, so the last bits of an
+    average depend on where the partition starts; rounding makes an
+    incremental refresh give the same values as a full rebuild.
+    """
+    return " UNION ALL ".join(f"""
+        SELECT stat_id, league_id, {window} AS window_years, year,
+               ROUND(AVG(value) OVER w, 6), COUNT(*) OVER w
+        FROM {source}
+        WINDOW w AS (PARTITION BY stat_id, league_id ORDER BY year
+                     RANGE BETWEEN {window - 1} PRECEDING AND CURRENT ROW)
+    """ for window in ROLLING_WINDOWS)
+
+# leaders from a season on, read as a range of the primary key of every stat and league
+SEASONS_FROM = """(
+    SELECT l.* FROM stats s CROSS JOIN leagues g
+    JOIN leaders l ON l.stat_id = s.stat_id AND l.league_id = g.league_id AND l.year >= ?
+)"""
+
+def replace_rows(cursor, table, scope, scope_params, select, select_params):
+    """Replace the rows of table matching scope (a condition on its columns) with those select produces"""
+    cursor.execute(f"DELETE FROM {table} WHERE {scope}", scope_params)
+    cursor.execute(f"INSERT INTO {table} {select}", select_params)
+
+def refresh_analytics(cursor, since_year=None):
+    """Update the analytics tables after leaders changed; runs inside the caller's transaction.
+
+    since_year: first season that was written or deleted (None rebuilds
+    everything). Only rows that can depend on those seasons are recomputed,
+    each from the leaders rows it needs: careers of players and teams with a
+    title from since_year on (before or after the change), decades from
+    since_year's, streaks reaching since_year - 1 or later (read from the
+    first season of any such streak) and rolling averages from since_year on
+    (read from the start of the longest window ending there).
+    """
+    if since_year is None:
+        for table in ANALYTICS_TABLES:
+            cursor.execute(f"DELETE FROM {table}")
+        for key in ['player', 'team']:
+            cursor.execute(f"INSERT INTO agg_{key}_titles {titles_query(key)}")
+        cursor.execute(f"INSERT INTO agg_decade_titles {decade_titles_query()}")
+        cursor.execute(f"INSERT INTO agg_streaks {streaks_query()}")
+        cursor.execute(f"INSERT INTO agg_rolling_avg {rolling_query()}")
+        return
+
+    for key in ['player', 'team']:
+        ids = json.dumps([row[0] for row in cursor.execute(f"""
+            SELECT {key}_id FROM agg_{key}_titles WHERE last_year >= ?
+            UNION SELECT {key}_id FROM leaders WHERE year >= ?
+        """, (since_year, since_year))])
+        scope = f"{key}_id IN (SELECT value FROM json_each(?))"
+        replace_rows(cursor, f"agg_{key}_titles", scope, (ids,),
+                     titles_query(key, f"(SELECT * FROM leaders WHERE {scope})"), (ids,))
+
+    decade = since_year // 10 * 10
+    replace_rows(cursor, 'agg_decade_titles', "decade >= ?", (decade,),
+                 decade_titles_query(SEASONS_FROM), (decade,))
+
+    # A run through since_year - 1 started with a stored streak or in that season
+    streak_start = cursor.execute("SELECT MIN(first_year) FROM agg_streaks WHERE last_year >= ?",
+                                  (since_year - 1,)).fetchone()[0]
+    streak_start = min(streak_start or since_year - 1, since_year - 1)
+    replace_rows(cursor, 'agg_streaks', "last_year >= ?", (since_year - 1,),
+                 f"SELECT * FROM ({streaks_query(SEASONS_FROM)}) WHERE last_year >= ?",
+                 (streak_start, since_year - 1))
+
+    window_start = since_year - max(ROLLING_WINDOWS) + 1
+    replace_rows(cursor, 'agg_rolling_avg', "year >= ?", (since_year,),
+                 f"SELECT * FROM ({rolling_query(SEASONS_FROM)}) WHERE year >= ?",
+                 (*[window_start] * len(ROLLING_WINDOWS), since_year))
+
+def filters(stat_name, leagues):
+    """WHERE conditions and parameters selecting one stat (None: all) and some leagues on alias a"""
+    leagues = tuple(leagues or LEAGUES)
+    conditions = [f"g.code IN ({', '.join('?' * len(leagues))})"]
+    params = list(leagues)
+    if stat_name is not None:
+        if stat_name not in STATS:
+            raise ValueError(f"unknown stat: {stat_name}")
+        conditions.append("a.stat_id = (SELECT stat_id FROM stats WHERE name = ?)")
+        params.append(stat_name)
+    return " AND ".join(conditions), params
+
+def cached_query(key, query, params, cache):
+    cache = cache or dashboard_data.shared_cache()
+    return cache.get(key, lambda conn: pd.read_sql_query(query, conn, params=params))
+
+def career_titles(by='player', stat_name=None, leagues=None, k=20, cache=None):
+    """Most league-leading seasons per player or team (by='team'), over one stat or all.
+
+    Returns Player (or Team), Titles, First and Last season and the
+    leagues, best first. Like every reader here, the result is memoised
+    until the next import and must not be modified in place.
+    """
+    if by not in ('player', 'team'):
+        raise ValueError(f"unknown grouping: {by}")
+    where, params = filters(stat_name, leagues)
+    table = 'players' if by == 'player' else 'teams'
+    query = f"""
+        SELECT n.name AS {by.title()}, SUM(a.titles) AS Titles,
+               MIN(a.first_year) AS First, MAX(a.last_year) AS Last,
+               GROUP_CONCAT(DISTINCT g.code) AS Leagues
+        FROM agg_{by}_titles a
+        JOIN {table} n ON n.{by}_id = a.{by}_id
+        JOIN leagues g ON g.league_id = a.league_id
+        WHERE {where}
+        GROUP BY a.{by}_id
+        ORDER BY Titles DESC, First
+        LIMIT ?
+    """
+    return cached_query(('career_titles', by, stat_name, tuple(leagues or LEAGUES), k), query, [*params, k], cache)
+
+def decade_titles(stat_name=None, leagues=None, k=3, cache=None):
+    """The k players with the most titles in every decade: Decade, Rank, Player, Titles"""
+    where, params = filters(stat_name, leagues)
+    query = f"""
+        SELECT Decade, Rank, Player, Titles FROM (
+            SELECT a.decade AS Decade, p.name AS Player, SUM(a.titles) AS Titles,
+                   ROW_NUMBER() OVER (PARTITION BY a.decade ORDER BY SUM(a.titles) DESC, p.name) AS Rank
+            FROM agg_decade_titles a
+            JOIN players p ON p.player_id = a.player_id
+            JOIN leagues g ON g.league_id = a.league_id
+            WHERE {where}
+            GROUP BY a.decade, a.player_id
+        )
+        WHERE Rank <= ?
+        ORDER BY Decade, Rank
+    """
+    return cached_query(('decade_titles', stat_name, tuple(leagues or LEAGUES), k), query, [*params, k], cache)
+
+def streaks(stat_name=None, leagues=None, k=20, cache=None):
+    """Longest runs of consecutive seasons leading one stat in one league.
+
+    Returns Player, Stat, League, First, Last and Seasons, longest first.
+    """
+    where, params = filters(stat_name, leagues)
+    query = f"""
+        SELECT p.name AS Player, s.name AS Stat, g.code AS League,
+               a.first_year AS First, a.last_year AS Last, a.seasons AS Seasons
+        FROM agg_streaks a
+        JOIN players p ON p.player_id = a.player_id
+        JOIN stats s ON s.stat_id = a.stat_id
+        JOIN leagues g ON g.league_id = a.league_id
+        WHERE {where}
+        ORDER BY Seasons DESC, First
+        LIMIT ?
+    """
+    return cached_query(('streaks', stat_name, tuple(leagues or LEAGUES), k), query, [*params, k], cache)
+
+def rolling_averages(stat_name, window=ROLLING_WINDOWS[0], leagues=None, cache=None):
+    """Rolling window-season average of the league leader's value: League, Year, Value, Seasons"""
+    if window not in ROLLING_WINDOWS:
+        raise ValueError(f"rolling windows are kept for {ROLLING_WINDOWS} seasons, not {window}")
+    where, params = filters(stat_name, leagues)
+    query = f"""
+        SELECT g.name AS League, a.year AS Year, a.avg_value AS Value, a.seasons AS Seasons
+        FROM agg_rolling_avg a
+        JOIN leagues g ON g.league_id = a.league_id
+        WHERE {where} AND a.window_years = ?
+        ORDER BY g.code, a.year
+    """
+    return cached_query(('rolling', stat_name, window, tuple(leagues or LEAGUES)), query, [*params, window], cache)
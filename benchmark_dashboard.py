@@ -0,0 +1,85 @@
+import argparse
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import pandas as pd
+import dashboard_data
+import leaderboard
+from stats import LEAGUE_NAMES, LEAGUES, STATS, table_name
+
+def scaled_database(db_path, path, scale):
+    """Copy of the database with the leader seasons repeated `scale` times (later copies shifted in years)"""
+    shutil.copy(db_path, path)
+    conn = sqlite3.connect(path)
+    first, last = conn.execute("SELECT MIN(year), MAX(year) FROM leaders").fetchone()
+    span = last - first + 1
+    for i in range(1, scale):
+        conn.execute("""
+            INSERT INTO leaders (stat_id, league_id, year, player_id, team_id, value)
+            SELECT stat_id, league_id, year + ?, player_id, team_id, value FROM leaders WHERE year <= ?
+        """, (i * span, last))
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+
+def per_stat_frames(conn):
+    """The six per-league stat tables as the dashboard used to read them"""
+    return {(stat_name, league): pd.read_sql(f"SELECT * FROM {table_name(stat_name, league)}", conn)
+            for stat_name in STATS for league in LEAGUES}
+
+def old_interaction(frames, year):
+    """One rerun of the previous dashboard: merges per league plus per-stat leader filters"""
+    for league in LEAGUES:
+        stat_names = list(STATS)
+        combined = frames[(stat_names[0], league)]
+        for other in stat_names[1:]:
+            combined = pd.merge(combined, frames[(other, league)], on=['Year', 'Player', 'Team'])
+        combined.groupby('Team').agg({name: 'mean' for name in stat_names})
+        for stat_name, spec in STATS.items():
+            df = frames[(stat_name, league)]
+            season = df[df['Year'] == year]
+            season.nsmallest(5, stat_name) if spec['direction'] == 'asc' else season.nlargest(5, stat_name)
+
+def new_interaction(cache, year, cached):
+    """The Player Leaders view now: one leaderboard query per stat (team means come from agg_team_stats)"""
+    if not cached:
+        cache.clear()
+    for stat_name in STATS:
+        leaderboard.top_k(stat_name, leagues=list(LEAGUES), years=(year, year), k=5, per_league=True, cache=cache)
+
+def time_per_call(func, *args, repeat=50):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(*args)
+    return (time.perf_counter() - start) / repeat * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the old per-stat dashboard frames with the leaderboard SQL path")
+    parser.add_argument('--db', default=dashboard_data.DB_PATH)
+    parser.add_argument('--scale', type=int, nargs='+', default=[1, 10, 100],
+                        help="how many times the seasons are repeated")
+    args = parser.parse_args()
+
+    print(f"{'scale':>6} {'rows':>8} {'old MB':>8} {'old ms':>8} {'sql ms':>8} {'cached ms':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scale:
+            path = os.path.join(tmp, f"scale_{scale}.db")
+            scaled_database(args.db, path, scale)
+
+            conn = sqlite3.connect(path)
+            frames = per_stat_frames(conn)
+            conn.close()
+            rows = sum(len(df) for df in frames.values())
+            old_mb = sum(df.memory_usage(deep=True).sum() for df in frames.values()) / 1024 / 1024
+            year = int(frames[(next(iter(STATS)), next(iter(LEAGUE_NAMES)))]['Year'].median())
+
+            cache = dashboard_data.DataCache(path)
+            print(f"{scale:>6} {rows:>8} {old_mb:>8.2f} {time_per_call(old_interaction, frames, year):>8.2f} "
+                  f"{time_per_call(new_interaction, cache, year, False):>8.2f} "
+                  f"{time_per_call(new_interaction, cache, year, True):>10.2f}")
+            cache.conn.close()
+
+if __name__ == "__main__":
+    main()
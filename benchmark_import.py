@@ -0,0 +1,96 @@
+import argparse
+import contextlib
+import os
+import sqlite3
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+import database_import
+from stats import LEAGUES, STATS, table_name
+
+def synthetic_tables(rows, seed=0):
+    """Cleaned-table-shaped DataFrames with `rows` rows each"""
+    rng = np.random.default_rng(seed)
+    players = np.array([f"Player {i}" for i in range(5000)], dtype=object)
+    teams = np.array([f"Team {i}" for i in range(40)], dtype=object)
+    years = pd.array(np.arange(rows) + 1, dtype='Int64')
+
+    def stat_values(stat_name):
+        low, high = STATS[stat_name]['bounds']
+        values = rng.uniform(low, high, rows)
+        if STATS[stat_name]['dtype'].lower().startswith('int'):
+            return pd.array(values.round().astype(int), dtype='Int64')
+        return values.round(2)
+
+    tables = {}
+    combined = pd.DataFrame({'Year': years,
+                             'Player': rng.choice(players, rows),
+                             'Team': rng.choice(teams, rows)})
+    for stat_name in STATS:
+        combined[stat_name] = stat_values(stat_name)
+    tables['combined_pitching_clean'] = combined
+
+    for stat_name in STATS:
+        for league in LEAGUES:
+            tables[table_name(stat_name, league)] = pd.DataFrame({
+                'Year': years,
+                'Player': rng.choice(players, rows),
+                stat_name: stat_values(stat_name),
+                'Team': rng.choice(teams, rows)
+            })
+    return tables
+
+def time_load(load, tables, path):
+    """(total seconds, seconds of the table load itself); the bulk loader reports the latter"""
+    conn = sqlite3.connect(path)
+    try:
+        timings = {}
+        start = time.perf_counter()
+        if load is database_import.bulk_load_tables:
+            load(conn, tables, timings=timings)
+        else:
+            load(conn, tables)
+        total = time.perf_counter() - start
+        return total, timings.get('load', total), timings.get('derived')
+    finally:
+        conn.close()
+
+def derived_mb(path):
+    """MB of the aggregate, analytics and search tables, which only the bulk loader builds"""
+    conn = sqlite3.connect(path)
+    try:
+        size = conn.execute("SELECT COALESCE(SUM(pgsize), 0) FROM dbstat "
+                            "WHERE name LIKE 'agg\\_%' ESCAPE '\\' OR name LIKE 'name\\_search%' ESCAPE '\\'").fetchone()[0]
+    finally:
+        conn.close()
+    return size / 1024 / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare DataFrame.to_sql import of wide tables with the star-schema bulk loader")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 500000],
+                        help="rows per table")
+    args = parser.parse_args()
+
+    # Rows/sec is over the fact and dimension load only; the bulk loader also
+    # builds the dashboard's derived tables (derived s, derived MB), which to_sql does not
+    print(f"{'rows/table':>12} {'loader':>10} {'total s':>8} {'load s':>8} {'rows/sec':>12} "
+          f"{'derived s':>10} {'db MB':>8} {'derived MB':>11}")
+    for rows in args.rows:
+        tables = synthetic_tables(rows)
+        total_rows = rows * len(tables)
+        for label, load in [('to_sql', database_import.load_tables),
+                            ('bulk', database_import.bulk_load_tables)]:
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, 'bench.db')
+                # Loader progress output is not part of the measurement report
+                with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                    total, seconds, derived = time_load(load, tables, path)
+                size_mb = os.path.getsize(path) / 1024 / 1024
+                extra_mb = derived_mb(path)
+            derived = f"{derived:.2f}" if derived is not None else '-'
+            print(f"{rows:>12} {label:>10} {total:>8.2f} {seconds:>8.2f} {total_rows / seconds:>12,.0f} "
+                  f"{derived:>10} {size_mb:>8.1f} {extra_mb:>11.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import argparse
+import http.client
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+import query_service
+from stats import LEAGUES, STATS
+
+def request_mix():
+    """Paths covering every endpoint, stat and league, with a spread of season ranges"""
+    paths = []
+    for stat_name in STATS:
+        for first in range(1900, 2030, 10):
+            paths.append(f"/leaderboard?stat={stat_name}&first={first}&last={first + 9}&k=10")
+            paths.append(f"/leaderboard?stat={stat_name}&first={first}&per_league=1&k=5")
+        paths.append(f"/league-comparison?stat={stat_name}")
+        paths.append(f"/league-comparison?stat={stat_name}&format=arrow")
+    for league in [','.join(LEAGUES), *LEAGUES]:
+        paths.append(f"/team-stats?leagues={league}")
+    return paths
+
+def percentile(values, share):
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+def run_worker(host, port, paths, use_etags, latencies, statuses, lock):
+    """Send paths over one keep-alive connection, recording latency (ms) and status of each"""
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    etags = {}
+    received = 0
+    try:
+        for path in paths:
+            headers = {'If-None-Match': etags[path]} if use_etags and path in etags else {}
+            start = time.perf_counter()
+            conn.request('GET', path, headers=headers)
+            response = conn.getresponse()
+            body = response.read()
+            elapsed = (time.perf_counter() - start) * 1000
+            if response.getheader('ETag'):
+                etags[path] = response.getheader('ETag')
+            received += len(body)
+            with lock:
+                latencies.append(elapsed)
+                statuses[response.status] = statuses.get(response.status, 0) + 1
+    finally:
+        conn.close()
+    return received
+
+def run_benchmark(url, requests, concurrency, use_etags):
+    parsed = urlparse(url)
+    mix = request_mix()
+    paths = [mix[i % len(mix)] for i in range(requests)]
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(run_worker, parsed.hostname, parsed.port, paths[i::concurrency],
+                                   use_etags, latencies, statuses, lock)
+                   for i in range(concurrency)]
+        received = sum(future.result() for future in futures)
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"\n{requests} requests, {concurrency} connections, {len(mix)} distinct paths"
+          f"{', revalidating with ETags' if use_etags else ''}")
+    print(f"Wall time: {wall:.3f}s, {requests / wall:,.0f} req/s, {received / 1024 / 1024:.2f} MB received")
+    print(f"Latency ms: p50 {percentile(latencies, 0.5):.2f}, p95 {percentile(latencies, 0.95):.2f}, "
+          f"p99 {percentile(latencies, 0.99):.2f}, max {latencies[-1]:.2f}")
+    print(f"Status codes: {', '.join(f'{status}: {count}' for status, count in sorted(statuses.items()))}")
+
+    conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=30)
+    conn.request('GET', '/metrics')
+    metrics = json.loads(conn.getresponse().read())
+    conn.close()
+    cache = metrics['cache']
+    print(f"Server cache: {cache['hit_rate']:.1%} hits ({cache['hits']} hits, {cache['misses']} misses)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test query_service.py")
+    parser.add_argument('--url', default=f"http://{query_service.HOST}:{query_service.PORT}")
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--etag', action='store_true', help="send If-None-Match, so repeated paths get 304s")
+    parser.add_argument('--serve', action='store_true',
+                        help="start the service in this process on a free port instead of using --url")
+    parser.add_argument('--db', default=query_service.DB_PATH, help="database for --serve")
+    parser.add_argument('--workers', type=int, default=8, help="pooled connections of the service for --serve")
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if args.serve:
+        server = query_service.make_server(args.db, port=0, workers=args.workers)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://{query_service.HOST}:{server.server_address[1]}"
+        print(f"Started query_service on {url} ({args.workers} connections)")
+
+    try:
+        run_benchmark(url, args.requests, args.concurrency, args.etag)
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+            server.service.close()
+
+if __name__ == "__main__":
+    main()
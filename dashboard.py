@@ -1,46 +1,197 @@
 import streamlit as st
-import pandas as pd
-import sqlite3
 import plotly.express as px
-import plotly.graph_objects as go
+import analytics
+import dashboard_data
+import figure_cache
+import leaderboard
+import search
+from stats import LEAGUE_NAMES, STATS
 
-# Connect to database
+# Cached, shared by every session; reloaded only after an import
 def get_data():
-    conn = sqlite3.connect('baseball_cleaned.db')
-    
-    # Load all league data
-    al_era = pd.read_sql("SELECT * FROM yearly_era_american_league", conn)
-    nl_era = pd.read_sql("SELECT * FROM yearly_era_national_league", conn)
-    al_strikeouts = pd.read_sql("SELECT * FROM yearly_strikeouts_american_league", conn)
-    nl_strikeouts = pd.read_sql("SELECT * FROM yearly_strikeouts_national_league", conn)
-    al_wins = pd.read_sql("SELECT * FROM yearly_wins_american_league", conn)
-    nl_wins = pd.read_sql("SELECT * FROM yearly_wins_national_league", conn)
-    
-    conn.close()
-    
-    return al_era, nl_era, al_strikeouts, nl_strikeouts, al_wins, nl_wins
+    return dashboard_data.load_dashboard_data()
+
+def league_years(league_year, stat_name, league):
+    """Seasons with data for one stat in one league"""
+    rows = league_year[(league_year['Stat'] == stat_name) & (league_year['League'] == league)]
+    return set(rows['Year'])
+
+def team_means(team_stats):
+    """One row per team with the season-weighted mean of every stat across the given leagues"""
+    weighted = team_stats.assign(Total=team_stats['Value'] * team_stats['Seasons'])
+    sums = weighted.groupby(['Team', 'Stat'])[['Total', 'Seasons']].sum()
+    return (sums['Total'] / sums['Seasons']).unstack('Stat').reset_index()
 
-def create_team_performance_chart(data):
+def create_team_performance_chart(team_stats):
     """Create team performance scatter plot"""
-    team_stats = data.groupby('Team').agg({
-        'Strikeouts': 'mean',
-        'Wins': 'mean',
-        'ERA': 'mean'
-    }).reset_index()
-    
     fig = px.scatter(team_stats, x='Strikeouts', y='Wins', size='ERA',
-                     color='ERA', hover_name='Team',
+                     color='ERA', hover_name='Team', render_mode=figure_cache.render_mode(team_stats),
                      title='Team Performance: Strikeouts vs Wins (Bubble size = ERA)',
                      labels={'Strikeouts': 'Average Strikeouts', 'Wins': 'Average Wins'})
     fig.update_layout(height=500)
     return fig
 
+VIEWS = ["League Comparison", "Team Performance", "Player Leaders", "Careers & Streaks"]
+
+def prepare_league_comparison(league_year, stat_name, selected_leagues):
+    """Yearly league averages of one stat over the seasons both leagues played"""
+    # only take the total years
+    common_years_set = (league_years(league_year, stat_name, 'American League')
+                        .intersection(league_years(league_year, stat_name, 'National League')))
+    
+    comparison = league_year[(league_year['Stat'] == stat_name)
+                             & league_year['Year'].isin(common_years_set)
+                             & league_year['League'].isin(selected_leagues)]
+    return comparison.rename(columns={'Value': stat_name})[['Year', stat_name, 'League']]
+
+def create_league_comparison_chart(comparison, stat_name, title, downsample):
+    """Line chart of one stat per league; WebGL and min/max downsampling for long series"""
+    if downsample:
+        comparison = figure_cache.downsample_groups(comparison, 'Year', stat_name, 'League')
+    fig = px.line(comparison, x='Year', y=stat_name, color='League', title=title,
+                  render_mode=figure_cache.render_mode(comparison, 'League'))
+    fig.update_layout(height=400)
+    return fig
+
+def data_generation():
+    """Version of the data the current frames were loaded at, part of every figure key"""
+    return dashboard_data.shared_cache().version
+
+def render_league_comparison(league_year, selected_leagues, downsample):
+    st.header("League Comparison by Year")
+    
+    figures = figure_cache.shared_figure_cache()
+    for stat_name, title in [('ERA', 'Average ERA Comparison by Year (Lower is Better)'),
+                             ('Strikeouts', 'Average Strikeouts Comparison by Year'),
+                             ('Wins', 'Average Wins Comparison by Year')]:
+        comparison = prepare_league_comparison(league_year, stat_name, selected_leagues)
+        if not comparison.empty:
+            key = (f'league_comparison_{stat_name}', tuple(selected_leagues), downsample, data_generation())
+            fig = figures.get(key, lambda: create_league_comparison_chart(comparison, stat_name, title, downsample))
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.warning(f"Please select at least one league to display {stat_name} comparison")
+
+def render_team_performance(team_stats, selected_leagues):
+    st.header("Team Performance Analysis")
+    
+    # Team means of the selected leagues, precomputed per league at import time
+    selected_team_stats = team_stats[team_stats['League'].isin(selected_leagues)]
+    
+    if not selected_leagues:
+        st.warning("Please select at least one league to display team performance")
+        return
+    
+    # Creating scatter plot
+    key = ('team_performance', tuple(selected_leagues), data_generation())
+    fig_team = figure_cache.shared_figure_cache().get(
+        key, lambda: create_team_performance_chart(team_means(selected_team_stats)))
+    st.plotly_chart(fig_team, use_container_width=True)
+    
+    # Additional statistics on teams
+    col1, col2 = st.columns(2)
+    
+    for col, league in [(col1, "American League"), (col2, "National League")]:
+        with col:
+            if league in selected_leagues:
+                st.subheader(f"{league} Team Stats")
+                
+                league_team_stats = selected_team_stats[selected_team_stats['League'] == league]
+                league_team_stats = league_team_stats.pivot_table(index='Team', columns='Stat', values='Value')
+                league_team_stats = league_team_stats[['ERA', 'Strikeouts', 'Wins']].round(2).reset_index()
+                
+                st.dataframe(league_team_stats, use_container_width=True)
+            else:
+                st.info(f"{league} not selected")
+
+@st.fragment
+def render_player_leaders(selected_leagues, common_years):
+    """Runs as a fragment: changing the year reruns only this view"""
+    # Year selection - only use the years that are available in both leagues.
+    selected_year = st.selectbox("Select Year for Player Leaders", common_years[::-1])
+    
+    st.header(f"Player Leaders - {selected_year}")
+    
+    columns = st.columns(3)
+    
+    for col, (stat_name, label) in zip(columns, [('ERA', 'ERA'), ('Strikeouts', 'Strikeout'), ('Wins', 'Win')]):
+        with col:
+            st.subheader(f"{label} Leaders")
+            
+            if selected_leagues:
+                codes = [code for code, name in LEAGUE_NAMES.items() if name in selected_leagues]
+                leaders = leaderboard.top_k(stat_name, leagues=codes, years=(selected_year, selected_year),
+                                            k=5, per_league=True)
+                st.dataframe(leaders[['Player', 'Team', stat_name, 'League']], use_container_width=True)
+            else:
+                st.info(f"Select leagues to see {label} leaders")
+
+def create_rolling_chart(rolling, stat_name, window):
+    """Line chart of the rolling league-leader average per league"""
+    fig = px.line(rolling, x='Year', y='Value', color='League',
+                  title=f"{stat_name}: {window}-season rolling average of the league leader",
+                  labels={'Value': stat_name}, render_mode=figure_cache.render_mode(rolling, 'League'))
+    fig.update_layout(height=400)
+    return fig
+
+@st.fragment
+def render_careers(selected_leagues):
+    """Runs as a fragment: changing the stat or window reruns only this view"""
+    st.header("Careers & Streaks")
+    
+    if not selected_leagues:
+        st.warning("Please select at least one league to display careers and streaks")
+        return
+    codes = [code for code, name in LEAGUE_NAMES.items() if name in selected_leagues]
+    
+    col1, col2 = st.columns(2)
+    stat_name = col1.selectbox("Stat", list(STATS), key="careers_stat")
+    window = col2.radio("Rolling window (seasons)", analytics.ROLLING_WINDOWS, horizontal=True)
+    
+    rolling = analytics.rolling_averages(stat_name, window, codes)
+    key = ('rolling', stat_name, window, tuple(codes), data_generation())
+    fig = figure_cache.shared_figure_cache().get(key, lambda: create_rolling_chart(rolling, stat_name, window))
+    st.plotly_chart(fig, use_container_width=True)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader(f"Most {stat_name} titles")
+        st.dataframe(analytics.career_titles('player', stat_name, codes, k=10), use_container_width=True, hide_index=True)
+        st.subheader(f"Teams with the most {stat_name} titles")
+        st.dataframe(analytics.career_titles('team', stat_name, codes, k=10), use_container_width=True, hide_index=True)
+    with col2:
+        st.subheader(f"Longest {stat_name} streaks")
+        st.dataframe(analytics.streaks(stat_name, codes, k=10), use_container_width=True, hide_index=True)
+        st.subheader("Title leaders by decade")
+        st.dataframe(analytics.decade_titles(stat_name, codes, k=1), use_container_width=True, hide_index=True)
+
+@st.fragment
+def render_search():
+    """Runs as a fragment: a search reruns only this box"""
+    text = st.text_input("Search players and teams", placeholder="Any word prefix or approximate spelling")
+    if not text.strip():
+        return
+    
+    hits = search.search(text, limit=10)
+    if not hits:
+        st.info(f"No player or team matches '{text}'")
+        return
+    
+    labels = [f"{hit['name']} ({hit['kind']}, {len(hit['seasons'])} seasons led)" for hit in hits]
+    choice = st.selectbox("Matches", range(len(hits)), format_func=labels.__getitem__)
+    hit = hits[choice]
+    st.caption(f"Leagues: {', '.join(hit['leagues']) or '-'} · Stats led: {', '.join(hit['stats']) or '-'}")
+    st.dataframe(hit['seasons'], use_container_width=True, hide_index=True)
+
 def main():
     st.set_page_config(page_title="Baseball Stats", layout="wide")
     st.title("⚾ Baseball Pitching Statistics")
     
     # Load data
-    al_era, nl_era, al_strikeouts, nl_strikeouts, al_wins, nl_wins = get_data()
+    league_year, team_stats = get_data()
+    al_years = league_years(league_year, 'ERA', 'American League')
+    nl_years = league_years(league_year, 'ERA', 'National League')
+    common_years = sorted(al_years.intersection(nl_years))
     
     # Sidebar
     st.sidebar.header("Filters")
@@ -52,195 +203,42 @@ def main():
         default=["American League", "National League"]
     )
     
-    # Year selection - only use the years that are available in both leagues.
-    common_years = sorted(set(al_era['Year']).intersection(set(nl_era['Year'])))
-    selected_year = st.sidebar.selectbox("Select Year for Player Leaders", common_years[::-1])
+    downsample = st.sidebar.checkbox(
+        f"Downsample long series (over {figure_cache.DOWNSAMPLE_POINTS} points)", value=True)
     
-    # Main tabs
-    tab1, tab2, tab3 = st.tabs(["League Comparison", "Team Performance", "Player Leaders"])
+    render_search()
     
-    with tab1:
-        st.header("League Comparison by Year")
-        
-        # prepare the data for league comparison, taking into account the filter
-        def prepare_league_comparison(al_data, nl_data, stat_name):
-            # only take the total years
-            common_years_set = set(al_data['Year']).intersection(set(nl_data['Year']))
-            
-            comparison_data = []
-            
-            if "American League" in selected_leagues:
-                al_avg = al_data[al_data['Year'].isin(common_years_set)].groupby('Year')[stat_name].mean().reset_index()
-                al_avg['League'] = 'American League'
-                comparison_data.append(al_avg)
-            
-            if "National League" in selected_leagues:
-                nl_avg = nl_data[nl_data['Year'].isin(common_years_set)].groupby('Year')[stat_name].mean().reset_index()
-                nl_avg['League'] = 'National League'
-                comparison_data.append(nl_avg)
-            
-            if comparison_data:
-                return pd.concat(comparison_data)
-            else:
-                return pd.DataFrame()
-        
-        # ERA comparison
-        era_comparison = prepare_league_comparison(al_era, nl_era, 'ERA')
-        if not era_comparison.empty:
-            fig_era = px.line(era_comparison, x='Year', y='ERA', color='League',
-                             title='Average ERA Comparison by Year (Lower is Better)')
-            fig_era.update_layout(height=400)
-            st.plotly_chart(fig_era, use_container_width=True)
-        else:
-            st.warning("Please select at least one league to display ERA comparison")
-        
-        # Strikeouts comparison
-        strikeouts_comparison = prepare_league_comparison(al_strikeouts, nl_strikeouts, 'Strikeouts')
-        if not strikeouts_comparison.empty:
-            fig_strikeouts = px.line(strikeouts_comparison, x='Year', y='Strikeouts', color='League',
-                                   title='Average Strikeouts Comparison by Year')
-            fig_strikeouts.update_layout(height=400)
-            st.plotly_chart(fig_strikeouts, use_container_width=True)
-        else:
-            st.warning("Please select at least one league to display Strikeouts comparison")
-        
-        # Wins comparison
-        wins_comparison = prepare_league_comparison(al_wins, nl_wins, 'Wins')
-        if not wins_comparison.empty:
-            fig_wins = px.line(wins_comparison, x='Year', y='Wins', color='League',
-                              title='Average Wins Comparison by Year')
-            fig_wins.update_layout(height=400)
-            st.plotly_chart(fig_wins, use_container_width=True)
-        else:
-            st.warning("Please select at least one league to display Wins comparison")
+    # Only the selected view is computed; unlike st.tabs, hidden views cost nothing on a rerun
+    view = st.radio("View", VIEWS, horizontal=True, label_visibility="collapsed")
     
-    with tab2:
-        st.header("Team Performance Analysis")
-        
-        # Creating a combined dataframe for the scatter plot, taking into account the league filter
-        combined_data_list = []
-        
-        if "American League" in selected_leagues:
-            al_combined = pd.merge(al_era, al_strikeouts, on=['Year', 'Player', 'Team'])
-            al_combined = pd.merge(al_combined, al_wins, on=['Year', 'Player', 'Team'])
-            al_combined['League'] = 'American League'
-            combined_data_list.append(al_combined)
-        
-        if "National League" in selected_leagues:
-            nl_combined = pd.merge(nl_era, nl_strikeouts, on=['Year', 'Player', 'Team'])
-            nl_combined = pd.merge(nl_combined, nl_wins, on=['Year', 'Player', 'Team'])
-            nl_combined['League'] = 'National League'
-            combined_data_list.append(nl_combined)
-        
-        if combined_data_list:
-            combined_data = pd.concat(combined_data_list)
-            
-            # Creating scatter plot
-            fig_team = create_team_performance_chart(combined_data)
-            st.plotly_chart(fig_team, use_container_width=True)
-            
-            # Additional statistics on teams
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                if "American League" in selected_leagues:
-                    st.subheader("American League Team Stats")
-                    
-                    # Aggregating data by commands for AL
-                    al_team_stats = al_combined.groupby('Team').agg({
-                        'ERA': 'mean',
-                        'Strikeouts': 'mean', 
-                        'Wins': 'mean'
-                    }).round(2).reset_index()
-                    
-                    st.dataframe(al_team_stats, use_container_width=True)
-                else:
-                    st.info("American League not selected")
-            
-            with col2:
-                if "National League" in selected_leagues:
-                    st.subheader("National League Team Stats")
-                    
-                    # Aggregating data by commands for NL
-                    nl_team_stats = nl_combined.groupby('Team').agg({
-                        'ERA': 'mean',
-                        'Strikeouts': 'mean',
-                        'Wins': 'mean'
-                    }).round(2).reset_index()
-                    
-                    st.dataframe(nl_team_stats, use_container_width=True)
-                else:
-                    st.info("National League not selected")
-        else:
-            st.warning("Please select at least one league to display team performance")
+    if view == "League Comparison":
+        render_league_comparison(league_year, selected_leagues, downsample)
+    elif view == "Team Performance":
+        render_team_performance(team_stats, selected_leagues)
+    elif view == "Player Leaders":
+        render_player_leaders(selected_leagues, common_years)
+    else:
+        render_careers(selected_leagues)
     
-    with tab3:
-        st.header(f"Player Leaders - {selected_year}")
-        
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            st.subheader("ERA Leaders")
-            era_leaders_list = []
-            
-            if "American League" in selected_leagues:
-                al_era_year = al_era[al_era['Year'] == selected_year].nsmallest(5, 'ERA')
-                era_leaders_list.append(al_era_year[['Player', 'Team', 'ERA']].assign(League='AL'))
-            
-            if "National League" in selected_leagues:
-                nl_era_year = nl_era[nl_era['Year'] == selected_year].nsmallest(5, 'ERA')
-                era_leaders_list.append(nl_era_year[['Player', 'Team', 'ERA']].assign(League='NL'))
-            
-            if era_leaders_list:
-                era_leaders = pd.concat(era_leaders_list).head(10)
-                st.dataframe(era_leaders, use_container_width=True)
-            else:
-                st.info("Select leagues to see ERA leaders")
+    # Shared data cache metrics (hit rate across every session of this process)
+    with st.sidebar.expander("Data cache"):
+        metrics = dashboard_data.shared_cache().metrics()
+        st.write(f"Hit rate: {metrics['hit_rate']:.1%} ({metrics['hits']} hits, {metrics['misses']} loads)")
+        st.write(f"Average load: {metrics['avg_load_ms']} ms, import generation: {metrics['generation']}")
         
-        with col2:
-            st.subheader("Strikeout Leaders")
-            strikeout_leaders_list = []
-            
-            if "American League" in selected_leagues:
-                al_strikeouts_year = al_strikeouts[al_strikeouts['Year'] == selected_year].nlargest(5, 'Strikeouts')
-                strikeout_leaders_list.append(al_strikeouts_year[['Player', 'Team', 'Strikeouts']].assign(League='AL'))
-            
-            if "National League" in selected_leagues:
-                nl_strikeouts_year = nl_strikeouts[nl_strikeouts['Year'] == selected_year].nlargest(5, 'Strikeouts')
-                strikeout_leaders_list.append(nl_strikeouts_year[['Player', 'Team', 'Strikeouts']].assign(League='NL'))
-            
-            if strikeout_leaders_list:
-                strikeout_leaders = pd.concat(strikeout_leaders_list).head(10)
-                st.dataframe(strikeout_leaders, use_container_width=True)
-            else:
-                st.info("Select leagues to see Strikeout leaders")
-        
-        with col3:
-            st.subheader("Win Leaders")
-            win_leaders_list = []
-            
-            if "American League" in selected_leagues:
-                al_wins_year = al_wins[al_wins['Year'] == selected_year].nlargest(5, 'Wins')
-                win_leaders_list.append(al_wins_year[['Player', 'Team', 'Wins']].assign(League='AL'))
-            
-            if "National League" in selected_leagues:
-                nl_wins_year = nl_wins[nl_wins['Year'] == selected_year].nlargest(5, 'Wins')
-                win_leaders_list.append(nl_wins_year[['Player', 'Team', 'Wins']].assign(League='NL'))
-            
-            if win_leaders_list:
-                win_leaders = pd.concat(win_leaders_list).head(10)
-                st.dataframe(win_leaders, use_container_width=True)
-            else:
-                st.info("Select leagues to see Win leaders")
+        figure_metrics = figure_cache.shared_figure_cache().metrics()
+        st.write(f"Figure hit rate: {figure_metrics['hit_rate']:.1%} ({figure_metrics['entries']} cached)")
+        for chart, size in figure_metrics['payload_bytes'].items():
+            st.write(f"{chart}: {size / 1024:.1f} KB")
     
     # Footer with data info
     st.markdown("---")
     st.markdown(f"""
     **Data Information:**
-    - American League data: {al_era['Year'].min()} - {al_era['Year'].max()}
-    - National League data: {nl_era['Year'].min()} - {nl_era['Year'].max()}
+    - American League data: {min(al_years)} - {max(al_years)}
+    - National League data: {min(nl_years)} - {max(nl_years)}
     - Common years for comparison: {common_years[0]} - {common_years[-1]}
     """)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
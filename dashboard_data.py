@@ -0,0 +1,132 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+import pandas as pd
+
+DB_PATH = 'baseball_cleaned.db'
+
+# Dashboard reads: the leader's value per stat, league and season, and the
+# team aggregate maintained by database_import
+DASHBOARD_QUERIES = {
+    'league_year': """
+        SELECT s.name AS Stat, g.name AS League, l.year AS Year, l.value AS Value
+        FROM leaders l
+        JOIN stats s ON s.stat_id = l.stat_id
+        JOIN leagues g ON g.league_id = l.league_id
+        ORDER BY l.year
+    """,
+    'team_stats': """
+        SELECT g.name AS League, t.name AS Team, s.name AS Stat, a.avg_value AS Value, a.seasons AS Seasons
+        FROM agg_team_stats a
+        JOIN stats s ON s.stat_id = a.stat_id
+        JOIN leagues g ON g.league_id = a.league_id
+        JOIN teams t ON t.team_id = a.team_id
+    """,
+}
+
+def import_generation(conn):
+    """The import generation written by database_import (0 before the first one)"""
+    try:
+        generation = conn.execute("SELECT generation FROM import_state").fetchone()
+    except sqlite3.OperationalError:
+        # Database imported before the generation counter existed
+        generation = None
+    return generation[0] if generation else 0
+
+class DataCache:
+    """Process-wide cache of dashboard query results over one read-only connection.
+
+    Every entry remembers the database version it was loaded at: the file's
+    identity and mtime, PRAGMA data_version (changes when another connection
+    commits) and the import generation written by database_import. A lookup
+    whose version still matches is a hit; otherwise the value is reloaded.
+    If the file itself was replaced, the connection is reopened. At most
+    max_entries results are kept, least recently used first out.
+    """
+
+    def __init__(self, db_path=DB_PATH, max_entries=256):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.conn = None
+        self.file_id = None
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.load_seconds = 0.0
+        self.version = None
+
+    def connect(self):
+        """(Re)open the shared read-only connection when the file changed identity"""
+        stat = os.stat(self.db_path)
+        file_id = (stat.st_dev, stat.st_ino)
+        if self.conn is None or file_id != self.file_id:
+            if self.conn is not None:
+                self.conn.close()
+            self.conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+            self.file_id = file_id
+        return self.conn, stat.st_mtime_ns
+
+    def current_version(self):
+        conn, mtime_ns = self.connect()
+        data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        return (self.file_id, mtime_ns, data_version, import_generation(conn))
+
+    def get(self, name, load):
+        """Cached result of load(conn), reloaded when the database changed since it was cached"""
+        with self.lock:
+            version = self.current_version()
+            entry = self.entries.get(name)
+            if entry is not None and entry[0] == version:
+                self.entries.move_to_end(name)
+                self.hits += 1
+                return entry[1]
+
+            # Loads run under the lock so concurrent sessions never load the same thing twice
+            self.misses += 1
+            start = time.perf_counter()
+            value = load(self.conn)
+            self.load_seconds += time.perf_counter() - start
+            self.entries[name] = (version, value)
+            self.entries.move_to_end(name)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            self.version = version
+            return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def metrics(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'load_seconds': round(self.load_seconds, 4),
+            'avg_load_ms': round(self.load_seconds / self.misses * 1000, 2) if self.misses else 0.0,
+            'entries': len(self.entries),
+            'generation': self.version[3] if self.version else None
+        }
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+def shared_cache(db_path=DB_PATH):
+    """The one DataCache per database file in this process, shared by every session"""
+    with _shared_lock:
+        if db_path not in _shared:
+            _shared[db_path] = DataCache(db_path)
+        return _shared[db_path]
+
+def load_dashboard_data(cache=None):
+    """(league_year, team_stats) DataFrames, served from the shared cache.
+
+    The frames are shared between sessions and must not be modified in place.
+    """
+    cache = cache or shared_cache()
+    return tuple(cache.get(name, lambda conn, query=query: pd.read_sql(query, conn))
+                 for name, query in DASHBOARD_QUERIES.items())
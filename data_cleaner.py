@@ -1,26 +1,39 @@
 import pandas as pd
+import numpy as np
+import argparse
 import os
 import glob
+from data_quality import print_report, read_tables, validate_tables, write_report
+from stats import LEAGUES, STATS, stat_league_tables, table_name
 
-def clean_combined_pitching():
-    """Clean combined_pitching.csv"""
-    print("Cleaning combined_pitching.csv...")
-    
-    df = pd.read_csv('data/combined_pitching.csv')
-    
-    # Remove first and last row (header duplicates)
-    df = df.iloc[1:-1]
+DELTA_DIR = os.path.join('data', 'delta')
+CLEANED_DELTA_DIR = os.path.join('cleaned_data', 'delta')
+
+def typed_stat(values, stat_name):
+    """Numeric stat values in the stat's registered dtype.
+
+    An integer stat holding fractional values is kept as Float64 instead,
+    so the data_quality whole_number rule reports those rows.
+    """
+    values = pd.to_numeric(values, errors='coerce')
+    dtype = STATS[stat_name]['dtype']
+    if dtype.lower().startswith('int') and (values.dropna() % 1 != 0).any():
+        return values.astype('Float64')
+    return values.astype(dtype)
+
+def clean_combined_frame(df):
+    """Type and rename the rows of a raw combined pitching frame"""
+    stat_names = [stat_name for stat_name in STATS if stat_name in df.columns]
     
     # Remove rows with '-' in Year_AL (empty years 1876-1900)
-    df = df[df['Year_AL'] != '-']
+    df = df[df['Year_AL'] != '-'].copy()
     
     # Convert Year to integer
     df['Year_AL'] = pd.to_numeric(df['Year_AL'], errors='coerce').astype('Int64')
     
     # Clean numeric columns
-    df['Strikeouts'] = pd.to_numeric(df['Strikeouts'], errors='coerce')
-    df['Wins'] = pd.to_numeric(df['Wins'], errors='coerce')
-    df['ERA'] = pd.to_numeric(df['ERA'], errors='coerce')
+    for stat_name in stat_names:
+        df[stat_name] = typed_stat(df[stat_name], stat_name)
     
     # Rename columns to consistent format
     df = df.rename(columns={
@@ -30,127 +43,259 @@ def clean_combined_pitching():
     })
     
     # Remove rows where all stats are null
-    df = df.dropna(subset=['Strikeouts', 'Wins', 'ERA'], how='all')
+    df = df.dropna(subset=stat_names, how='all')
     
     return df
 
-def split_and_clean_yearly_data(filename, stat_name):
-    """Split yearly data into American and National League tables"""
-    print(f"Cleaning and splitting {filename}...")
+def page_to_long(df, stat_name):
+    """Reshape a raw 8-column page frame (AL half, NL half) to one row per league.
+
+    Reshaping the values to 4 columns does this without a Python loop over rows.
+    """
+    values = df.to_numpy(dtype=object).reshape(-1, 4)
+    part = pd.DataFrame(values, columns=['Year', 'Player', 'Value', 'Team'])
+    part['League'] = np.tile(list(LEAGUES), len(values) // len(LEAGUES))
+    part['Stat'] = stat_name
+    return part
+
+def clean_long_format(long_df):
+    """Type and filter a long frame in one pass over every stat and league"""
+    # Remove rows with '-' in Year (seasons before a league existed)
+    long_df = long_df[long_df['Year'] != '-'].copy()
+    long_df['Year'] = pd.to_numeric(long_df['Year'], errors='coerce').astype('Int64')
+    long_df['Value'] = pd.to_numeric(long_df['Value'], errors='coerce')
     
-    df = pd.read_csv(f'data/{filename}')
+    # Remove rows where the stat is null
+    return long_df.dropna(subset=['Value'])
+
+def to_long_format(pages):
+    """Stack both league halves of every registered stat page into one long frame.
+
+    All stats and leagues are typed and filtered together.
+    Columns: Year, Player, Value, Team, League, Stat.
+    """
+    parts = []
+    for stat_name, spec in STATS.items():
+        if spec['page'] in pages:
+            # Remove first and last row (header duplicates)
+            parts.append(page_to_long(pages[spec['page']].iloc[1:-1], stat_name))
     
-    # Remove first and last row (header duplicates)
-    df = df.iloc[1:-1]
+    if not parts:
+        return pd.DataFrame(columns=['Year', 'Player', 'Value', 'Team', 'League', 'Stat'])
     
-    # Create American League table
-    al_df = df.iloc[:, :4].copy()
-    al_df.columns = ['Year', 'Player', stat_name, 'Team']
+    return clean_long_format(pd.concat(parts, ignore_index=True))
+
+def split_long_format(long_df):
+    """Turn the long frame back into one Year/Player/<stat>/Team table per stat and league"""
+    tables = {}
+    for (stat_name, league), group in long_df.groupby(['Stat', 'League'], sort=False):
+        df = group[['Year', 'Player', 'Value', 'Team']].rename(columns={'Value': stat_name})
+        df[stat_name] = typed_stat(df[stat_name], stat_name)
+        tables[table_name(stat_name, league)] = df
+    return tables
+
+def clean_league_delta(df, stat_name, league):
+    """Type one league's raw Year/Player/<stat>/Team delta rows with the same cleaner as full pages"""
+    part = df.rename(columns={stat_name: 'Value'}).assign(League=league, Stat=stat_name)
+    tables = split_long_format(clean_long_format(part))
+    return tables.get(table_name(stat_name, league), pd.DataFrame(columns=['Year', 'Player', stat_name, 'Team']))
+
+def clean_page_data(pages):
+    """Clean raw page frames held in memory.
+
+    pages maps scraped page names (yearly_era, ..., combined_pitching) to
+    their raw frames; returns cleaned table name -> typed DataFrame.
+    """
+    tables = {}
     
-    # Create National League table  
-    nl_df = df.iloc[:, 4:].copy()
-    nl_df.columns = ['Year', 'Player', stat_name, 'Team']
+    if 'combined_pitching' in pages:
+        # Remove first and last row (header duplicates)
+        tables['combined_pitching_clean'] = clean_combined_frame(pages['combined_pitching'].iloc[1:-1])
     
-    # Remove rows with '-' in Year (empty years 1876-1900)
-    al_df = al_df[al_df['Year'] != '-']
-    nl_df = nl_df[nl_df['Year'] != '-']
+    tables.update(split_long_format(to_long_format(pages)))
+    return tables
+
+def load_raw_data(data_dir='data'):
+    """Read the scraper's CSV output into page name -> raw DataFrame"""
+    pages = {}
+    for name in ['combined_pitching', *(spec['page'] for spec in STATS.values())]:
+        path = os.path.join(data_dir, f"{name}.csv")
+        if os.path.exists(path):
+            pages[name] = pd.read_csv(path)
+    return pages
+
+def save_cleaned_data(tables, output_dir='cleaned_data'):
+    """Write each cleaned table to <output_dir>/<table>.csv"""
+    os.makedirs(output_dir, exist_ok=True)
+    for name, df in tables.items():
+        df.to_csv(os.path.join(output_dir, f"{name}.csv"), index=False)
+        print(f"Saved {name}.csv with {len(df)} rows")
+
+def merge_cleaned_delta(path, df):
+    """Add cleaned rows to a pending cleaned delta file, replacing seasons already in it"""
+    if os.path.exists(path):
+        pending = pd.read_csv(path)
+        pending['Year'] = pending['Year'].astype('Int64')
+        df = pd.concat([pending, df])
+    df = df.drop_duplicates(subset=['Year'], keep='last').sort_values('Year')
+    df.to_csv(path, index=False)
+    return len(df)
+
+def clean_delta_data(delta_dir=DELTA_DIR, output_dir=CLEANED_DELTA_DIR):
+    """Clean the pending scraper deltas (new/changed seasons only).
+
+    data/delta/yearly_<stat>_<league>.csv becomes
+    cleaned_data/delta/yearly_<stat>_<league>.csv and combined_pitching.csv
+    becomes combined_pitching_clean.csv. Consumed delta files are removed so
+    each season is handed downstream once.
+    """
+    os.makedirs(output_dir, exist_ok=True)
     
-    # Convert Year to integer
-    al_df['Year'] = pd.to_numeric(al_df['Year'], errors='coerce').astype('Int64')
-    nl_df['Year'] = pd.to_numeric(nl_df['Year'], errors='coerce').astype('Int64')
+    print("DELTA CLEANING PROCESS")
+    print("=" * 50)
     
-    # Clean numeric column based on stat type
-    if stat_name == 'ERA':
-        al_df[stat_name] = pd.to_numeric(al_df[stat_name], errors='coerce')
-        nl_df[stat_name] = pd.to_numeric(nl_df[stat_name], errors='coerce')
-    else:
-        al_df[stat_name] = pd.to_numeric(al_df[stat_name], errors='coerce')
-        nl_df[stat_name] = pd.to_numeric(nl_df[stat_name], errors='coerce')
+    delta_files = sorted(glob.glob(os.path.join(delta_dir, '*.csv')))
+    if not delta_files:
+        print("No pending deltas.")
+        return True
     
-    # Remove rows where stat is null
-    al_df = al_df.dropna(subset=[stat_name])
-    nl_df = nl_df.dropna(subset=[stat_name])
+    for file in delta_files:
+        name = os.path.basename(file).replace('.csv', '')
+        df = pd.read_csv(file, dtype=str)
+        
+        if name == 'combined_pitching':
+            cleaned = clean_combined_frame(df)
+            cleaned_name = 'combined_pitching_clean'
+        else:
+            stat_name, league = stat_league_tables()[name]
+            cleaned = clean_league_delta(df, stat_name, league)
+            cleaned_name = name
+        
+        pending = merge_cleaned_delta(os.path.join(output_dir, f"{cleaned_name}.csv"), cleaned)
+        os.remove(file)
+        print(f"{cleaned_name}: {len(cleaned)} changed rows ({pending} pending)")
     
-    return al_df, nl_df
+    return True
 
-def clean_all_data():
+def clean_all_data(data_dir='data', output_dir='cleaned_data'):
     """Clean all CSV files in data folder"""
     
-    # Create cleaned_data directory in current folder (src)
-    os.makedirs('cleaned_data', exist_ok=True)
-    
     print("DATA CLEANING PROCESS")
     print("=" * 50)
     
-    # Clean combined_pitching
-    combined_clean = clean_combined_pitching()
-    combined_clean.to_csv('cleaned_data/combined_pitching_clean.csv', index=False)
-    print(f"Saved combined_pitching_clean.csv with {len(combined_clean)} rows")
-    
-    # Clean and split yearly_era
-    era_al, era_nl = split_and_clean_yearly_data('yearly_era.csv', 'ERA')
-    era_al.to_csv('cleaned_data/yearly_era_american_league.csv', index=False)
-    era_nl.to_csv('cleaned_data/yearly_era_national_league.csv', index=False)
-    print(f"Saved yearly_era_american_league.csv with {len(era_al)} rows")
-    print(f"Saved yearly_era_national_league.csv with {len(era_nl)} rows")
-    
-    # Clean and split yearly_strikeouts
-    so_al, so_nl = split_and_clean_yearly_data('yearly_strikeouts.csv', 'Strikeouts')
-    so_al.to_csv('cleaned_data/yearly_strikeouts_american_league.csv', index=False)
-    so_nl.to_csv('cleaned_data/yearly_strikeouts_national_league.csv', index=False)
-    print(f"Saved yearly_strikeouts_american_league.csv with {len(so_al)} rows")
-    print(f"Saved yearly_strikeouts_national_league.csv with {len(so_nl)} rows")
-    
-    # Clean and split yearly_wins
-    wins_al, wins_nl = split_and_clean_yearly_data('yearly_wins.csv', 'Wins')
-    wins_al.to_csv('cleaned_data/yearly_wins_american_league.csv', index=False)
-    wins_nl.to_csv('cleaned_data/yearly_wins_national_league.csv', index=False)
-    print(f"Saved yearly_wins_american_league.csv with {len(wins_al)} rows")
-    print(f"Saved yearly_wins_national_league.csv with {len(wins_nl)} rows")
+    pages = load_raw_data(data_dir)
+    tables = clean_page_data(pages)
+    
+    save_cleaned_data(tables, output_dir)
     
     # Summary
     print("\nCLEANING SUMMARY:")
     print("-" * 30)
-    cleaned_files = glob.glob('cleaned_data/*.csv')
-    for file in cleaned_files:
-        df = pd.read_csv(file)
-        print(f"{os.path.basename(file)}: {len(df)} rows")
+    for name, df in tables.items():
+        print(f"{name}.csv: {len(df)} rows")
     
-    return True
+    return tables
+
+def is_header_row(year_columns):
+    """True for repeated header rows, judged by content: no Year cell holds a season or '-'"""
+    is_data = pd.Series(False, index=year_columns[0].index)
+    for years in year_columns:
+        is_data |= years.fillna('').astype(str).str.fullmatch(r'\d+|-')
+    return ~is_data
+
+def read_chunks(path, chunksize):
+    """Stage 1: raw rows of a scraped CSV, chunksize rows at a time, as strings"""
+    yield from pd.read_csv(path, chunksize=chunksize, dtype=str)
+
+def drop_header_rows(chunks, year_columns):
+    """Stage 2: remove header duplicates wherever they appear in the stream"""
+    for chunk in chunks:
+        yield chunk[~is_header_row([chunk[col] for col in year_columns])]
+
+def clean_page_chunks(chunks, stat_name):
+    """Stage 3: cleaned per-league tables for every chunk of a stat page"""
+    for chunk in chunks:
+        yield split_long_format(clean_long_format(page_to_long(chunk, stat_name)))
 
-def verify_data_quality():
-    """Verify that data cleaning was successful"""
-    print("\nDATA QUALITY CHECK:")
-    print("=" * 30)
+def clean_combined_chunks(chunks):
+    """Stage 3: cleaned combined rows for every chunk of the combined file"""
+    for chunk in chunks:
+        yield {'combined_pitching_clean': clean_combined_frame(chunk)}
+
+def write_table_chunks(table_chunks, output_dir, row_counts):
+    """Stage 4: append each cleaned chunk to <output_dir>/<table>.csv"""
+    for tables in table_chunks:
+        for name, df in tables.items():
+            path = os.path.join(output_dir, f"{name}.csv")
+            first_write = name not in row_counts
+            df.to_csv(path, mode='w' if first_write else 'a', header=first_write, index=False)
+            row_counts[name] = row_counts.get(name, 0) + len(df)
+
+def clean_all_data_streaming(data_dir='data', output_dir='cleaned_data', chunksize=50000):
+    """Clean the scraped CSVs chunk by chunk through generator stages.
+
+    Only one chunk per file is held in memory at a time, so arbitrarily large
+    inputs (e.g. multi-year snapshot archives) can be cleaned. Header rows are
+    recognised by content rather than position, and the output matches
+    clean_all_data() on the same input.
+    """
+    os.makedirs(output_dir, exist_ok=True)
     
-    cleaned_files = glob.glob('cleaned_data/*.csv')
+    print("DATA CLEANING PROCESS (STREAMING)")
+    print("=" * 50)
     
-    for file in cleaned_files:
-        df = pd.read_csv(file)
-        filename = os.path.basename(file)
-        
-        print(f"\n{filename}:")
-        print(f"  Total rows: {len(df)}")
-        print(f"  Columns: {list(df.columns)}")
-        
-        # Check data types
-        for col in df.columns:
-            if col == 'Year':
-                print(f"  {col}: {df[col].dtype}, range: {df[col].min()}-{df[col].max()}")
-            elif col in ['Strikeouts', 'Wins']:
-                print(f"  {col}: {df[col].dtype}, max: {df[col].max()}")
-            elif col == 'ERA':
-                print(f"  {col}: {df[col].dtype}, min: {df[col].min()}")
-        
-        # Check for null values
-        null_counts = df.isnull().sum()
-        if null_counts.sum() > 0:
-            print(f"  Null values: {dict(null_counts[null_counts > 0])}")
+    row_counts = {}
+    
+    combined_path = os.path.join(data_dir, 'combined_pitching.csv')
+    if os.path.exists(combined_path):
+        chunks = drop_header_rows(read_chunks(combined_path, chunksize), ['Year_AL'])
+        write_table_chunks(clean_combined_chunks(chunks), output_dir, row_counts)
+    
+    for stat_name, spec in STATS.items():
+        path = os.path.join(data_dir, f"{spec['page']}.csv")
+        if not os.path.exists(path):
+            continue
+        year_columns = [f'Year_{league}' for league in LEAGUES]
+        chunks = drop_header_rows(read_chunks(path, chunksize), year_columns)
+        write_table_chunks(clean_page_chunks(chunks, stat_name), output_dir, row_counts)
+    
+    # Summary
+    print("\nCLEANING SUMMARY:")
+    print("-" * 30)
+    for name, count in row_counts.items():
+        print(f"{name}.csv: {count} rows")
+    
+    return True
+
+def verify_data_quality(tables=None):
+    """Verify that data cleaning was successful (see data_quality.py for the rules)"""
+    if tables is None:
+        tables = read_tables('cleaned_data')
+    
+    report = validate_tables(tables)
+    write_report(report)
+    print_report(report)
+    return report['passed']
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Clean scraped pitching data")
+    parser.add_argument('--delta', action='store_true',
+                        help="only clean the new/changed seasons in data/delta")
+    parser.add_argument('--stream', action='store_true',
+                        help="clean in bounded memory, reading the input in chunks")
+    parser.add_argument('--chunksize', type=int, default=50000, help="rows per chunk in --stream mode")
+    parser.add_argument('--data-dir', default='data', help="folder with the scraped CSVs")
+    parser.add_argument('--output-dir', default='cleaned_data', help="folder for the cleaned CSVs")
+    args = parser.parse_args()
+    
     # Check if data directory exists
-    if not os.path.exists('data'):
-        print("Error: 'data' folder not found. Run mlb_scraper.py first.")
+    if not os.path.exists(args.data_dir):
+        print(f"Error: '{args.data_dir}' folder not found. Run mlb_scraper.py first.")
+    elif args.delta:
+        clean_delta_data(os.path.join(args.data_dir, 'delta'), os.path.join(args.output_dir, 'delta'))
+    elif args.stream:
+        clean_all_data_streaming(args.data_dir, args.output_dir, args.chunksize)
     else:
-        if clean_all_data():
-            verify_data_quality()
\ No newline at end of file
+        tables = clean_all_data(args.data_dir, args.output_dir)
+        if tables:
+            verify_data_quality(tables)
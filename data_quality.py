@@ -0,0 +1,183 @@
+import argparse
+import json
+import os
+import glob
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import pandas as pd
+from stats import STATS, stat_league_tables
+
+DEFAULT_REPORT = 'quality_report.json'
+
+# Share of rows allowed to break an error-level rule before a table is rejected
+DEFAULT_MAX_ERROR_RATE = 0.0
+
+class DataQualityError(Exception):
+    """Raised when cleaned data fails validation and must not be imported"""
+
+    def __init__(self, report):
+        failed = [name for name, table in report['tables'].items() if not table['passed']]
+        super().__init__(f"data quality check failed for: {', '.join(failed)}")
+        self.report = report
+
+def check(results, rule, column, severity, mask, years):
+    """Record one rule result from a boolean failure mask"""
+    failures = int(mask.sum())
+    results.append({
+        'rule': rule,
+        'column': column,
+        'severity': severity,
+        'failures': failures,
+        'examples': [int(y) for y in years[mask].dropna().unique()[:5]]
+    })
+
+def evaluate_table(df, max_error_rate=DEFAULT_MAX_ERROR_RATE):
+    """Evaluate every rule on one cleaned table with column-wise (vectorised) checks.
+
+    Row-level error rules: nulls, non-numeric or out-of-range stat values,
+    non-whole values for integer stats, more than one leader per season.
+    In the combined table (several stat columns) a season one stat lacks is
+    expected, so nulls there are a warning. Table-level: required columns
+    and numeric dtypes (error), gaps in the season sequence (warning). The table passes when there is no table-level
+    error and the share of rows breaking an error rule is within max_error_rate.
+    """
+    stat_names = [stat_name for stat_name in STATS if stat_name in df.columns]
+    results = []
+    table_errors = []
+
+    missing = [col for col in ['Year', 'Player', 'Team'] if col not in df.columns]
+    if missing or not stat_names:
+        table_errors.append(f"missing columns: {missing or 'no stat column'}")
+        return {'rows': len(df), 'error_rows': len(df), 'error_rate': 1.0, 'passed': False,
+                'table_errors': table_errors, 'checks': results}
+
+    years = df['Year']
+    error_mask = pd.Series(False, index=df.index)
+
+    for col in ['Year', *stat_names]:
+        if not pd.api.types.is_numeric_dtype(df[col]):
+            table_errors.append(f"{col} has dtype {df[col].dtype}, expected numeric")
+
+    # Nulls in any column; the combined table only has rows where at least one stat is set
+    nulls = df[['Year', 'Player', 'Team', *stat_names]].isna()
+    optional = stat_names if len(stat_names) > 1 else []
+    for col in nulls.columns:
+        check(results, 'not_null', col, 'warning' if col in optional else 'error', nulls[col], years)
+    error_mask |= nulls.drop(columns=optional).any(axis=1)
+
+    # Stat values: numeric, inside plausible bounds, whole numbers where the dtype is integer
+    for stat_name in stat_names:
+        spec = STATS[stat_name]
+        values = pd.to_numeric(df[stat_name], errors='coerce')
+        low, high = spec['bounds']
+        out_of_range = values.notna() & ((values < low) | (values > high))
+        check(results, 'range', stat_name, 'error', out_of_range, years)
+        error_mask |= out_of_range
+
+        if spec['dtype'].lower().startswith('int'):
+            fractional = values.notna() & (values % 1 != 0)
+            check(results, 'whole_number', stat_name, 'error', fractional, years)
+            error_mask |= fractional
+
+    # One leader per season (per league - every table holds a single league)
+    duplicated = years.notna() & years.duplicated(keep=False)
+    check(results, 'one_leader_per_year', 'Year', 'error', duplicated, years)
+    error_mask |= duplicated
+
+    # Season continuity between the first and last season
+    seasons = pd.Series(years.dropna().astype(int).unique())
+    if len(seasons):
+        expected = pd.RangeIndex(seasons.min(), seasons.max() + 1)
+        gaps = expected.difference(seasons)
+        results.append({'rule': 'year_continuity', 'column': 'Year', 'severity': 'warning',
+                        'failures': len(gaps), 'examples': [int(y) for y in gaps[:5]]})
+
+    error_rows = int(error_mask.sum())
+    error_rate = error_rows / len(df) if len(df) else 0.0
+    if not len(df):
+        table_errors.append("table is empty")
+
+    return {
+        'rows': len(df),
+        'error_rows': error_rows,
+        'error_rate': round(error_rate, 6),
+        'passed': not table_errors and error_rate <= max_error_rate,
+        'table_errors': table_errors,
+        'checks': results
+    }
+
+def validate_tables(tables, max_error_rate=DEFAULT_MAX_ERROR_RATE, workers=4, required=None):
+    """Validate cleaned tables (name -> DataFrame) in parallel and return the report.
+
+    required: table names that must be present (default every per-league
+    table in the stat registry); a missing one fails the report. Pass ()
+    when validating a subset, e.g. changed files or season deltas.
+    """
+    required = stat_league_tables() if required is None else required
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {name: pool.submit(evaluate_table, df, max_error_rate)
+                   for name, df in tables.items()}
+        table_reports = {name: future.result() for name, future in futures.items()}
+    for name in required:
+        if name not in table_reports:
+            table_reports[name] = {'rows': 0, 'error_rows': 0, 'error_rate': 1.0, 'passed': False,
+                                   'table_errors': ["table is missing"], 'checks': []}
+
+    return {
+        'generated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'max_error_rate': max_error_rate,
+        'passed': all(table['passed'] for table in table_reports.values()),
+        'tables': table_reports
+    }
+
+def write_report(report, path=DEFAULT_REPORT):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+def print_report(report):
+    """Human-readable summary of a validation report"""
+    print("\nDATA QUALITY CHECK:")
+    print("=" * 30)
+    for name, table in report['tables'].items():
+        status = "OK" if table['passed'] else "FAILED"
+        print(f"\n{name}: {status}")
+        print(f"  Total rows: {table['rows']}, rows with errors: {table['error_rows']}")
+        for error in table['table_errors']:
+            print(f"  ERROR: {error}")
+        for result in table['checks']:
+            if result['failures']:
+                print(f"  {result['severity'].upper()}: {result['rule']} on {result['column']}: "
+                      f"{result['failures']} (e.g. {result['examples']})")
+
+def validate_or_raise(tables, max_error_rate=DEFAULT_MAX_ERROR_RATE, report_path=DEFAULT_REPORT, required=None):
+    """Validate, write the JSON report and raise DataQualityError if any table failed (see validate_tables)"""
+    report = validate_tables(tables, max_error_rate, required=required)
+    if report_path:
+        write_report(report, report_path)
+    print_report(report)
+    if not report['passed']:
+        raise DataQualityError(report)
+    return report
+
+def read_tables(cleaned_dir='cleaned_data'):
+    tables = {}
+    for file_path in sorted(glob.glob(os.path.join(cleaned_dir, '*.csv'))):
+        tables[os.path.basename(file_path).replace('.csv', '')] = pd.read_csv(file_path)
+    return tables
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate cleaned pitching tables")
+    parser.add_argument('--cleaned-dir', default='cleaned_data')
+    parser.add_argument('--report', default=DEFAULT_REPORT, help="path of the JSON report")
+    parser.add_argument('--max-error-rate', type=float, default=DEFAULT_MAX_ERROR_RATE,
+                        help="share of rows per table allowed to break an error rule")
+    args = parser.parse_args()
+
+    try:
+        validate_or_raise(read_tables(args.cleaned_dir), args.max_error_rate, args.report)
+    except DataQualityError as e:
+        print(f"\nError: {e}")
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,90 +1,433 @@
 import sqlite3
 import pandas as pd
+import argparse
 import os
 import glob
+import hashlib
+import time
+import json
+from datetime import datetime, timezone
+from analytics import ANALYTICS_SCHEMA, ANALYTICS_TABLES, refresh_analytics
+from data_quality import DEFAULT_MAX_ERROR_RATE, DataQualityError, validate_or_raise
+from query_profiler import QueryMonitor, report
+from stats import LEAGUE_NAMES, LEAGUES, STATS, stat_league_tables, table_name
 
-def create_database_schema(conn):
-    """Create database schema with cleaned table structures"""
-    
-    tables_schema = {
-        'combined_pitching_clean': """
-            CREATE TABLE IF NOT EXISTS combined_pitching_clean (
-                Year INTEGER,
-                Player TEXT,
-                Team TEXT,
-                Strikeouts INTEGER,
-                Wins INTEGER,
-                ERA REAL
-            )
-        """,
-        'yearly_era_american_league': """
-            CREATE TABLE IF NOT EXISTS yearly_era_american_league (
-                Year INTEGER,
-                Player TEXT,
-                ERA REAL,
-                Team TEXT
-            )
-        """,
-        'yearly_era_national_league': """
-            CREATE TABLE IF NOT EXISTS yearly_era_national_league (
-                Year INTEGER,
-                Player TEXT,
-                ERA REAL,
-                Team TEXT
-            )
-        """,
-        'yearly_strikeouts_american_league': """
-            CREATE TABLE IF NOT EXISTS yearly_strikeouts_american_league (
-                Year INTEGER,
-                Player TEXT,
-                Strikeouts INTEGER,
-                Team TEXT
-            )
-        """,
-        'yearly_strikeouts_national_league': """
-            CREATE TABLE IF NOT EXISTS yearly_strikeouts_national_league (
-                Year INTEGER,
-                Player TEXT,
-                Strikeouts INTEGER,
-                Team TEXT
-            )
-        """,
-        'yearly_wins_american_league': """
-            CREATE TABLE IF NOT EXISTS yearly_wins_american_league (
-                Year INTEGER,
-                Player TEXT,
-                Wins INTEGER,
-                Team TEXT
-            )
-        """,
-        'yearly_wins_national_league': """
-            CREATE TABLE IF NOT EXISTS yearly_wins_national_league (
-                Year INTEGER,
-                Player TEXT,
-                Wins INTEGER,
-                Team TEXT
-            )
+CLEANED_DELTA_DIR = os.path.join('cleaned_data', 'delta')
+
+# Normalised star schema: one fact row per (stat, league, season) leader,
+# with player and team names stored once in dimension tables.
+STAR_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS stats (
+        stat_id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE,
+        direction TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS leagues (
+        league_id INTEGER PRIMARY KEY,
+        code TEXT NOT NULL UNIQUE,
+        name TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS players (
+        player_id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS teams (
+        team_id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS leaders (
+        stat_id INTEGER NOT NULL REFERENCES stats(stat_id),
+        league_id INTEGER NOT NULL REFERENCES leagues(league_id),
+        year INTEGER NOT NULL,
+        player_id INTEGER NOT NULL REFERENCES players(player_id),
+        team_id INTEGER NOT NULL REFERENCES teams(team_id),
+        value NUMERIC NOT NULL,
+        PRIMARY KEY (stat_id, league_id, year)
+    ) WITHOUT ROWID
+    """
+]
+
+# Season ranges are always read for one stat, which the primary key
+# (stat_id, league_id, year) already serves. Player and team lookups get
+# narrow indexes; each entry also carries the primary key, which is enough
+# to reach the row.
+STAR_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_leaders_player ON leaders(player_id)",
+    "CREATE INDEX IF NOT EXISTS idx_leaders_team ON leaders(team_id)"
+]
+
+# Indexes of earlier schema versions, dropped when the schema is created
+OBSOLETE_INDEXES = ['idx_leaders_year']
+
+STAR_TABLES = ['leaders', 'players', 'teams', 'stats', 'leagues']
+
+# Aggregates the dashboard reads directly; kept up to date by
+# refresh_aggregates() in the same transaction as every write to leaders.
+# Per-season averages and top lists are read from leaders itself: with one
+# leader per (stat, league, season) they would only copy its rows.
+AGGREGATE_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS agg_team_stats (
+        league_id INTEGER NOT NULL,
+        team_id INTEGER NOT NULL,
+        stat_id INTEGER NOT NULL,
+        avg_value REAL NOT NULL,
+        seasons INTEGER NOT NULL,
+        PRIMARY KEY (league_id, team_id, stat_id)
+    ) WITHOUT ROWID
+    """,
+    # Player and team names for search.py; the trigram tokenizer answers
+    # substring matches and scores close spellings by shared trigrams
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS name_search USING fts5(
+        name, kind UNINDEXED, entity_id UNINDEXED, tokenize = 'trigram'
+    )
+    """
+]
+
+AGGREGATE_TABLES = ['agg_team_stats', 'name_search']
+
+# Tables of earlier schema versions, dropped when the schema is created
+OBSOLETE_TABLES = ['agg_league_year', 'agg_top_leaders']
+
+# Internal tables FTS5 keeps for name_search, hidden from table listings
+SEARCH_SHADOW_TABLES = "name_search\\_%"
+
+# Import generation: bumped by every committed write so readers (the
+# dashboard's data cache) can tell their copy is stale with one lookup
+GENERATION_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS import_state (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        generation INTEGER NOT NULL,
+        updated_at TEXT NOT NULL
+    )
+"""
+
+# What the incremental import has already loaded: one hash per cleaned file
+# and one per batch of seasons (a decade) of every per-league table
+IMPORT_METADATA_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS import_files (
+        name TEXT PRIMARY KEY,
+        hash TEXT NOT NULL,
+        imported_at TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS import_batches (
+        name TEXT NOT NULL,
+        batch_start INTEGER NOT NULL,
+        hash TEXT NOT NULL,
+        rows INTEGER NOT NULL,
+        PRIMARY KEY (name, batch_start)
+    ) WITHOUT ROWID
+    """
+]
+
+IMPORT_METADATA_TABLES = ['import_files', 'import_batches']
+
+BATCH_YEARS = 10
+
+def stat_filter(alias, stat_name, league):
+    """WHERE clause selecting one stat and league from the leaders fact table"""
+    return (f"{alias}.stat_id = (SELECT stat_id FROM stats WHERE name = '{stat_name}') "
+            f"AND {alias}.league_id = (SELECT league_id FROM leagues WHERE code = '{league}')")
+
+def compatibility_views():
+    """CREATE VIEW statements that keep the old wide table names readable"""
+    views = {}
+    
+    for (name, (stat_name, league)) in stat_league_tables().items():
+        views[name] = f"""
+            CREATE VIEW IF NOT EXISTS {name} AS
+            SELECT l.year AS Year, p.name AS Player, l.value AS {stat_name}, t.name AS Team
+            FROM leaders l
+            JOIN players p ON p.player_id = l.player_id
+            JOIN teams t ON t.team_id = l.team_id
+            WHERE {stat_filter('l', stat_name, league)}
+        """
+    
+    # Combined AL view: player and team of the first registered stat, one column per stat
+    stat_names = list(STATS)
+    columns = [f"f.value AS {stat_names[0]}"]
+    joins = []
+    for i, stat_name in enumerate(stat_names[1:], start=1):
+        columns.append(f"s{i}.value AS {stat_name}")
+        joins.append(f"LEFT JOIN leaders s{i} ON s{i}.year = f.year AND {stat_filter(f's{i}', stat_name, 'AL')}")
+    views['combined_pitching_clean'] = f"""
+            CREATE VIEW IF NOT EXISTS combined_pitching_clean AS
+            SELECT f.year AS Year, p.name AS Player, t.name AS Team, {', '.join(columns)}
+            FROM leaders f
+            JOIN players p ON p.player_id = f.player_id
+            JOIN teams t ON t.team_id = f.team_id
+            {' '.join(joins)}
+            WHERE {stat_filter('f', stat_names[0], 'AL')}
         """
-    }
+    
+    return views
+
+def drop_table_or_view(cursor, name):
+    """Drop whatever object (table or view) currently holds a name"""
+    row = cursor.execute("SELECT type FROM sqlite_master WHERE name = ?", (name,)).fetchone()
+    if row is not None and row[0] in ('table', 'view'):
+        cursor.execute(f"DROP {row[0].upper()} {name}")
+
+def seed_dimensions(cursor):
+    """Make sure every registered stat and league has a dimension row"""
+    cursor.executemany("INSERT OR IGNORE INTO stats (name, direction) VALUES (?, ?)",
+                       [(stat_name, spec['direction']) for stat_name, spec in STATS.items()])
+    cursor.executemany("INSERT OR IGNORE INTO leagues (code, name) VALUES (?, ?)",
+                       [(league, LEAGUE_NAMES[league]) for league in LEAGUES])
+
+def bump_generation(cursor):
+    """Advance the import generation; runs inside the caller's transaction"""
+    cursor.execute(GENERATION_SCHEMA)
+    cursor.execute("""
+        INSERT INTO import_state (id, generation, updated_at) VALUES (1, 1, ?)
+        ON CONFLICT (id) DO UPDATE SET generation = generation + 1, updated_at = excluded.updated_at
+    """, (datetime.now(timezone.utc).isoformat(timespec='seconds'),))
+
+def refresh_aggregates(cursor, team_ids=None):
+    """Update the aggregate tables from leaders; runs inside the caller's transaction.
+
+    agg_team_stats: per league and team, the average of every stat over the
+    seasons where one pitcher led the league in all tracked stats for that
+    team (the dashboard's team view), with the season count for weighting.
+    name_search: every player and team name with its kind and id.
+
+    team_ids: teams that held a written or deleted season before or after
+    the write (see season_teams); only their agg_team_stats rows are
+    recomputed and only names not yet in name_search are added. None
+    rebuilds everything.
+    """
+    if team_ids is None:
+        for name in AGGREGATE_TABLES:
+            cursor.execute(f"DELETE FROM {name}")
+        scope, params = "1", ()
+    else:
+        scope, params = "team_id IN (SELECT value FROM json_each(?))", (json.dumps(sorted(team_ids)),)
+        cursor.execute(f"DELETE FROM agg_team_stats WHERE {scope}", params)
+    
+    cursor.execute(f"""
+        INSERT INTO agg_team_stats (league_id, team_id, stat_id, avg_value, seasons)
+        SELECT l.league_id, l.team_id, l.stat_id, AVG(l.value), COUNT(*)
+        FROM leaders l
+        JOIN (
+            SELECT league_id, year, player_id, team_id
+            FROM leaders
+            WHERE {scope}
+            GROUP BY league_id, year, player_id, team_id
+            HAVING COUNT(*) = (SELECT COUNT(*) FROM stats)
+        ) f ON f.league_id = l.league_id AND f.year = l.year
+           AND f.player_id = l.player_id AND f.team_id = l.team_id
+        GROUP BY l.league_id, l.team_id, l.stat_id
+    """, params)
+    # Names are never renamed or removed outside a full load, so new ids are all that can be missing
+    cursor.execute("""
+        INSERT INTO name_search (name, kind, entity_id)
+        SELECT name, 'player', player_id FROM players
+        WHERE player_id NOT IN (SELECT entity_id FROM name_search WHERE kind = 'player')
+        UNION ALL
+        SELECT name, 'team', team_id FROM teams
+        WHERE team_id NOT IN (SELECT entity_id FROM name_search WHERE kind = 'team')
+    """)
+
+def season_teams(cursor, stat_name, league, first_year, last_year):
+    """team_ids holding one stat and league's seasons first_year..last_year"""
+    return {row[0] for row in cursor.execute(f"""
+        SELECT team_id FROM leaders l
+        WHERE {stat_filter('l', stat_name, league)} AND year BETWEEN ? AND ?
+    """, (first_year, last_year))}
+
+def create_database_schema(conn):
+    """Create the star schema, the aggregate and analytics tables and the compatibility views"""
     
     cursor = conn.cursor()
-    for table_name, schema in tables_schema.items():
+    for schema in [*STAR_SCHEMA, *AGGREGATE_SCHEMA, *ANALYTICS_SCHEMA, GENERATION_SCHEMA]:
         cursor.execute(schema)
-        print(f"Created table: {table_name}")
+    for index in OBSOLETE_INDEXES:
+        cursor.execute(f"DROP INDEX IF EXISTS {index}")
+    for name in OBSOLETE_TABLES:
+        cursor.execute(f"DROP TABLE IF EXISTS {name}")
+    seed_dimensions(cursor)
+    print(f"Created tables: {', '.join([*STAR_TABLES, *AGGREGATE_TABLES, *ANALYTICS_TABLES])}")
+    
+    # Database loaded before the aggregate tables (or the search index, or analytics) existed
+    if (cursor.execute("SELECT 1 FROM leaders LIMIT 1").fetchone()
+            and not (cursor.execute("SELECT 1 FROM name_search LIMIT 1").fetchone()
+                     and cursor.execute("SELECT 1 FROM agg_player_titles LIMIT 1").fetchone())):
+        print("Building aggregate tables")
+        refresh_aggregates(cursor)
+        refresh_analytics(cursor)
+        bump_generation(cursor)
+    
+    for name, view in compatibility_views().items():
+        row = cursor.execute("SELECT type FROM sqlite_master WHERE name = ?", (name,)).fetchone()
+        if row is not None and row[0] == 'table':
+            # Database from before the star schema; a full import migrates it
+            print(f"Keeping legacy table: {name}")
+            continue
+        cursor.execute(view)
     
     conn.commit()
 
-def import_cleaned_data(conn):
-    """Import all cleaned CSV files to database"""
+def frame_rows(df):
+    """DataFrame rows as tuples of plain Python values (None for nulls) for executemany"""
+    columns = []
+    for col in df.columns:
+        values = df[col]
+        if values.hasnans:
+            values = values.astype(object).where(values.notna(), None)
+        columns.append(values.tolist())
+    return list(zip(*columns))
+
+def to_fact_rows(tables):
+    """Stack the per-league cleaned tables into one long stat/league/year/player/team/value frame"""
+    mapping = stat_league_tables()
+    parts = []
+    for name, df in tables.items():
+        if name not in mapping:
+            continue
+        stat_name, league = mapping[name]
+        parts.append(pd.DataFrame({
+            'stat': stat_name,
+            'league': league,
+            'year': df['Year'].astype('int64'),
+            'player': df['Player'],
+            'team': df['Team'],
+            'value': df[stat_name].astype(object)
+        }))
+    if not parts:
+        return pd.DataFrame(columns=['stat', 'league', 'year', 'player', 'team', 'value'])
+    return pd.concat(parts, ignore_index=True)
+
+def bulk_load_tables(conn, tables, batch_size=10000, cache_size_kb=65536, timings=None):
+    """Load cleaned DataFrames into the star schema in a single transaction.
+
+    The per-league tables become rows of the leaders fact table, with player
+    and team names dictionary-encoded into the players/teams dimensions.
+    combined_pitching_clean and the per-league names are served by views.
+    Everything is rebuilt with batched executemany calls and the indexes
+    are created after the rows are in. The journal mode is left as it is
+    (readers may hold a WAL database open) and only synchronous and the
+    cache size are relaxed for the load, then restored; on any error the
+    whole load is rolled back and the previous data stays in place.
+    
+    Since everything is replaced, every per-league table must be present and
+    non-empty; otherwise ValueError is raised before anything is dropped.
+    The file and decade hashes of incremental_import() are dropped too, so
+    the next incremental import compares every decade again.
+    
+    timings, if given, receives the seconds spent loading the fact and
+    dimension tables ('load') and building the derived tables ('derived').
+    """
+    timings = timings if timings is not None else {}
+    missing = [name for name in stat_league_tables() if name not in tables or tables[name].empty]
+    if missing:
+        raise ValueError(f"refusing a full load without rows for: {', '.join(missing)}")
+    
+    load_start = time.perf_counter()
+    facts = to_fact_rows(tables)
+    skipped = [name for name in tables if name not in stat_league_tables() and name != 'combined_pitching_clean']
+    for name in skipped:
+        print(f"Skipping {name}: not a registered stat table")
+    
+    # Dictionary-encode names: ids are positions in the unique name lists
+    player_codes, player_names = pd.factorize(facts['player'])
+    team_codes, team_names = pd.factorize(facts['team'])
+    stat_ids = {stat_name: i + 1 for i, stat_name in enumerate(STATS)}
+    league_ids = {league: i + 1 for i, league in enumerate(LEAGUES)}
+    
+    fact_rows = pd.DataFrame({
+        'stat_id': facts['stat'].map(stat_ids),
+        'league_id': facts['league'].map(league_ids),
+        'year': facts['year'],
+        'player_id': player_codes + 1,
+        'team_id': team_codes + 1,
+        'value': facts['value']
+    })
+    
+    cursor = conn.cursor()
+    synchronous = cursor.execute("PRAGMA synchronous").fetchone()[0]
+    cache_size = cursor.execute("PRAGMA cache_size").fetchone()[0]
     
-    cleaned_files = glob.glob('cleaned_data/*.csv')
+    try:
+        # NORMAL still syncs at checkpoints (WAL) or before the journal is deleted
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA cache_size=-{cache_size_kb}")
+        conn.commit()
+        cursor.execute("BEGIN")
+        
+        # The hashes of an earlier incremental import no longer describe what is loaded
+        for name in [*compatibility_views(), *STAR_TABLES, *AGGREGATE_TABLES, *ANALYTICS_TABLES,
+                     *IMPORT_METADATA_TABLES]:
+            drop_table_or_view(cursor, name)
+        for schema in [*STAR_SCHEMA, *AGGREGATE_SCHEMA, *ANALYTICS_SCHEMA]:
+            cursor.execute(schema)
+        
+        cursor.executemany("INSERT INTO stats (stat_id, name, direction) VALUES (?, ?, ?)",
+                           [(stat_ids[s], s, spec['direction']) for s, spec in STATS.items()])
+        cursor.executemany("INSERT INTO leagues (league_id, code, name) VALUES (?, ?, ?)",
+                           [(league_ids[lg], lg, LEAGUE_NAMES[lg]) for lg in LEAGUES])
+        cursor.executemany("INSERT INTO players (player_id, name) VALUES (?, ?)",
+                           [(i + 1, name) for i, name in enumerate(player_names)])
+        cursor.executemany("INSERT INTO teams (team_id, name) VALUES (?, ?)",
+                           [(i + 1, name) for i, name in enumerate(team_names)])
+        
+        print(f"Importing {len(fact_rows)} leader rows...")
+        insert = ("INSERT INTO leaders (stat_id, league_id, year, player_id, team_id, value) "
+                  "VALUES (?, ?, ?, ?, ?, ?)")
+        for start in range(0, len(fact_rows), batch_size):
+            cursor.executemany(insert, frame_rows(fact_rows.iloc[start:start + batch_size]))
+        
+        # Indexes are cheaper to build once over the loaded rows than to maintain per insert
+        for statement in STAR_INDEXES:
+            cursor.execute(statement)
+        for view in compatibility_views().values():
+            cursor.execute(view)
+        timings['load'] = time.perf_counter() - load_start
+        
+        derived_start = time.perf_counter()
+        refresh_aggregates(cursor)
+        refresh_analytics(cursor)
+        timings['derived'] = time.perf_counter() - derived_start
+        bump_generation(cursor)
+        
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.execute(f"PRAGMA synchronous={synchronous}")
+        cursor.execute(f"PRAGMA cache_size={cache_size}")
+    
+    cursor.execute("ANALYZE")
+    loaded = facts.groupby(['stat', 'league'], sort=False).size()
+    for (stat_name, league), count in loaded.items():
+        print(f"Imported {count} rows into {table_name(stat_name, league)}")
+    print(f"Players: {len(player_names)}, teams: {len(team_names)}")
+    return {table_name(stat_name, league): count for (stat_name, league), count in loaded.items()}
+
+def load_tables(conn, tables):
+    """Write cleaned DataFrames with DataFrame.to_sql, one commit per table.
+
+    This replaces the declared tables with pandas-inferred ones; kept for
+    comparison with bulk_load_tables() (see benchmark_import.py).
+    """
     
-    for file_path in cleaned_files:
+    for table_name, df in tables.items():
         try:
-            table_name = os.path.basename(file_path).replace('.csv', '')
             print(f"Importing {table_name}...")
             
-            df = pd.read_csv(file_path)
             df.to_sql(table_name, conn, if_exists='replace', index=False)
             
             # Verify import
@@ -97,12 +440,268 @@ def import_cleaned_data(conn):
         except Exception as e:
             print(f"Error importing {table_name}: {e}")
 
+def read_cleaned_data(cleaned_dir='cleaned_data'):
+    """Read every cleaned CSV into table name -> DataFrame"""
+    tables = {}
+    for file_path in sorted(glob.glob(os.path.join(cleaned_dir, '*.csv'))):
+        table_name = os.path.basename(file_path).replace('.csv', '')
+        df = pd.read_csv(file_path)
+        df['Year'] = df['Year'].astype('Int64')
+        tables[table_name] = df
+    return tables
+
+def import_cleaned_data(conn, max_error_rate=DEFAULT_MAX_ERROR_RATE):
+    """Import all cleaned CSV files to database.
+
+    The tables are validated first; if any fails, DataQualityError is raised
+    and the database is left untouched.
+    """
+    tables = read_cleaned_data()
+    validate_or_raise(tables, max_error_rate)
+    bulk_load_tables(conn, tables)
+    
+    # Later incremental imports only need to write what changed after this load
+    cursor = conn.cursor()
+    for schema in IMPORT_METADATA_SCHEMA:
+        cursor.execute(schema)
+    file_hashes = {os.path.basename(path).replace('.csv', ''): file_hash(path)
+                   for path in glob.glob(os.path.join('cleaned_data', '*.csv'))}
+    record_import_metadata(cursor, file_hashes, tables)
+    conn.commit()
+
+def upsert_leader_rows(cursor, stat_name, league, df):
+    """Insert or update the leader rows of one stat and league, keyed on the season.
+
+    New player and team names are added to the dimension tables first.
+    Returns the number of rows written.
+    """
+    cursor.executemany("INSERT OR IGNORE INTO players (name) VALUES (?)",
+                       [(player,) for player in df['Player'].unique()])
+    cursor.executemany("INSERT OR IGNORE INTO teams (name) VALUES (?)",
+                       [(team,) for team in df['Team'].unique()])
+    
+    rows = [(stat_name, league, year, player, team, value)
+            for year, player, value, team in frame_rows(df[['Year', 'Player', stat_name, 'Team']])]
+    cursor.executemany("""
+        INSERT INTO leaders (stat_id, league_id, year, player_id, team_id, value)
+        VALUES ((SELECT stat_id FROM stats WHERE name = ?),
+                (SELECT league_id FROM leagues WHERE code = ?),
+                ?,
+                (SELECT player_id FROM players WHERE name = ?),
+                (SELECT team_id FROM teams WHERE name = ?),
+                ?)
+        ON CONFLICT (stat_id, league_id, year) DO UPDATE SET
+            player_id = excluded.player_id,
+            team_id = excluded.team_id,
+            value = excluded.value
+    """, rows)
+    return len(rows)
+
+def apply_delta(conn, delta_dir=CLEANED_DELTA_DIR, max_error_rate=DEFAULT_MAX_ERROR_RATE):
+    """Apply cleaned season deltas in one transaction.
+
+    Every cleaned_data/delta/yearly_<stat>_<league>.csv replaces the leader
+    rows of that stat and league for the seasons it contains, so only new or
+    revised seasons are written; new player and team names are added to the
+    dimension tables. The combined delta needs no write since
+    combined_pitching_clean is a view. The deltas are validated like a full
+    import first; if any fails, DataQualityError is raised and nothing is
+    written. Applied delta files are removed after the commit.
+    """
+    delta_files = sorted(glob.glob(os.path.join(delta_dir, '*.csv')))
+    if not delta_files:
+        print("No pending deltas.")
+        return 0
+    
+    tables = read_cleaned_data(delta_dir)
+    validate_or_raise({name: df for name, df in tables.items() if len(df)}, max_error_rate, required=())
+    
+    mapping = stat_league_tables()
+    cursor = conn.cursor()
+    applied = 0
+    first_year = None
+    team_ids = set()
+    try:
+        for name, df in tables.items():
+            if name not in mapping:
+                print(f"{name}: derived from the leaders table, nothing to write")
+                continue
+            if df.empty:
+                print(f"{name}: no seasons")
+                continue
+            
+            stat_name, league = mapping[name]
+            years = (int(df['Year'].min()), int(df['Year'].max()))
+            team_ids |= season_teams(cursor, stat_name, league, *years)
+            rows = upsert_leader_rows(cursor, stat_name, league, df)
+            team_ids |= season_teams(cursor, stat_name, league, *years)
+            print(f"{name}: replaced {rows} seasons")
+            applied += rows
+            first_year = min(first_year, years[0]) if first_year is not None else years[0]
+        if applied:
+            refresh_aggregates(cursor, team_ids)
+            refresh_analytics(cursor, first_year)
+            bump_generation(cursor)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    
+    for file_path in delta_files:
+        os.remove(file_path)
+    return applied
+
+def file_hash(path):
+    """sha1 of a file's bytes"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def season_batches(df, stat_name):
+    """Split one per-league table into decade batches: batch start -> (hash, rows)"""
+    batches = {}
+    df = df.sort_values('Year')
+    for start, batch in df.groupby(df['Year'] // BATCH_YEARS * BATCH_YEARS, sort=True):
+        rows = frame_rows(batch[['Year', 'Player', stat_name, 'Team']])
+        digest = hashlib.sha1(repr(rows).encode('utf-8')).hexdigest()
+        batches[int(start)] = (digest, batch)
+    return batches
+
+def has_star_schema(cursor):
+    """True once the leaders table exists and the old names are views, not legacy tables"""
+    names = dict(cursor.execute("SELECT name, type FROM sqlite_master").fetchall())
+    return names.get('leaders') == 'table' and all(names.get(name) != 'table' for name in compatibility_views())
+
+def record_import_metadata(cursor, file_hashes, tables):
+    """Store the file hashes and season-batch hashes of what is now in the database"""
+    imported_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    cursor.executemany("INSERT OR REPLACE INTO import_files (name, hash, imported_at) VALUES (?, ?, ?)",
+                       [(name, digest, imported_at) for name, digest in file_hashes.items()])
+    mapping = stat_league_tables()
+    for name, df in tables.items():
+        if name not in mapping:
+            continue
+        cursor.execute("DELETE FROM import_batches WHERE name = ?", (name,))
+        cursor.executemany("INSERT INTO import_batches (name, batch_start, hash, rows) VALUES (?, ?, ?, ?)",
+                           [(name, start, digest, len(batch))
+                            for start, (digest, batch) in season_batches(df, mapping[name][0]).items()])
+
+def incremental_import(conn, cleaned_dir='cleaned_data', max_error_rate=DEFAULT_MAX_ERROR_RATE):
+    """Bring the database up to date with cleaned_dir, writing only what changed.
+
+    Files whose hash matches import_files are skipped. Changed files are
+    validated, then compared decade by decade with import_batches; only
+    changed decades are upserted on (stat, league, year), and seasons that
+    disappeared from a decade are deleted. All writes happen in a single
+    transaction in WAL mode, so readers keep seeing the previous data until
+    the commit and never an empty table. Touched tables are re-analyzed.
+    A database without the star schema gets a full bulk load instead.
+    Returns the number of leader rows written or deleted.
+    """
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    for schema in IMPORT_METADATA_SCHEMA:
+        cursor.execute(schema)
+    conn.commit()
+    
+    paths = {os.path.basename(path).replace('.csv', ''): path
+             for path in sorted(glob.glob(os.path.join(cleaned_dir, '*.csv')))}
+    file_hashes = {name: file_hash(path) for name, path in paths.items()}
+    
+    if not has_star_schema(cursor):
+        print("No star schema yet: running a full import")
+        tables = read_cleaned_data(cleaned_dir)
+        validate_or_raise(tables, max_error_rate)
+        bulk_load_tables(conn, tables)
+        for schema in IMPORT_METADATA_SCHEMA:
+            cursor.execute(schema)
+        record_import_metadata(cursor, file_hashes, tables)
+        conn.commit()
+        return sum(len(df) for name, df in tables.items() if name in stat_league_tables())
+    
+    stored = dict(cursor.execute("SELECT name, hash FROM import_files").fetchall())
+    changed = [name for name, digest in file_hashes.items() if stored.get(name) != digest]
+    for name in sorted(set(file_hashes) - set(changed)):
+        print(f"{name}: unchanged, skipped")
+    if not changed:
+        print("Database is up to date.")
+        return 0
+    
+    tables = {}
+    for name in changed:
+        df = pd.read_csv(paths[name])
+        df['Year'] = df['Year'].astype('Int64')
+        tables[name] = df
+    validate_or_raise(tables, max_error_rate, required=())
+    
+    mapping = stat_league_tables()
+    written = 0
+    first_year = None
+    team_ids = set()
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        for name, df in tables.items():
+            if name not in mapping:
+                print(f"{name}: derived from the leaders table, nothing to write")
+                continue
+            
+            stat_name, league = mapping[name]
+            old_batches = dict(cursor.execute("SELECT batch_start, hash FROM import_batches WHERE name = ?",
+                                              (name,)).fetchall())
+            new_batches = season_batches(df, stat_name)
+            
+            batch_rows = 0
+            for start in sorted(set(old_batches) | set(new_batches)):
+                digest, batch = new_batches.get(start, (None, df.iloc[0:0]))
+                if old_batches.get(start) == digest:
+                    continue
+                decade = (start, start + BATCH_YEARS - 1)
+                team_ids |= season_teams(cursor, stat_name, league, *decade)
+                batch_rows += upsert_leader_rows(cursor, stat_name, league, batch)
+                # Seasons in this decade that are no longer in the file
+                years = [int(y) for y in batch['Year']]
+                cursor.execute(f"""
+                    DELETE FROM leaders
+                    WHERE {stat_filter('leaders', stat_name, league)}
+                    AND year BETWEEN ? AND ?
+                    AND year NOT IN ({', '.join('?' * len(years))})
+                """, (*decade, *years))
+                batch_rows += cursor.rowcount
+                team_ids |= season_teams(cursor, stat_name, league, *decade)
+                first_year = min(first_year, start) if first_year is not None else start
+            
+            print(f"{name}: {batch_rows} rows upserted or deleted")
+            written += batch_rows
+        
+        if written:
+            refresh_aggregates(cursor, team_ids)
+            refresh_analytics(cursor, first_year)
+            bump_generation(cursor)
+        record_import_metadata(cursor, {name: file_hashes[name] for name in changed}, tables)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    
+    if written:
+        for table in ['leaders', 'players', 'teams', *AGGREGATE_TABLES, *ANALYTICS_TABLES]:
+            cursor.execute(f"ANALYZE {table}")
+    return written
+
+def list_tables(cursor):
+    """Names of user tables and views (compatibility views included)"""
+    cursor.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view') "
+                   "AND name NOT LIKE 'sqlite_%' AND name NOT LIKE ? ESCAPE '\\' ORDER BY type, name",
+                   (SEARCH_SHADOW_TABLES,))
+    return cursor.fetchall()
+
 def show_database_summary(conn):
     """Show summary of database contents"""
     cursor = conn.cursor()
     
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-    tables = cursor.fetchall()
+    tables = list_tables(cursor)
     
     print("\nDATABASE SUMMARY:")
     print("=" * 50)
@@ -120,14 +719,20 @@ def show_database_summary(conn):
         print(f"  Rows: {count}")
         print(f"  Columns: {', '.join(column_names)}")
 
-def query_interface(conn):
-    """Interactive SQL query interface"""
+def query_interface(conn, profile=False, timeout=None):
+    """Interactive SQL query interface.
+
+    With profile on, each query is followed by its plan, time, VM steps and
+    index suggestions; timeout (seconds) aborts runaway queries. Slow queries
+    are always logged (see query_profiler).
+    """
     
     print("\nINTERACTIVE SQL QUERY INTERFACE")
-    print("Type 'exit' to quit, 'tables' to list tables, 'help' for examples")
+    print("Type 'exit' to quit, 'tables' to list tables, 'help' for examples, 'profile on/off' to toggle profiling")
     print("=" * 60)
     
     while True:
+        monitor = QueryMonitor(timeout)
         try:
             query = input("\nSQL> ").strip()
             
@@ -135,8 +740,7 @@ def query_interface(conn):
                 break
             elif query.lower() == 'tables':
                 cursor = conn.cursor()
-                cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-                tables = cursor.fetchall()
+                tables = list_tables(cursor)
                 print("Available tables:")
                 for table in tables:
                     cursor.execute(f"SELECT COUNT(*) FROM {table[0]}")
@@ -146,19 +750,42 @@ def query_interface(conn):
             elif query.lower() == 'help':
                 show_query_examples()
                 continue
+            elif query.lower() in ('profile on', 'profile off'):
+                profile = query.lower() == 'profile on'
+                print(f"Profiling {'on' if profile else 'off'}")
+                continue
             elif not query:
                 continue
             
             # Execute query
-            df = pd.read_sql_query(query, conn)
+            monitor.capture_plan(conn, query)
+            monitor.install(conn)
+            try:
+                with monitor.running():
+                    cursor = conn.execute(query)
+                    rows = cursor.fetchall()
+            finally:
+                monitor.remove(conn)
+            if cursor.description is None:
+                # Statements without a result set (CREATE, DROP, ...)
+                conn.commit()
+                print("Statement executed")
+                report(conn, query, monitor, 0, profile)
+                continue
+            df = pd.DataFrame(rows, columns=[column[0] for column in cursor.description])
             print(f"\nResults ({len(df)} rows):")
             if len(df) > 0:
                 print(df.head(20))  # Show first 20 rows
             else:
                 print("No results found.")
+            report(conn, query, monitor, len(df), profile)
                 
         except Exception as e:
-            print(f"Query error: {e}")
+            if str(e).endswith('interrupted') and monitor.timed_out:
+                print(f"Query timed out after {timeout}s")
+                report(conn, query, monitor, 0, profile)
+            else:
+                print(f"Query error: {e}")
 
 def show_query_examples():
     """Show example SQL queries"""
@@ -180,9 +807,49 @@ def show_query_examples():
 
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description="Import cleaned pitching data into SQLite")
+    parser.add_argument('--delta', action='store_true',
+                        help="only apply the pending season deltas in cleaned_data/delta and exit")
+    parser.add_argument('--incremental', action='store_true',
+                        help="upsert only the cleaned files and seasons that changed since the last import and exit")
+    parser.add_argument('--no-interactive', action='store_true',
+                        help="exit after the import instead of starting the query interface")
+    parser.add_argument('--profile', action='store_true',
+                        help="show the query plan and timing of every query at the prompt")
+    parser.add_argument('--timeout', type=float, help="abort prompt queries running longer than this (seconds)")
+    parser.add_argument('--max-error-rate', type=float, default=DEFAULT_MAX_ERROR_RATE,
+                        help="share of rows per table allowed to break a data quality rule")
+    args = parser.parse_args()
+    
     print("BASEBALL STATISTICS DATABASE IMPORT")
     print("=" * 50)
     
+    if args.delta:
+        conn = sqlite3.connect('baseball_cleaned.db')
+        try:
+            create_database_schema(conn)
+            applied = apply_delta(conn, max_error_rate=args.max_error_rate)
+            print(f"Applied {applied} delta rows")
+        except DataQualityError as e:
+            print(f"\nError: {e}. Database left unchanged (see quality_report.json).")
+            raise SystemExit(1)
+        finally:
+            conn.close()
+        return
+    
+    if args.incremental:
+        conn = sqlite3.connect('baseball_cleaned.db')
+        try:
+            create_database_schema(conn)
+            written = incremental_import(conn, max_error_rate=args.max_error_rate)
+            print(f"Wrote {written} leader rows")
+        except DataQualityError as e:
+            print(f"\nError: {e}. Database left unchanged (see quality_report.json).")
+            raise SystemExit(1)
+        finally:
+            conn.close()
+        return
+    
     # Check if cleaned data exists in current directory
     if not os.path.exists('cleaned_data'):
         print("Error: 'cleaned_data' folder not found. Run data_cleaner.py first.")
@@ -194,14 +861,16 @@ def main():
     try:
         # Create schema and import data
         create_database_schema(conn)
-        import_cleaned_data(conn)
+        import_cleaned_data(conn, args.max_error_rate)
         show_database_summary(conn)
         
         # Start query interface
-        query_interface(conn)
+        if not args.no_interactive:
+            query_interface(conn, args.profile, args.timeout)
         
     except Exception as e:
         print(f"Error: {e}")
+        raise SystemExit(1)
     finally:
         conn.close()
         print("\nDatabase connection closed.")
@@ -0,0 +1,97 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# Series longer than this are drawn with WebGL traces
+WEBGL_THRESHOLD = 1000
+
+# Points kept per series when downsampling is on
+DOWNSAMPLE_POINTS = 2000
+
+def minmax_downsample(df, x, y, max_points=DOWNSAMPLE_POINTS):
+    """Keep at most max_points rows of a series sorted by x, preserving the extremes.
+
+    The series is cut into max_points / 2 equal buckets and the rows with the
+    lowest and highest y of every bucket are kept, so peaks and dips survive.
+    """
+    if len(df) <= max_points:
+        return df
+    df = df.sort_values(x)
+    values = df[y].to_numpy(dtype='float64')
+    buckets = np.array_split(np.arange(len(df)), max_points // 2)
+    keep = set()
+    for bucket in buckets:
+        bucket_values = values[bucket]
+        if np.isnan(bucket_values).all():
+            continue
+        keep.add(bucket[np.nanargmin(bucket_values)])
+        keep.add(bucket[np.nanargmax(bucket_values)])
+    return df.iloc[sorted(keep)]
+
+def longest_series(df, group=None):
+    """Number of points in the longest series (one series per group value)"""
+    if group is None or df.empty:
+        return len(df)
+    return int(df.groupby(group, observed=True).size().max())
+
+def downsample_groups(df, x, y, group, max_points=DOWNSAMPLE_POINTS):
+    """minmax_downsample every series (one per group value) of a long frame"""
+    if longest_series(df, group) <= max_points:
+        return df
+    return pd.concat([minmax_downsample(part, x, y, max_points)
+                      for _, part in df.groupby(group, observed=True, sort=False)])
+
+def render_mode(df, group=None):
+    """'webgl' once the longest series passes WEBGL_THRESHOLD points, else 'svg'"""
+    return 'webgl' if longest_series(df, group) > WEBGL_THRESHOLD else 'svg'
+
+class FigureCache:
+    """Process-wide LRU cache of built Plotly figures with their JSON payload size.
+
+    Keys must include everything the figure depends on: chart name, filters
+    and the data generation, so a new import never serves an old figure.
+    """
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.figures = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.payload_bytes = {}
+
+    def get(self, key, build):
+        """Cached figure for key, calling build() on a miss"""
+        with self.lock:
+            if key in self.figures:
+                self.figures.move_to_end(key)
+                self.hits += 1
+                return self.figures[key]
+
+        fig = build()
+        payload = len(fig.to_json())
+        with self.lock:
+            self.misses += 1
+            self.figures[key] = fig
+            self.payload_bytes[key[0]] = payload
+            while len(self.figures) > self.max_entries:
+                self.figures.popitem(last=False)
+        return fig
+
+    def metrics(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self.figures),
+            # Latest JSON size sent to the browser per chart
+            'payload_bytes': dict(self.payload_bytes)
+        }
+
+_shared = FigureCache()
+
+def shared_figure_cache():
+    """The FigureCache shared by every session of this process"""
+    return _shared
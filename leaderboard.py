@@ -0,0 +1,72 @@
+import pandas as pd
+import dashboard_data
+from stats import LEAGUES, STATS
+
+# Every leaderboard has these columns, the stat's value under its own name
+COLUMNS = ['Rank', 'League', 'Year', 'Player', 'Team']
+
+def leaderboard_query(stat_name, leagues, years, k, direction, per_league):
+    """SQL and parameters for one leaderboard.
+
+    Ranks leaders rows over the (stat_id, league_id, year) primary key
+    range, sorted and cut with LIMIT or ROW_NUMBER in SQL; only the k
+    kept rows are joined to their names.
+    """
+    order = f"value {'ASC' if direction == 'asc' else 'DESC'}, year, league_id"
+    league_marks = ', '.join('?' * len(leagues))
+    params = [stat_name, *leagues, years[0], years[1], k]
+
+    rows = f"""
+        SELECT league_id, year, player_id, team_id, value
+        FROM leaders
+        WHERE stat_id = (SELECT stat_id FROM stats WHERE name = ?)
+        AND league_id IN (SELECT league_id FROM leagues WHERE code IN ({league_marks}))
+        AND year BETWEEN ? AND ?
+    """
+    if per_league:
+        top = f"""
+            SELECT * FROM (SELECT *, ROW_NUMBER() OVER (PARTITION BY league_id ORDER BY {order}) AS Rank
+                           FROM ({rows}))
+            WHERE Rank <= ?
+        """
+    else:
+        # The LIMIT lets SQLite keep only the best k rows while sorting; they are numbered afterwards
+        top = f"SELECT *, ROW_NUMBER() OVER (ORDER BY {order}) AS Rank FROM ({rows} ORDER BY {order} LIMIT ?)"
+    query = f"""
+        SELECT g.code AS League, r.year AS Year, p.name AS Player, t.name AS Team, r.value AS Value, r.Rank
+        FROM ({top}) r
+        JOIN leagues g ON g.league_id = r.league_id
+        JOIN players p ON p.player_id = r.player_id
+        JOIN teams t ON t.team_id = r.team_id
+        ORDER BY {'League, ' if per_league else ''}r.Rank
+    """
+    return query, params
+
+def top_k(stat_name, leagues=None, years=None, k=10, direction=None, per_league=False, cache=None):
+    """The k best seasons of one stat.
+
+    leagues: league codes (default: all), years: inclusive (first, last)
+    season range (default: all), direction: 'asc' or 'desc' (default: the
+    stat's own), per_league: k per league instead of k overall.
+    Returns a DataFrame with Rank, League, Year, Player, Team and the stat.
+    Results are memoised in the shared data cache until the next import;
+    the returned frame is shared and must not be modified in place.
+    """
+    if stat_name not in STATS:
+        raise ValueError(f"unknown stat: {stat_name}")
+    if k <= 0:
+        raise ValueError(f"k must be positive, got {k}")
+    leagues = tuple(leagues or LEAGUES)
+    unknown = [code for code in leagues if code not in LEAGUES]
+    if unknown:
+        raise ValueError(f"unknown leagues: {', '.join(unknown)}")
+    years = tuple(years or (0, 9999))
+    direction = direction or STATS[stat_name]['direction']
+    query, params = leaderboard_query(stat_name, leagues, years, k, direction, per_league)
+
+    def load(conn):
+        df = pd.read_sql_query(query, conn, params=params)
+        return df.rename(columns={'Value': stat_name})[[*COLUMNS, stat_name]]
+
+    cache = cache or dashboard_data.shared_cache()
+    return cache.get(('top_k', stat_name, leagues, years, k, direction, per_league), load)
@@ -1,98 +1,511 @@
 from selenium import webdriver
+from selenium.common.exceptions import NoSuchElementException, WebDriverException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+from urllib.parse import urlparse
+from lxml import html as lxml_html
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from page_archive import DEFAULT_ARCHIVE_DIR, archive_page, list_snapshots, read_snapshot
+from page_cache import DEFAULT_CACHE_DIR, PageCache, content_hash
+from stats import LEAGUES, STATS
+from watermarks import (DELTA_DIR, WATERMARK_FILE, changed_seasons, league_rows,
+                        load_watermarks, merge_delta, save_watermarks)
 import pandas as pd
+import requests
+import argparse
+import threading
 import time
+from datetime import datetime, timezone
 import os
 
+BASE_URL = 'https://www.baseball-almanac.com'
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+# Page registry: every yearly leaders page that gets scraped. Stat pages come
+# from stats.STATS; register_page() can add any other two-league leader table.
+PAGES = []
+
+def register_page(name, path, stat):
+    """Add a two-league yearly leaders page (AL left, NL right) to the registry"""
+    PAGES.append({
+        'name': name,
+        'path': path,
+        'headers': ['Year_AL', 'AL_Player', f'AL_{stat}', 'AL_Team',
+                    'Year_NL', 'NL_Player', f'NL_{stat}', 'NL_Team']
+    })
+
+for stat_name, spec in STATS.items():
+    register_page(spec['page'], spec['path'], stat_name)
+
+# HTTP statuses worth retrying; anything else (e.g. 404) fails the page at once
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
 def setup_driver():
     options = Options()
     options.add_argument("--disable-blink-features=AutomationControlled")
-    options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36")
+    options.add_argument(f"--user-agent={USER_AGENT}")
     return webdriver.Chrome(options=options)
 
-def scrape_pitching_leaders():
-    driver = setup_driver()
-    
-    # Only 3 main statistics - strikeouts, wins, ERA
-    pages = [
-        {
-            'name': 'yearly_strikeouts',
-            'url': 'https://www.baseball-almanac.com/pitching/pistrik4.shtml',
-            'headers': ['Year_AL', 'AL_Player', 'AL_Strikeouts', 'AL_Team', 'Year_NL', 'NL_Player', 'NL_Strikeouts', 'NL_Team']
-        },
-        {
-            'name': 'yearly_wins', 
-            'url': 'https://www.baseball-almanac.com/pitching/piwins4.shtml',
-            'headers': ['Year_AL', 'AL_Player', 'AL_Wins', 'AL_Team', 'Year_NL', 'NL_Player', 'NL_Wins', 'NL_Team']
-        },
-        {
-            'name': 'yearly_era',
-            'url': 'https://www.baseball-almanac.com/pitching/piera4.shtml',
-            'headers': ['Year_AL', 'AL_Player', 'AL_ERA', 'AL_Team', 'Year_NL', 'NL_Player', 'NL_ERA', 'NL_Team']
-        }
-    ]
-    
-    all_data = {}
-    
-    for page in pages:
+def setup_session():
+    """Plain HTTP session used by the static fetch mode"""
+    session = requests.Session()
+    session.headers.update({'User-Agent': USER_AGENT})
+    return session
+
+class HostRateLimiter:
+    """Politeness limiter: starts requests to the same host at least min_interval seconds apart"""
+
+    def __init__(self, min_interval=1.0):
+        self.min_interval = min_interval
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.min_interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+class SharedDriver:
+    """One lazily started Chrome instance, used by one worker at a time"""
+
+    def __init__(self, page_timeout):
+        self.page_timeout = page_timeout
+        self.lock = threading.Lock()
+        self._driver = None
+
+    def get(self):
+        if self._driver is None:
+            self._driver = setup_driver()
+            self._driver.set_page_load_timeout(self.page_timeout)
+        return self._driver
+
+    def quit(self):
+        if self._driver is not None:
+            self._driver.quit()
+            self._driver = None
+
+def is_retryable(error):
+    """Transient network/server failures are retried, client errors are not"""
+    if isinstance(error, requests.HTTPError):
+        return error.response is not None and error.response.status_code in RETRYABLE_STATUS
+    return isinstance(error, (requests.ConnectionError, requests.Timeout, WebDriverException))
+
+def page_text(content, charset=None):
+    """Page bytes as text for the parser.
+
+    The charset from the HTTP header wins; without one the body is tried as
+    UTF-8 and otherwise left as bytes so lxml follows the page's own
+    <meta charset>.
+    """
+    if charset:
+        return content.decode(charset, errors='replace')
+    try:
+        return content.decode('utf-8')
+    except UnicodeDecodeError:
+        return content
+
+def response_charset(response):
+    """Charset declared in the Content-Type header, or None.
+
+    requests reports ISO-8859-1 for any text/html response without one,
+    which would turn UTF-8 names into mojibake.
+    """
+    if 'charset=' in response.headers.get('Content-Type', '').lower():
+        return response.encoding
+    return None
+
+def parse_leader_table(page_html):
+    """Extract the 8-cell data rows of the first table in a page (text or raw bytes, see page_text)"""
+    if isinstance(page_html, bytes):
+        page_html = page_text(page_html)
+    doc = lxml_html.fromstring(page_html)
+    table = doc.find('.//table')
+    if table is None:
+        return []
+
+    data_rows = []
+    for row in table.findall('.//tr')[1:]:
+        cells = row.findall('.//td')
+        if cells and len(cells) == 8:
+            # Collapse whitespace the way the browser renders cell text
+            row_data = [' '.join(cell.text_content().split()) for cell in cells]
+            data_rows.append(row_data)
+    return data_rows
+
+def scrape_page_static(session, url, timeout=30, timings=None, cache=None, refresh=False,
+                       archive_dir=None, fetched_at=None):
+    """Fetch a page over plain HTTP and parse its leader table.
+
+    With a cache, the request is made conditional on the stored validators;
+    a 304 or a body with an unchanged hash reuses the cached rows without
+    parsing. refresh ignores what is cached and re-parses the page. Every
+    downloaded body (a 200, even one whose hash is unchanged; not a 304) is
+    stored in the raw page archive under fetched_at when archive_dir is set.
+    """
+    timings = timings if timings is not None else {}
+    entry = cache.get(url) if cache is not None and not refresh else None
+    headers = cache.conditional_headers(entry) if entry is not None else {}
+
+    start = time.perf_counter()
+    response = session.get(url, timeout=timeout, headers=headers)
+    timings['fetch'] = time.perf_counter() - start
+
+    if entry is not None and response.status_code == 304:
+        timings['cached'] = 0.0
+        return entry['rows']
+    response.raise_for_status()
+
+    if archive_dir is not None:
+        archive_page(url, response.content, archive_dir, fetched_at)
+
+    body_hash = content_hash(response.content)
+    if entry is not None and entry.get('content_hash') == body_hash:
+        timings['cached'] = 0.0
+        return entry['rows']
+
+    start = time.perf_counter()
+    data_rows = parse_leader_table(page_text(response.content, response_charset(response)))
+    timings['parse'] = time.perf_counter() - start
+
+    if cache is not None and data_rows:
+        cache.put(url, response, body_hash, data_rows)
+    return data_rows
+
+# Reads the whole leader table in one WebDriver round trip. Mirrors the
+# per-cell loop: all descendant <tr> of the first table minus the first one,
+# rows with exactly 8 <td>, WebElement.text semantics (nbsp -> space, trimmed).
+EXTRACT_TABLE_JS = """
+const table = document.getElementsByTagName('table')[0];
+if (!table) { return null; }
+const rows = Array.from(table.getElementsByTagName('tr')).slice(1);
+const data = [];
+for (const row of rows) {
+    const cells = row.getElementsByTagName('td');
+    if (cells.length === 8) {
+        data.push(Array.from(cells, cell => cell.innerText.replace(/\\u00a0/g, ' ').trim()));
+    }
+}
+return data;
+"""
+
+def extract_table_per_cell(driver):
+    """Read the first table cell by cell (one WebDriver call per row and per cell)"""
+    table = driver.find_element(By.TAG_NAME, "table")
+    rows = table.find_elements(By.TAG_NAME, "tr")
+
+    data_rows = []
+    for row in rows[1:]:
+        cells = row.find_elements(By.TAG_NAME, "td")
+        if cells and len(cells) == 8:
+            row_data = [cell.text.strip() for cell in cells]
+            data_rows.append(row_data)
+    return data_rows
+
+def extract_table_bulk(driver):
+    """Read the first table as a nested list with a single execute_script call"""
+    data_rows = driver.execute_script(EXTRACT_TABLE_JS)
+    if data_rows is None:
+        raise NoSuchElementException("no <table> element on page")
+    return data_rows
+
+def scrape_page_selenium(driver, url, extract='bulk', wait_timeout=10, timings=None,
+                         archive_dir=None, fetched_at=None):
+    """Render a page in Chrome and read its leader table.
+
+    Instead of sleeping a fixed time, waits until the first table is present.
+    extract 'bulk' pulls the table in one round trip; 'per-cell' keeps the
+    original element-by-element loop for comparison. The rendered page
+    source is archived under fetched_at when archive_dir is set.
+    """
+    timings = timings if timings is not None else {}
+    start = time.perf_counter()
+    driver.get(url)
+    timings['load'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    WebDriverWait(driver, wait_timeout).until(
+        EC.presence_of_element_located((By.TAG_NAME, "table")))
+    timings['wait'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if extract == 'bulk':
+        data_rows = extract_table_bulk(driver)
+    else:
+        data_rows = extract_table_per_cell(driver)
+    timings['extract'] = time.perf_counter() - start
+
+    if archive_dir is not None:
+        archive_page(url, driver.page_source.encode('utf-8'), archive_dir, fetched_at)
+    return data_rows
+
+def with_retries(fetch, url, limiter, retries, backoff, deadline):
+    """Call fetch(timeout) under the rate limiter, retrying transient errors with exponential backoff"""
+    attempt = 0
+    while True:
+        limiter.wait(url)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"page timeout exceeded for {url}")
         try:
-            print(f"Scraping {page['name']}...")
-            driver.get(page['url'])
-            time.sleep(3)
-            
-            table = driver.find_element(By.TAG_NAME, "table")
-            rows = table.find_elements(By.TAG_NAME, "tr")
-            
-            data_rows = []
-            for row in rows[1:]:
-                cells = row.find_elements(By.TAG_NAME, "td")
-                if cells and len(cells) == 8:
-                    row_data = [cell.text.strip() for cell in cells]
-                    data_rows.append(row_data)
-            
-            df = pd.DataFrame(data_rows, columns=page['headers'])
-            all_data[page['name']] = df
-            
-            print(f"Saved {len(data_rows)} rows")
-            
+            return fetch(remaining)
         except Exception as e:
-            print(f"Error: {e}")
-            continue
-    
-    driver.quit()
+            attempt += 1
+            delay = backoff * 2 ** (attempt - 1)
+            if attempt > retries or not is_retryable(e) or time.monotonic() + delay >= deadline:
+                raise
+            print(f"Retrying {url} in {delay:.1f}s ({e})")
+            time.sleep(delay)
+
+def scrape_page(page, base_url, fetch_mode, sessions, shared_driver, limiter,
+                retries=3, backoff=1.0, timeout=60, extract='bulk', cache=None, refresh=False,
+                archive_dir=None, fetched_at=None):
+    """Scrape one registry page and return its DataFrame"""
+    url = base_url.rstrip('/') + page['path']
+    deadline = time.monotonic() + timeout
+    timings = {}
+    print(f"Scraping {page['name']}...")
+
+    data_rows = []
+    if fetch_mode == 'static':
+        if not hasattr(sessions, 'session'):
+            sessions.session = setup_session()
+        session = sessions.session
+        data_rows = with_retries(
+            lambda t: scrape_page_static(session, url, t, timings, cache, refresh,
+                                         archive_dir, fetched_at),
+            url, limiter, retries, backoff, deadline)
+        if not data_rows:
+            print(f"No table rows in static HTML for {page['name']}, falling back to Selenium")
+
+    if not data_rows:
+        with shared_driver.lock:
+            driver = shared_driver.get()
+            data_rows = with_retries(
+                lambda t: scrape_page_selenium(driver, url, extract, min(t, 10), timings,
+                                               archive_dir, fetched_at),
+                url, limiter, retries, backoff, deadline)
+
+    print(f"Saved {len(data_rows)} rows for {page['name']}")
+    print(f"Timing {page['name']}: " + ", ".join(f"{step} {secs:.2f}s" for step, secs in timings.items()))
+    return pd.DataFrame(data_rows, columns=page['headers'])
+
+def scrape_pitching_leaders(fetch_mode='static', base_url=BASE_URL, workers=4,
+                            delay=1.0, retries=3, backoff=1.0, timeout=60, extract='bulk',
+                            cache=None, refresh=False, archive_dir=None):
+    """Scrape every page in PAGES with a bounded pool of worker threads.
+
+    fetch_mode 'static' uses a plain HTTP client and only starts Chrome for
+    pages whose table could not be read from the raw HTML; 'selenium' renders
+    every page in the browser. extract picks how Selenium reads the table
+    ('bulk' or 'per-cell'). With a PageCache, static pages that have not
+    changed upstream come from the cache; refresh bypasses it. A page that
+    fails is reported and left out of the result without stopping the others.
+    All pages archived by one run share its start time, so a run is one
+    snapshot folder under --replay-all.
+    """
+    sessions = threading.local()
+    shared_driver = SharedDriver(timeout)
+    limiter = HostRateLimiter(delay)
+    options = {'retries': retries, 'backoff': backoff, 'timeout': timeout, 'extract': extract,
+               'cache': cache, 'refresh': refresh, 'archive_dir': archive_dir,
+               'fetched_at': datetime.now(timezone.utc)}
+
+    all_data = {}
+    failed = []
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            page['name']: pool.submit(scrape_page, page, base_url, fetch_mode, sessions,
+                                      shared_driver, limiter, **options)
+            for page in PAGES
+        }
+        # Collect in registry order so downstream files are written deterministically
+        for name, future in futures.items():
+            try:
+                all_data[name] = future.result()
+            except Exception as e:
+                print(f"Error scraping {name}: {e}")
+                failed.append(name)
+
+    shared_driver.quit()
+
+    if failed:
+        print(f"Failed pages: {', '.join(failed)}")
     return all_data
 
-def main():
-    os.makedirs('data', exist_ok=True)
-    
-    print("SCRAPING PITCHING LEADERS DATA")
-    print("=" * 40)
-    
-    data = scrape_pitching_leaders()
-    
+def parse_snapshot(path):
+    """Parse the leader table of one archived snapshot (runs in a worker process)"""
+    return parse_leader_table(read_snapshot(path))
+
+def replay_archive(base_url=BASE_URL, archive_dir=DEFAULT_ARCHIVE_DIR, all_snapshots=False, workers=None):
+    """Rebuild page DataFrames from the raw page archive without any network access.
+
+    Returns {snapshot time: {page name: DataFrame}}. By default only the latest
+    snapshot of each page is parsed (under the key 'latest'); all_snapshots
+    parses every archived fetch, grouped by fetch time. Snapshots are parsed
+    in parallel across CPU cores.
+    """
+    jobs = []
+    for page in PAGES:
+        url = base_url.rstrip('/') + page['path']
+        snapshots = list_snapshots(url, archive_dir)
+        if not snapshots:
+            print(f"No archived snapshots for {page['name']}")
+            continue
+        if not all_snapshots:
+            snapshots = [('latest', snapshots[-1][1])]
+        for stamp, path in snapshots:
+            jobs.append((stamp, page, path))
+
+    replayed = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(parse_snapshot, [path for _, _, path in jobs], chunksize=4)
+        for (stamp, page, path), data_rows in zip(jobs, results):
+            replayed.setdefault(stamp, {})[page['name']] = pd.DataFrame(data_rows, columns=page['headers'])
+
+    print(f"Replayed {len(jobs)} archived pages")
+    return replayed
+
+def build_combined(data):
+    """Simple combined AL view with one column per registered stat, or None if a page is missing"""
+    if not all(spec['page'] in data for spec in STATS.values()):
+        return None
+
+    # Year, player and team come from the first registered stat's page
+    first_page = data[next(iter(STATS.values()))['page']]
+    combined = first_page[['Year_AL', 'AL_Player', 'AL_Team']].copy()
+    for stat_name, spec in STATS.items():
+        combined[stat_name] = data[spec['page']][f'AL_{stat_name}']
+    return combined
+
+def save_page_data(data, data_dir='data'):
+    """Write one CSV per page plus the combined AL file"""
+    os.makedirs(data_dir, exist_ok=True)
+
     # Save individual files
     for name, df in data.items():
-        filename = f"data/{name}.csv"
+        filename = os.path.join(data_dir, f"{name}.csv")
         df.to_csv(filename, index=False)
         print(f"Created: {filename}")
     
     # Create combined file
-    if len(data) == 3:
-        strikeouts = data['yearly_strikeouts']
-        wins = data['yearly_wins']
-        era = data['yearly_era']
-        
-        # Simple combined view
-        combined = strikeouts[['Year_AL', 'AL_Player', 'AL_Team']].copy()
-        combined['Strikeouts'] = strikeouts['AL_Strikeouts']
-        combined['Wins'] = wins['AL_Wins']
-        combined['ERA'] = era['AL_ERA']
-        
-        combined.to_csv('combined_pitching.csv', index=False)
-        print("Created: combined_pitching.csv")
+    combined = build_combined(data)
+    if combined is not None:
+        filename = os.path.join(data_dir, 'combined_pitching.csv')
+        combined.to_csv(filename, index=False)
+        print(f"Created: {filename}")
+
+def write_deltas(data, watermark_path=WATERMARK_FILE, delta_dir=DELTA_DIR):
+    """Compare scraped pages with their season watermarks and write only new/changed seasons.
+
+    Each page/league gets a pending delta file delta_dir/<page>_<league>.csv
+    (raw 4-column league half) and the combined AL view gets
+    delta_dir/combined_pitching.csv. Pending rows accumulate until
+    data_cleaner --delta consumes them.
+    """
+    os.makedirs(delta_dir, exist_ok=True)
+    marks = load_watermarks(watermark_path)
+    changed_al_years = set()
+
+    for page in PAGES:
+        if page['name'] not in data:
+            continue
+        stat_name = page['headers'][2].split('_', 1)[1]
+        page_marks = marks.setdefault(page['name'], {})
+
+        for league, league_name in LEAGUES.items():
+            rows = league_rows(data[page['name']], league, stat_name)
+            changed, page_marks[league] = changed_seasons(rows, page_marks.get(league))
+            if league == 'AL':
+                changed_al_years |= changed
+            if not changed:
+                continue
+
+            delta = rows[rows['Year'].astype(int).isin(changed)]
+            filename = os.path.join(delta_dir, f"{page['name']}_{league_name}.csv")
+            pending = merge_delta(filename, delta)
+            print(f"Delta {page['name']} {league}: {len(changed)} changed seasons ({pending} pending)")
+
+    combined = build_combined(data)
+    if combined is not None and changed_al_years:
+        years = {str(year) for year in changed_al_years}
+        delta = combined[combined['Year_AL'].astype(str).isin(years)]
+        merge_delta(os.path.join(delta_dir, 'combined_pitching.csv'), delta, key='Year_AL')
+
+    save_watermarks(marks, watermark_path)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scrape pitching leaders from Baseball Almanac")
+    parser.add_argument('--fetch', choices=['static', 'selenium'], default='static',
+                        help="static: plain HTTP with Selenium fallback (default); selenium: always use Chrome")
+    parser.add_argument('--base-url', default=BASE_URL,
+                        help="site root to scrape, e.g. a local fixture server")
+    parser.add_argument('--extract', choices=['bulk', 'per-cell'], default='bulk',
+                        help="how Selenium reads a table: one execute_script call (default) or cell by cell")
+    parser.add_argument('--workers', type=int, default=4, help="number of pages fetched concurrently")
+    parser.add_argument('--delay', type=float, default=1.0,
+                        help="minimum seconds between requests to the same host")
+    parser.add_argument('--retries', type=int, default=3, help="retries per page on transient errors")
+    parser.add_argument('--timeout', type=float, default=60, help="time budget per page in seconds")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help="directory of the page cache")
+    parser.add_argument('--cache-max-mb', type=float, default=50, help="size limit of the page cache in MB")
+    parser.add_argument('--no-cache', action='store_true', help="do not read or write the page cache")
+    parser.add_argument('--refresh', action='store_true',
+                        help="ignore cached pages, re-download and re-parse everything")
+    parser.add_argument('--archive-dir', default=DEFAULT_ARCHIVE_DIR, help="directory of the raw page archive")
+    parser.add_argument('--no-archive', action='store_true', help="do not store fetched pages in the archive")
+    parser.add_argument('--replay', action='store_true',
+                        help="rebuild data/*.csv from the archive instead of fetching (no network)")
+    parser.add_argument('--replay-all', action='store_true',
+                        help="with --replay, also rebuild every archived snapshot into data/snapshots/<time>/")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+
+    if args.replay:
+        print("REPLAYING ARCHIVED PAGES")
+        print("=" * 40)
+
+        replayed = replay_archive(args.base_url, args.archive_dir, all_snapshots=args.replay_all)
+        if args.replay_all:
+            for stamp, data in sorted(replayed.items()):
+                save_page_data(data, os.path.join('data', 'snapshots', stamp))
+
+            # The newest snapshot of each page becomes the current data
+            latest = {}
+            for stamp, data in sorted(replayed.items()):
+                latest.update(data)
+            save_page_data(latest)
+            write_deltas(latest)
+        elif replayed:
+            save_page_data(replayed['latest'])
+            write_deltas(replayed['latest'])
+        return
+
+    print("SCRAPING PITCHING LEADERS DATA")
+    print("=" * 40)
+    
+    cache = None
+    if not args.no_cache:
+        cache = PageCache(args.cache_dir, int(args.cache_max_mb * 1024 * 1024))
+
+    data = scrape_pitching_leaders(fetch_mode=args.fetch, base_url=args.base_url,
+                                   workers=args.workers, delay=args.delay,
+                                   retries=args.retries, timeout=args.timeout,
+                                   extract=args.extract, cache=cache, refresh=args.refresh,
+                                   archive_dir=None if args.no_archive else args.archive_dir)
+    save_page_data(data)
+    write_deltas(data)
     
     print(f"\nTotal files created: {len(os.listdir('.'))}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
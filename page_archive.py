@@ -0,0 +1,47 @@
+import gzip
+import os
+import re
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+
+# Bump when the on-disk layout changes; older layouts stay readable in their own folder
+ARCHIVE_VERSION = 'v1'
+DEFAULT_ARCHIVE_DIR = 'archive'
+SNAPSHOT_FORMAT = '%Y%m%dT%H%M%SZ'
+
+def url_key(url):
+    """Folder name for a URL, e.g. www.baseball-almanac.com_pitching_piera4.shtml"""
+    parsed = urlparse(url)
+    raw = parsed.netloc + parsed.path
+    if parsed.query:
+        raw += '_' + parsed.query
+    return re.sub(r'[^A-Za-z0-9.-]+', '_', raw).strip('_')
+
+def url_dir(url, archive_dir=DEFAULT_ARCHIVE_DIR):
+    return os.path.join(archive_dir, ARCHIVE_VERSION, url_key(url))
+
+def archive_page(url, content, archive_dir=DEFAULT_ARCHIVE_DIR, fetched_at=None):
+    """Store a fetched page gzip-compressed as <archive>/v1/<url key>/<fetch time>.html.gz"""
+    fetched_at = fetched_at or datetime.now(timezone.utc)
+    folder = url_dir(url, archive_dir)
+    os.makedirs(folder, exist_ok=True)
+
+    path = os.path.join(folder, f"{fetched_at.strftime(SNAPSHOT_FORMAT)}.html.gz")
+    tmp_path = f"{path}.tmp"
+    with gzip.open(tmp_path, 'wb') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+    return path
+
+def list_snapshots(url, archive_dir=DEFAULT_ARCHIVE_DIR):
+    """All archived snapshots of a URL as (fetch time string, path), oldest first"""
+    folder = url_dir(url, archive_dir)
+    if not os.path.isdir(folder):
+        return []
+    return [(name[:-len('.html.gz')], os.path.join(folder, name))
+            for name in sorted(os.listdir(folder)) if name.endswith('.html.gz')]
+
+def read_snapshot(path):
+    """Raw HTML bytes of an archived snapshot"""
+    with gzip.open(path, 'rb') as f:
+        return f.read()
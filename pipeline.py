@@ -0,0 +1,120 @@
+import argparse
+import sqlite3
+import time
+import data_cleaner
+import database_import
+import mlb_scraper
+from data_quality import DEFAULT_MAX_ERROR_RATE, DataQualityError, validate_or_raise
+from page_cache import DEFAULT_CACHE_DIR, PageCache
+
+STAGES = ['scrape', 'clean', 'load']
+
+def run_scrape(args):
+    """Scrape (or replay) every registry page into raw DataFrames, including the combined view"""
+    if args.replay:
+        replayed = mlb_scraper.replay_archive(args.base_url, args.archive_dir)
+        pages = replayed.get('latest', {})
+    else:
+        cache = None if args.no_cache else PageCache(args.cache_dir)
+        pages = mlb_scraper.scrape_pitching_leaders(fetch_mode=args.fetch, base_url=args.base_url,
+                                                    workers=args.workers, cache=cache,
+                                                    refresh=args.refresh, archive_dir=args.archive_dir)
+
+    if args.export_csv:
+        mlb_scraper.save_page_data(pages)
+        mlb_scraper.write_deltas(pages)
+
+    combined = mlb_scraper.build_combined(pages)
+    if combined is not None:
+        pages = {**pages, 'combined_pitching': combined}
+    return pages
+
+def run_clean(pages, args):
+    """Clean raw page frames into typed per-league tables"""
+    tables = data_cleaner.clean_page_data(pages)
+    if args.export_csv:
+        data_cleaner.save_cleaned_data(tables)
+    return tables
+
+def run_load(tables, args):
+    """Write cleaned tables to the SQLite database"""
+    conn = sqlite3.connect(args.db)
+    try:
+        database_import.create_database_schema(conn)
+        database_import.bulk_load_tables(conn, tables)
+        database_import.show_database_summary(conn)
+    finally:
+        conn.close()
+
+def run_pipeline(args):
+    """Run scrape -> clean -> load, handing DataFrames from stage to stage in memory.
+
+    --from resumes from a later stage by reading the persisted output of the
+    stage before it (data/*.csv for clean, cleaned_data/*.csv for load).
+    """
+    start_index = STAGES.index(args.start)
+    timings = {}
+
+    start = time.perf_counter()
+    if start_index == 0:
+        pages = run_scrape(args)
+        timings['scrape'] = time.perf_counter() - start
+    elif start_index == 1:
+        pages = data_cleaner.load_raw_data()
+        timings['read data/'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if start_index <= 1:
+        tables = run_clean(pages, args)
+    else:
+        tables = database_import.read_cleaned_data()
+    timings['clean' if start_index <= 1 else 'read cleaned_data/'] = time.perf_counter() - start
+
+    # A table that fails validation never reaches the database
+    start = time.perf_counter()
+    validate_or_raise(tables, args.max_error_rate)
+    timings['validate'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    run_load(tables, args)
+    timings['load'] = time.perf_counter() - start
+
+    print("\nPIPELINE TIMINGS:")
+    print("-" * 30)
+    for stage, secs in timings.items():
+        print(f"{stage}: {secs:.2f}s")
+    return tables
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scrape, clean and import pitching data in one process")
+    parser.add_argument('--from', dest='start', choices=STAGES, default='scrape',
+                        help="first stage to run; earlier stages are read from their CSV output")
+    parser.add_argument('--export-csv', action='store_true',
+                        help="also write data/*.csv and cleaned_data/*.csv as the stages run")
+    parser.add_argument('--max-error-rate', type=float, default=DEFAULT_MAX_ERROR_RATE,
+                        help="share of rows per table allowed to break a data quality rule")
+    parser.add_argument('--db', default='baseball_cleaned.db', help="SQLite database to load into")
+    parser.add_argument('--fetch', choices=['static', 'selenium'], default='static')
+    parser.add_argument('--base-url', default=mlb_scraper.BASE_URL)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    parser.add_argument('--no-cache', action='store_true')
+    parser.add_argument('--refresh', action='store_true')
+    parser.add_argument('--archive-dir', default=mlb_scraper.DEFAULT_ARCHIVE_DIR)
+    parser.add_argument('--replay', action='store_true', help="scrape stage reads the page archive instead of the network")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+
+    print("BASEBALL PITCHING PIPELINE")
+    print("=" * 40)
+
+    try:
+        run_pipeline(args)
+    except DataQualityError as e:
+        print(f"\nError: {e}. Database left unchanged (see quality_report.json).")
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
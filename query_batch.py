@@ -0,0 +1,203 @@
+import argparse
+import csv
+import json
+import os
+import queue
+import re
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+DB_PATH = 'baseball_cleaned.db'
+FORMATS = ['csv', 'jsonl', 'parquet']
+FETCH_SIZE = 5000
+
+def parse_query_file(path):
+    """Named queries from a file of '-- name: <name>' headers, each followed by its SQL"""
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+
+    queries = {}
+    parts = re.split(r'^--\s*name:\s*(\S+)\s*$', text, flags=re.MULTILINE)
+    for name, sql in zip(parts[1::2], parts[2::2]):
+        sql = sql.strip().rstrip(';').strip()
+        if name in queries:
+            raise ValueError(f"duplicate query name: {name}")
+        if sql:
+            queries[name] = sql
+    return queries
+
+class ReadOnlyPool:
+    """Fixed set of read-only SQLite connections shared by the worker threads.
+
+    mmap_size > 0 lets every connection read that many bytes of the file
+    through a memory map instead of read() calls into its page cache.
+    """
+
+    def __init__(self, db_path=DB_PATH, size=4, mmap_size=0):
+        self.size = size
+        self.connections = queue.Queue()
+        for _ in range(size):
+            conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+            if mmap_size:
+                conn.execute(f"PRAGMA mmap_size={int(mmap_size)}")
+            self.connections.put(conn)
+
+    def run(self, func, *args):
+        """Call func(conn, *args) with a connection borrowed from the pool"""
+        conn = self.connections.get()
+        try:
+            return func(conn, *args)
+        finally:
+            self.connections.put(conn)
+
+    def close(self):
+        while not self.connections.empty():
+            self.connections.get().close()
+
+def write_csv(path, columns, batches):
+    rows = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for batch in batches:
+            writer.writerows(batch)
+            rows += len(batch)
+    return rows
+
+def write_jsonl(path, columns, batches):
+    rows = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for batch in batches:
+            f.writelines(json.dumps(dict(zip(columns, row))) + "\n" for row in batch)
+            rows += len(batch)
+    return rows
+
+def require_pyarrow(purpose="Parquet output"):
+    """Import pyarrow (optional dependency) or explain what needs it and how to get it"""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError(f"{purpose} needs pyarrow (pip install pyarrow)")
+    return pyarrow, pyarrow.parquet
+
+def write_parquet(path, columns, batches):
+    """Write batches to one Parquet file.
+
+    Column types come from the first batch. When a later batch needs a
+    wider type (ints then floats in a NUMERIC column, or values in a
+    column that was all NULL), the rows written so far are rewritten with
+    the promoted schema.
+    """
+    pa, pq = require_pyarrow()
+    rows = 0
+    writer = None
+    try:
+        for batch in batches:
+            table = pa.Table.from_pylist([dict(zip(columns, row)) for row in batch])
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            elif table.schema != writer.schema:
+                schema = pa.unify_schemas([writer.schema, table.schema], promote_options='permissive')
+                if schema != writer.schema:
+                    writer.close()
+                    written = pq.read_table(path).cast(schema)
+                    writer = pq.ParquetWriter(path, schema)
+                    writer.write_table(written)
+            writer.write_table(table.cast(writer.schema))
+            rows += len(batch)
+        if writer is None:
+            pq.write_table(pa.table({column: [] for column in columns}), path)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+SINKS = {'csv': write_csv, 'jsonl': write_jsonl, 'parquet': write_parquet}
+
+def fetch_batches(cursor, fetch_size=FETCH_SIZE):
+    while True:
+        batch = cursor.fetchmany(fetch_size)
+        if not batch:
+            return
+        yield batch
+
+def run_named_query(conn, name, sql, output_dir, fmt, fetch_size=FETCH_SIZE):
+    """Stream one query's result into output_dir/<name>.<fmt> and time it"""
+    path = os.path.join(output_dir, f"{name}.{fmt}")
+    start = time.perf_counter()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql)
+        columns = [column[0] for column in cursor.description or []]
+        rows = SINKS[fmt](path, columns, fetch_batches(cursor, fetch_size))
+    except Exception:
+        # Do not leave a partial result behind
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+    finally:
+        cursor.close()
+    seconds = time.perf_counter() - start
+    return {'query': name, 'rows': rows, 'seconds': round(seconds, 4),
+            'rows_per_sec': round(rows / seconds) if seconds else None, 'output': path}
+
+def run_batch(queries, db_path=DB_PATH, output_dir='reports', fmt='csv', workers=4):
+    """Run named queries in parallel over a read-only pool; returns one timing dict per query.
+
+    A failing query is reported with its error and does not stop the others.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    if fmt == 'parquet':
+        # pyarrow finishes initialising on the first table it builds (~0.5s);
+        # do that up front so it is not billed to the first queries
+        require_pyarrow()[0].table({'warm_up': []})
+    pool = ReadOnlyPool(db_path, workers)
+    results = []
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {name: executor.submit(pool.run, run_named_query, name, sql, output_dir, fmt)
+                       for name, sql in queries.items()}
+            for name, future in futures.items():
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    results.append({'query': name, 'error': str(e)})
+    finally:
+        pool.close()
+
+    print_timings(results, time.perf_counter() - start)
+    return results
+
+def print_timings(results, wall_seconds):
+    print(f"\n{'query':<30} {'rows':>10} {'seconds':>9} {'rows/sec':>12}")
+    print("-" * 64)
+    for result in results:
+        if 'error' in result:
+            print(f"{result['query']:<30} ERROR: {result['error']}")
+        else:
+            rate = f"{result['rows_per_sec']:,}" if result['rows_per_sec'] is not None else '-'
+            print(f"{result['query']:<30} {result['rows']:>10} {result['seconds']:>9.3f} {rate:>12}")
+    print(f"\nTotal wall time: {wall_seconds:.3f}s")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a file of named queries and stream each result to a file")
+    parser.add_argument('queries', help="file of '-- name: <name>' headers, each followed by one SQL query")
+    parser.add_argument('--db', default=DB_PATH)
+    parser.add_argument('--output-dir', default='reports')
+    parser.add_argument('--format', choices=FORMATS, default='csv')
+    parser.add_argument('--workers', type=int, default=4, help="parallel queries (read-only connections)")
+    parser.add_argument('--timings', help="also write the per-query timings to this JSON file")
+    args = parser.parse_args()
+
+    results = run_batch(parse_query_file(args.queries), args.db, args.output_dir, args.format, args.workers)
+    if args.timings:
+        with open(args.timings, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    if any('error' in result for result in results):
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import json
+import re
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+SLOW_QUERY_LOG = 'slow_queries.jsonl'
+
+# Queries busy for longer than this many seconds go to the slow-query log
+SLOW_QUERY_SECONDS = 0.5
+
+# SQLite VM instructions between two progress handler calls
+STEP_INTERVAL = 1000
+
+# Filter/sort keys worth an index, with the column names they have in the
+# legacy wide tables and in the leaders fact table
+INDEX_CANDIDATES = {
+    'year': ['Year', 'year'],
+    'player': ['Player', 'player_id'],
+    'team': ['Team', 'team_id']
+}
+
+class QueryMonitor:
+    """Progress-handler state for one statement: VM steps, busy time, cancel and timeout.
+
+    Only time spent inside SQLite (within running()) counts towards the
+    timeout and the reported duration, not time waiting at a pager prompt.
+    The query plan is taken by capture_plan() before the statement runs.
+    """
+
+    def __init__(self, timeout=None, interval=STEP_INTERVAL):
+        self.timeout = timeout
+        self.interval = interval
+        self.steps = 0
+        self.busy_seconds = 0.0
+        self.started = None
+        self.cancelled = False
+        self.timed_out = False
+        self.plan = None
+
+    def install(self, conn):
+        conn.set_progress_handler(self.tick, self.interval)
+
+    def remove(self, conn):
+        conn.set_progress_handler(None, 0)
+
+    def cancel(self):
+        self.cancelled = True
+
+    def capture_plan(self, conn, sql):
+        """Remember the plan of a SELECT/WITH statement; others (and ones that fail to plan) get none.
+
+        Taken before execution, since a statement can change what it refers
+        to (DROP, CREATE) and EXPLAIN of anything but a query has no plan.
+        """
+        self.plan = None
+        if re.match(r'\s*(select|with)\b', sql, re.IGNORECASE):
+            try:
+                self.plan = query_plan(conn, sql)
+            except sqlite3.Error:
+                pass
+
+    @contextmanager
+    def running(self):
+        self.started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.busy_seconds += time.perf_counter() - self.started
+            self.started = None
+
+    def elapsed(self):
+        running = time.perf_counter() - self.started if self.started is not None else 0.0
+        return self.busy_seconds + running
+
+    def tick(self):
+        """Progress handler: a true return value makes SQLite abort with 'interrupted'"""
+        self.steps += self.interval
+        if self.timeout is not None and self.elapsed() > self.timeout:
+            self.timed_out = True
+        return self.cancelled or self.timed_out
+
+def query_plan(conn, sql):
+    """EXPLAIN QUERY PLAN rows as (id, parent, detail)"""
+    return [(row[0], row[1], row[3]) for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+
+def format_plan(plan):
+    """Plan rows as an indented tree"""
+    depth = {0: -1}
+    lines = []
+    for node_id, parent, detail in plan:
+        depth[node_id] = depth.get(parent, -1) + 1
+        lines.append("  " * depth[node_id] + "- " + detail)
+    return "\n".join(lines)
+
+def table_aliases(sql):
+    """alias (or table name) -> table for every FROM/JOIN in the query"""
+    aliases = {}
+    keywords = {'where', 'join', 'on', 'group', 'order', 'limit', 'left', 'inner', 'cross', 'union', 'using'}
+    for table, alias in re.findall(r'\b(?:from|join)\s+(\w+)(?:\s+(?:as\s+)?(\w+))?', sql, re.IGNORECASE):
+        aliases[table] = table
+        if alias and alias.lower() not in keywords:
+            aliases[alias] = table
+    return aliases
+
+def leading_index_columns(conn, table):
+    """Columns that are the first column of some index (or the rowid key) of a table"""
+    columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})") if row[5] == 1}
+    for index in conn.execute(f"PRAGMA index_list({table})").fetchall():
+        info = conn.execute(f"PRAGMA index_info({index[1]})").fetchall()
+        if info:
+            columns.add(info[0][2])
+    return columns
+
+def suggest_indexes(conn, sql, plan):
+    """CREATE INDEX statements for full table scans filtered or sorted on Year/Player/Team"""
+    after_from = re.split(r'\bfrom\b', sql, maxsplit=1, flags=re.IGNORECASE)[-1]
+    keys = [key for key in INDEX_CANDIDATES if re.search(rf'\b{key}(_id)?\b', after_from, re.IGNORECASE)]
+    aliases = table_aliases(sql)
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+    suggestions = []
+    for _, _, detail in plan:
+        match = re.match(r'SCAN (\w+)(.*)', detail)
+        if not match or 'INDEX' in match.group(2):
+            continue
+        table = aliases.get(match.group(1), match.group(1))
+        if table not in tables:
+            continue
+        columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+        indexed = leading_index_columns(conn, table)
+        for key in keys:
+            column = next((c for c in INDEX_CANDIDATES[key] if c in columns), None)
+            statement = f"CREATE INDEX idx_{table}_{column} ON {table}({column})"
+            if column and column not in indexed and statement not in suggestions:
+                suggestions.append(statement)
+    return suggestions
+
+def log_slow_query(record, path=SLOW_QUERY_LOG):
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record) + "\n")
+
+def report(conn, sql, monitor, rows, profile=False, slow_seconds=SLOW_QUERY_SECONDS, log_path=SLOW_QUERY_LOG):
+    """Print the profile of a finished statement and log it if it was slow.
+
+    Uses the plan captured by monitor.capture_plan(); statements without
+    one are reported with time and steps only.
+    """
+    seconds = monitor.elapsed()
+    slow = slow_seconds is not None and seconds >= slow_seconds
+    if not (profile or slow):
+        return
+
+    plan = monitor.plan or []
+    try:
+        suggestions = suggest_indexes(conn, sql, plan) if plan else []
+    except sqlite3.Error:
+        suggestions = []
+
+    if profile:
+        if plan:
+            print("\nQUERY PLAN:")
+            print(format_plan(plan))
+        print(f"Time: {seconds:.4f}s, VM steps: ~{monitor.steps:,}, rows: {rows}")
+        if any('TEMP B-TREE' in detail for _, _, detail in plan):
+            print("Note: results are sorted in a temporary B-tree (no index provides this order)")
+        for statement in suggestions:
+            print(f"Suggested index: {statement};")
+
+    if slow and log_path:
+        log_slow_query({
+            'at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'sql': sql,
+            'seconds': round(seconds, 4),
+            'vm_steps': monitor.steps,
+            'rows': rows,
+            'timed_out': monitor.timed_out,
+            'plan': [detail for _, _, detail in plan],
+            'suggested_indexes': suggestions
+        }, log_path)
+        if profile:
+            print(f"Logged to {log_path} (slower than {slow_seconds}s)")
@@ -1,11 +1,25 @@
+import argparse
+import signal
 import sqlite3
-import pandas as pd
+import sys
+import analytics
+import leaderboard
+import query_batch
+import search
+from database_import import list_tables
+from query_profiler import SLOW_QUERY_LOG, SLOW_QUERY_SECONDS, QueryMonitor, report
+from stats import LEAGUES, STATS
+
+# Rows fetched and printed at a time
+PAGE_SIZE = 25
+
+# Most rows a single query prints before it is stopped
+DEFAULT_ROW_CAP = 10000
 
 def show_tables(conn):
-    """Show all tables in database"""
+    """Show all tables and views in database"""
     cursor = conn.cursor()
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-    tables = cursor.fetchall()
+    tables = list_tables(cursor)
     
     print("\nAvailable tables:")
     for table in tables:
@@ -14,19 +28,153 @@ def show_tables(conn):
         count = cursor.fetchone()[0]
         print(f"- {table_name} ({count} rows)")
 
-def run_query(conn, query):
-    """Run SQL query and display results"""
+def show_results(df):
+    if df.empty:
+        print("No results found")
+    else:
+        print(f"\nResults ({len(df)} rows):")
+        print(df.to_string(index=False))
+
+def format_page(columns, rows):
+    """Rows of one page as an aligned text table with its own header"""
+    cells = [[str(column) for column in columns]] + [["NULL" if v is None else str(v) for v in row] for row in rows]
+    widths = [max(len(row[i]) for row in cells) for i in range(len(columns))]
+    return "\n".join(" ".join(value.rjust(width) for value, width in zip(row, widths)) for row in cells)
+
+def run_query(conn, query, page_size=PAGE_SIZE, max_rows=DEFAULT_ROW_CAP, interactive=None,
+              profile=False, timeout=None, slow_seconds=SLOW_QUERY_SECONDS, slow_log=SLOW_QUERY_LOG):
+    """Run SQL query and stream the results page by page.
+
+    Rows are fetched with fetchmany(page_size) and printed as they arrive,
+    so memory stays at one page however large the result is. In a terminal
+    the user is asked before every further page (q stops); output stops at
+    max_rows. Ctrl+C cancels a running query and timeout (seconds inside
+    SQLite) aborts a runaway one. With profile the query plan, time, VM
+    steps and index suggestions are printed; queries slower than
+    slow_seconds are appended to slow_log. Returns the number of rows printed.
+    """
+    if interactive is None:
+        interactive = sys.stdin.isatty()
+    
+    # Ctrl+C aborts the statement inside SQLite instead of killing the program.
+    # Python only runs signal handlers between bytecodes, so the progress
+    # handler gives it a chance to run while SQLite is busy and reports back.
+    # Outside SQLite (printing, or waiting at the pager prompt) it stops at once.
+    monitor = QueryMonitor(timeout)
+    monitor.capture_plan(conn, query)
+    def interrupt(signum, frame):
+        monitor.cancel()
+        if monitor.started is None:
+            raise KeyboardInterrupt
+    previous_handler = signal.signal(signal.SIGINT, interrupt)
+    monitor.install(conn)
+    cursor = conn.cursor()
+    shown = 0
     try:
-        df = pd.read_sql_query(query, conn)
-        if df.empty:
-            print("No results found")
+        with monitor.running():
+            cursor.execute(query)
+        if cursor.description is None:
+            conn.commit()
+            print("Statement executed" + (f" ({cursor.rowcount} rows affected)" if cursor.rowcount >= 0 else ""))
         else:
-            print(f"\nResults ({len(df)} rows):")
-            print(df.to_string(index=False))
+            columns = [column[0] for column in cursor.description]
+            while not monitor.cancelled:
+                with monitor.running():
+                    rows = cursor.fetchmany(min(page_size, max_rows - shown))
+                if not rows:
+                    break
+                print()
+                print(format_page(columns, rows))
+                shown += len(rows)
+                
+                if shown >= max_rows:
+                    with monitor.running():
+                        more = cursor.fetchone() is not None
+                    if more:
+                        print(f"Stopped at the row cap of {max_rows} rows")
+                    break
+                if len(rows) < page_size:
+                    break
+                if interactive and input(f"-- {shown} rows, Enter for more, q to stop: ").strip().lower() == 'q':
+                    print(f"Stopped after {shown} rows")
+                    break
+            
+            if monitor.cancelled:
+                print(f"\nQuery cancelled after {shown} rows")
+            else:
+                print("No results found" if not shown else f"({shown} rows)")
+    except KeyboardInterrupt:
+        print(f"\nQuery cancelled after {shown} rows")
+    except sqlite3.OperationalError as e:
+        if str(e) != 'interrupted':
+            print(f"Error: {e}")
+            return shown
+        if monitor.timed_out:
+            print(f"\nQuery timed out after {timeout}s ({shown} rows shown)")
+        else:
+            print(f"\nQuery cancelled after {shown} rows")
     except Exception as e:
         print(f"Error: {e}")
+        return shown
+    finally:
+        cursor.close()
+        monitor.remove(conn)
+        signal.signal(signal.SIGINT, previous_handler)
+    
+    report(conn, query, monitor, shown, profile, slow_seconds, slow_log)
+    return shown
+
+def run_leaderboard():
+    """Prompt for leaderboard parameters and show the top seasons"""
+    stat_name = input(f"Stat ({', '.join(STATS)}): ").strip()
+    leagues = input(f"Leagues ({', '.join(LEAGUES)}, blank for all): ").upper().replace(',', ' ').split()
+    first = input("First year (blank for all): ").strip()
+    last = input("Last year (blank for same as first or all): ").strip() or first
+    k = input("How many (default 10): ").strip()
+    try:
+        years = (int(first), int(last)) if first else None
+        show_results(leaderboard.top_k(stat_name, leagues=leagues or None, years=years,
+                                       k=int(k) if k else 10))
+    except ValueError as e:
+        print(f"Error: {e}")
+
+def run_search():
+    """Prompt for a name and show matching players and teams, with the seasons of the best match"""
+    text = input("Player or team (any word prefix or approximate spelling): ").strip()
+    hits = search.search(text, limit=5)
+    if not hits:
+        print("No matches")
+        return
+    
+    print()
+    for hit in hits:
+        print(f"- {hit['name']} ({hit['kind']}, {hit['match']} match): {len(hit['seasons'])} seasons led, "
+              f"leagues {', '.join(hit['leagues']) or '-'}, stats {', '.join(hit['stats']) or '-'}")
+    print(f"\nSeasons led by {hits[0]['name']}:")
+    print(hits[0]['seasons'].to_string(index=False))
 
 def main():
+    parser = argparse.ArgumentParser(description="Query the baseball statistics database")
+    parser.add_argument('--batch', metavar='FILE',
+                        help="run the named queries in FILE without prompting (see query_batch.py)")
+    parser.add_argument('--format', choices=query_batch.FORMATS, default='csv')
+    parser.add_argument('--output-dir', default='reports')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--profile', action='store_true',
+                        help="show the query plan, time, VM steps and index suggestions for custom queries")
+    parser.add_argument('--timeout', type=float, help="abort custom queries running longer than this (seconds)")
+    parser.add_argument('--slow-threshold', type=float, default=SLOW_QUERY_SECONDS,
+                        help="log custom queries slower than this (seconds)")
+    parser.add_argument('--slow-log', default=SLOW_QUERY_LOG)
+    args = parser.parse_args()
+    
+    if args.batch:
+        results = query_batch.run_batch(query_batch.parse_query_file(args.batch), output_dir=args.output_dir,
+                                        fmt=args.format, workers=args.workers)
+        if any('error' in result for result in results):
+            raise SystemExit(1)
+        return
+    
     # Connect to database
     conn = sqlite3.connect('baseball_cleaned.db')
     
@@ -38,9 +186,11 @@ def main():
         print("1. Show tables")
         print("2. Run custom query")
         print("3. Run example queries")
-        print("4. Exit")
+        print("4. Leaderboard")
+        print("5. Search players and teams")
+        print("6. Exit")
         
-        choice = input("\nEnter choice (1-4): ").strip()
+        choice = input("\nEnter choice (1-6): ").strip()
         
         if choice == '1':
             show_tables(conn)
@@ -48,42 +198,55 @@ def main():
         elif choice == '2':
             query = input("\nEnter SQL query: ").strip()
             if query:
-                run_query(conn, query)
+                run_query(conn, query, profile=args.profile, timeout=args.timeout,
+                          slow_seconds=args.slow_threshold, slow_log=args.slow_log)
         
         elif choice == '3':
             print("\nExample queries:")
             print("1. Top 10 strikeout leaders")
             print("2. Compare AL and NL ERA leaders")
             print("3. Players with most wins")
+            print("4. Seasons led per player across all stats and leagues")
+            print("5. Names containing 'john' (search index)")
+            print("6. Most league-leading seasons per player (career)")
+            print("7. Longest streaks of consecutive titles")
+            print("8. 5-season rolling average of the AL ERA leader")
+            print("9. Most titles per decade")
             
-            example_choice = input("\nSelect example (1-3): ").strip()
+            example_choice = input("\nSelect example (1-9): ").strip()
             
             if example_choice == '1':
-                query = """
-                SELECT Year, Player, Team, Strikeouts 
-                FROM combined_pitching_clean 
-                ORDER BY Strikeouts DESC 
-                LIMIT 10
-                """
+                show_results(leaderboard.top_k('Strikeouts', leagues=['AL'], k=10))
+                continue
             elif example_choice == '2':
-                query = """
-                SELECT 'AL' as League, Year, Player, ERA, Team
-                FROM yearly_era_american_league
-                WHERE Year = 2023
-                UNION ALL
-                SELECT 'NL' as League, Year, Player, ERA, Team  
-                FROM yearly_era_national_league
-                WHERE Year = 2023
-                ORDER BY ERA ASC
-                LIMIT 10
-                """
+                show_results(leaderboard.top_k('ERA', years=(2023, 2023), k=10))
+                continue
             elif example_choice == '3':
+                show_results(leaderboard.top_k('Wins', leagues=['AL'], k=10))
+                continue
+            elif example_choice == '4':
                 query = """
-                SELECT Year, Player, Team, Wins
-                FROM combined_pitching_clean
-                ORDER BY Wins DESC
+                SELECT p.name AS Player, COUNT(*) AS Titles
+                FROM leaders l
+                JOIN players p ON p.player_id = l.player_id
+                GROUP BY l.player_id
+                ORDER BY Titles DESC
                 LIMIT 10
                 """
+            elif example_choice == '5':
+                query = "SELECT name, kind FROM name_search WHERE name_search MATCH 'john' ORDER BY kind, name"
+            elif example_choice == '6':
+                show_results(analytics.career_titles('player', k=10))
+                continue
+            elif example_choice == '7':
+                show_results(analytics.streaks(k=10))
+                continue
+            elif example_choice == '8':
+                show_results(analytics.rolling_averages('ERA', 5, ['AL']).round(3).tail(10))
+                continue
+            elif example_choice == '9':
+                show_results(analytics.decade_titles(k=1))
+                continue
             else:
                 print("Invalid choice")
                 continue
@@ -91,6 +254,12 @@ def main():
             run_query(conn, query)
         
         elif choice == '4':
+            run_leaderboard()
+        
+        elif choice == '5':
+            run_search()
+        
+        elif choice == '6':
             print("Goodbye!")
             break
         
@@ -0,0 +1,373 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import leaderboard
+from dashboard_data import import_generation
+from query_batch import ReadOnlyPool, require_pyarrow
+from stats import LEAGUES, STATS
+
+DB_PATH = 'baseball_cleaned.db'
+HOST = '127.0.0.1'
+PORT = 8502
+
+# Bytes of the database file each pooled connection reads through mmap
+MMAP_SIZE = 256 * 1024 * 1024
+
+# Largest leaderboard a request may ask for
+MAX_K = 1000
+
+# Client connections served at once; more are answered 503 and closed
+MAX_CONNECTIONS = 256
+
+BUSY_RESPONSE = b"HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0\r\nConnection: close\r\n\r\n"
+
+JSON_TYPE = 'application/json'
+ARROW_TYPE = 'application/vnd.apache.arrow.stream'
+
+LEAGUE_COMPARISON_QUERY = """
+    SELECT g.code AS League, l.year AS Year, l.value AS Value
+    FROM leaders l
+    JOIN leagues g ON g.league_id = l.league_id
+    WHERE l.stat_id = (SELECT stat_id FROM stats WHERE name = ?)
+    AND g.code IN ({league_marks})
+    AND l.year BETWEEN ? AND ?
+    ORDER BY l.year, g.code
+"""
+
+TEAM_STATS_QUERY = """
+    SELECT g.code AS League, t.name AS Team, s.name AS Stat, a.avg_value AS Value, a.seasons AS Seasons
+    FROM agg_team_stats a
+    JOIN stats s ON s.stat_id = a.stat_id
+    JOIN leagues g ON g.league_id = a.league_id
+    JOIN teams t ON t.team_id = a.team_id
+    WHERE g.code IN ({league_marks})
+    ORDER BY g.code, t.name, s.stat_id
+"""
+
+def param(params, name, default=None):
+    return params.get(name, [default])[0]
+
+def stat_param(params):
+    stat_name = param(params, 'stat')
+    if stat_name not in STATS:
+        raise ValueError(f"stat must be one of {', '.join(STATS)}")
+    return stat_name
+
+def leagues_param(params):
+    leagues = tuple(code.strip().upper() for code in (param(params, 'leagues') or '').split(',') if code.strip())
+    unknown = [code for code in leagues if code not in LEAGUES]
+    if unknown:
+        raise ValueError(f"unknown leagues: {', '.join(unknown)}")
+    return leagues or tuple(LEAGUES)
+
+def years_param(params):
+    """Inclusive (first, last) season range from first= and last= (default: all seasons)"""
+    first = int(param(params, 'first', 0))
+    return first, int(param(params, 'last', first or 9999))
+
+def k_param(params):
+    k = int(param(params, 'k', 10))
+    if not 1 <= k <= MAX_K:
+        raise ValueError(f"k must be between 1 and {MAX_K}")
+    return k
+
+def fetch(conn, query, query_params):
+    cursor = conn.execute(query, query_params)
+    return [column[0] for column in cursor.description], cursor.fetchall()
+
+def leaderboard_rows(conn, params):
+    """/leaderboard?stat=ERA[&leagues=AL,NL][&first=2000&last=2010][&k=10][&direction=asc][&per_league=1]"""
+    stat_name = stat_param(params)
+    direction = param(params, 'direction', STATS[stat_name]['direction'])
+    if direction not in ('asc', 'desc'):
+        raise ValueError("direction must be asc or desc")
+    query, query_params = leaderboard.leaderboard_query(
+        stat_name, leagues_param(params), years_param(params), k_param(params),
+        direction, param(params, 'per_league', '0') in ('1', 'true'))
+    columns, rows = fetch(conn, query, query_params)
+    # Same column order as leaderboard.top_k, the value under the stat's name
+    order = [columns.index(column) for column in [*leaderboard.COLUMNS, 'Value']]
+    return [*leaderboard.COLUMNS, stat_name], [[row[i] for i in order] for row in rows]
+
+def league_comparison_rows(conn, params):
+    """/league-comparison?stat=ERA[&leagues=AL,NL][&first=1950&last=2000]: yearly league averages"""
+    leagues = leagues_param(params)
+    query = LEAGUE_COMPARISON_QUERY.format(league_marks=', '.join('?' * len(leagues)))
+    return fetch(conn, query, [stat_param(params), *leagues, *years_param(params)])
+
+def team_stats_rows(conn, params):
+    """/team-stats[?leagues=AL]: average of every stat per league and team"""
+    leagues = leagues_param(params)
+    return fetch(conn, TEAM_STATS_QUERY.format(league_marks=', '.join('?' * len(leagues))), leagues)
+
+ENDPOINTS = {
+    '/leaderboard': leaderboard_rows,
+    '/league-comparison': league_comparison_rows,
+    '/team-stats': team_stats_rows
+}
+
+def encode(columns, rows, content_type):
+    """Response body: JSON {"columns": [...], "data": [[...], ...]} or an Arrow IPC stream"""
+    if content_type == JSON_TYPE:
+        return json.dumps({'columns': columns, 'data': rows}).encode('utf-8')
+    pa, _ = require_pyarrow("Arrow responses")
+    table = pa.table({column: [row[i] for row in rows] for i, column in enumerate(columns)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+class ResponseCache:
+    """LRU cache of encoded responses with their ETags, emptied when the database version changes"""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.responses = OrderedDict()
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, version):
+        """(etag, body) cached for key at this database version, or None"""
+        with self.lock:
+            if version != self.version:
+                self.responses.clear()
+                self.version = version
+            if key in self.responses:
+                self.responses.move_to_end(key)
+                self.hits += 1
+                return self.responses[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, version, response):
+        with self.lock:
+            if version != self.version:
+                return
+            self.responses[key] = response
+            while len(self.responses) > self.max_entries:
+                self.responses.popitem(last=False)
+
+    def metrics(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self.responses)
+            }
+
+class QueryService:
+    """The endpoints over a pool of read-only connections, with a shared response cache.
+
+    Each request reads the database version and runs its query inside one
+    read transaction, so a cached response is always labelled with the
+    version it was built from. The version is the file's identity and
+    mtime, the commits seen through PRAGMA data_version and the import
+    generation, so any commit empties the cache. The pool is reopened if
+    the database file is replaced.
+    """
+
+    def __init__(self, db_path=DB_PATH, pool_size=8, cache_entries=512, mmap_size=MMAP_SIZE):
+        self.db_path = db_path
+        self.pool_size = pool_size
+        self.mmap_size = mmap_size
+        self.cache = ResponseCache(cache_entries)
+        self.lock = threading.Lock()
+        self.file_id = None
+        self.pool = None
+        # PRAGMA data_version is per connection: each pooled connection's last
+        # value, and how many changes any of them has seen
+        self.data_versions = {}
+        self.changes = 0
+        self.requests = 0
+        self.connect()
+
+    def connect(self):
+        """(pool, file identity, mtime), the pool reopened when the file changed identity"""
+        stat = os.stat(self.db_path)
+        file_id = (stat.st_dev, stat.st_ino)
+        with self.lock:
+            if file_id != self.file_id:
+                old_pool, self.pool = self.pool, ReadOnlyPool(self.db_path, self.pool_size, self.mmap_size)
+                self.file_id = file_id
+                self.data_versions.clear()
+                if old_pool is not None:
+                    old_pool.close()
+            return self.pool, file_id, stat.st_mtime_ns
+
+    def commits_seen(self, conn):
+        """Count of commits by other connections, as noticed by any pooled connection"""
+        data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        with self.lock:
+            if self.data_versions.setdefault(conn, data_version) != data_version:
+                self.data_versions[conn] = data_version
+                self.changes += 1
+            return self.changes
+
+    def respond(self, conn, file_id, mtime_ns, path, params, content_type):
+        conn.execute("BEGIN")
+        try:
+            # data_version is read before the snapshot starts, so the version never runs ahead of the data
+            version = (file_id, mtime_ns, self.commits_seen(conn), import_generation(conn))
+
+            key = (path, tuple(sorted((name, tuple(values)) for name, values in params.items())), content_type)
+            response = self.cache.get(key, version)
+            if response is None:
+                columns, rows = ENDPOINTS[path](conn, params)
+                body = encode(columns, rows, content_type)
+                response = ('"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"', body)
+                self.cache.put(key, version, response)
+            return response
+        finally:
+            conn.rollback()
+
+    def handle(self, path, params, content_type):
+        """(etag, body) of one endpoint; ValueError for bad parameters"""
+        with self.lock:
+            self.requests += 1
+        pool, file_id, mtime_ns = self.connect()
+        return pool.run(self.respond, file_id, mtime_ns, path, params, content_type)
+
+    def metrics(self):
+        return {'requests': self.requests, 'pool_size': self.pool_size, 'cache': self.cache.metrics()}
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are separate writes; with Nagle on, keep-alive clients wait ~40ms for each
+    disable_nagle_algorithm = True
+    # Idle keep-alive connections are closed after this many seconds
+    timeout = 10
+    service = None
+    verbose = False
+
+    def send_body(self, status, body, content_type=JSON_TYPE, etag=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if etag:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, status, value):
+        self.send_body(status, json.dumps(value).encode('utf-8'))
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+
+        if url.path == '/':
+            self.send_json(200, {'endpoints': {path: func.__doc__ for path, func in ENDPOINTS.items()},
+                                 'formats': ['json', 'arrow']})
+            return
+        if url.path == '/health':
+            self.send_json(200, {'status': 'ok'})
+            return
+        if url.path == '/metrics':
+            self.send_json(200, self.service.metrics())
+            return
+        if url.path not in ENDPOINTS:
+            self.send_json(404, {'error': f"unknown endpoint: {url.path}"})
+            return
+
+        wants_arrow = param(params, 'format') == 'arrow' or ARROW_TYPE in self.headers.get('Accept', '')
+        params.pop('format', None)
+        content_type = ARROW_TYPE if wants_arrow else JSON_TYPE
+        try:
+            etag, body = self.service.handle(url.path, params, content_type)
+        except (ValueError, RuntimeError) as e:
+            self.send_json(400, {'error': str(e)})
+            return
+        except sqlite3.Error as e:
+            self.send_json(500, {'error': str(e)})
+            return
+
+        if etag in self.headers.get('If-None-Match', ''):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        else:
+            self.send_body(200, body, content_type, etag)
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            super().log_message(format, *args)
+
+class ServiceHTTPServer(ThreadingHTTPServer):
+    """A thread per client connection, at most max_connections at once.
+
+    Queries still run on the service's fixed connection pool, so an idle
+    keep-alive client holds a thread but never a database connection.
+    """
+    daemon_threads = True
+
+    def __init__(self, address, handler, max_connections=MAX_CONNECTIONS):
+        super().__init__(address, handler)
+        self.slots = threading.BoundedSemaphore(max_connections)
+
+    def process_request(self, request, client_address):
+        if not self.slots.acquire(blocking=False):
+            try:
+                request.sendall(BUSY_RESPONSE)
+            except OSError:
+                pass
+            self.shutdown_request(request)
+            return
+        super().process_request(request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self.slots.release()
+
+def make_server(db_path=DB_PATH, host=HOST, port=PORT, workers=8, cache_entries=512, verbose=False,
+                max_connections=MAX_CONNECTIONS):
+    """A ServiceHTTPServer serving a QueryService with workers pooled connections"""
+    service = QueryService(db_path, workers, cache_entries)
+    handler = type('Handler', (ServiceHandler,), {'service': service, 'verbose': verbose})
+    server = ServiceHTTPServer((host, port), handler, max_connections)
+    server.service = service
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve leaderboard, league comparison and team stats as JSON/Arrow")
+    parser.add_argument('--db', default=DB_PATH)
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--workers', type=int, default=8, help="read-only connections running queries")
+    parser.add_argument('--max-connections', type=int, default=MAX_CONNECTIONS,
+                        help="client connections served at once")
+    parser.add_argument('--cache-entries', type=int, default=512, help="responses kept in the LRU cache")
+    parser.add_argument('--verbose', action='store_true', help="log every request")
+    args = parser.parse_args()
+
+    server = make_server(args.db, args.host, args.port, args.workers, args.cache_entries, args.verbose,
+                         args.max_connections)
+    print(f"Serving {args.db} on http://{args.host}:{server.server_address[1]} ({args.workers} connections)")
+    print(f"Endpoints: {', '.join(ENDPOINTS)}, /metrics, /health")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping")
+    finally:
+        server.server_close()
+        server.service.close()
+
+if __name__ == "__main__":
+    main()
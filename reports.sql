@@ -0,0 +1,31 @@
+-- Nightly reports: python query_batch.py reports.sql --format csv
+-- Each query starts with a "-- name:" line; the result goes to reports/<name>.<format>
+
+-- name: strikeout_leaders
+SELECT Year, Player, Team, Strikeouts
+FROM combined_pitching_clean
+ORDER BY Strikeouts DESC
+LIMIT 10;
+
+-- name: league_year_averages
+SELECT s.name AS Stat, g.code AS League, l.year AS Year, l.value AS Average
+FROM leaders l
+JOIN stats s ON s.stat_id = l.stat_id
+JOIN leagues g ON g.league_id = l.league_id
+ORDER BY Stat, League, Year;
+
+-- name: titles_per_player
+SELECT p.name AS Player, COUNT(*) AS Titles
+FROM leaders l
+JOIN players p ON p.player_id = l.player_id
+GROUP BY l.player_id
+ORDER BY Titles DESC, Player;
+
+-- name: all_leaders
+SELECT s.name AS Stat, g.code AS League, l.year AS Year, p.name AS Player, t.name AS Team, l.value AS Value
+FROM leaders l
+JOIN stats s ON s.stat_id = l.stat_id
+JOIN leagues g ON g.league_id = l.league_id
+JOIN players p ON p.player_id = l.player_id
+JOIN teams t ON t.team_id = l.team_id
+ORDER BY Stat, League, Year;
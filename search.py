@@ -0,0 +1,166 @@
+import bisect
+import difflib
+import re
+from collections import Counter, defaultdict
+import pandas as pd
+import dashboard_data
+from stats import STATS
+
+KINDS = ['player', 'team']
+
+# Names scored per query for close spellings, most shared trigrams first
+CANDIDATES = 50
+
+# Close spellings below this similarity to the name (or to as many of its
+# words as the query has) are not reported
+MIN_SIMILARITY = 0.6
+
+# Order of the match kinds in the results
+MATCH_ORDER = {'exact': 0, 'prefix': 1, 'substring': 2, 'fuzzy': 3}
+
+SEASONS_QUERY = """
+    SELECT l.year AS Year, g.code AS League, p.name AS Player, t.name AS Team, s.name AS Stat, l.value AS Value
+    FROM leaders l
+    JOIN stats s ON s.stat_id = l.stat_id
+    JOIN leagues g ON g.league_id = l.league_id
+    JOIN players p ON p.player_id = l.player_id
+    JOIN teams t ON t.team_id = l.team_id
+    WHERE l.{kind}_id = ?
+    ORDER BY l.year, g.code
+"""
+
+def normalize(text):
+    return ' '.join(text.lower().split())
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def word_suffixes(name):
+    """The name from the start of every word: 'walter johnson', 'johnson'"""
+    return [name[match.start():] for match in re.finditer(r'\S+', name)]
+
+def similarity(query, name):
+    """Best difflib ratio of query against the name or any run of as many words"""
+    words = name.split()
+    width = len(query.split())
+    parts = [name] + [' '.join(words[i:i + width]) for i in range(len(words) - width + 1)]
+    return max(difflib.SequenceMatcher(None, query, part).ratio() for part in parts)
+
+def classify(query, name):
+    """(match kind, score) of a normalized name; score is 0 for close spellings (scored later).
+
+    Exact, word prefix and substring matches score the share of the words
+    the query falls in that it covers, so 'walter' ranks Walter Johnson
+    above Bucky Walters.
+    """
+    if name == query:
+        return 'exact', 1.0
+    position = next((start for start in range(len(name)) if name.startswith(query, start)
+                     and (start == 0 or name[start - 1] == ' ')), None)
+    match = 'prefix'
+    if position is None:
+        position = name.find(query)
+        match = 'substring'
+    if position < 0:
+        return 'fuzzy', 0.0
+    start = name.rfind(' ', 0, position) + 1
+    end = name.find(' ', position + len(query))
+    return match, len(query) / ((end if end >= 0 else len(name)) - start)
+
+class NameIndex:
+    """In-process index of every player and team name in the name_search table.
+
+    Every name is kept from the start of each of its words in one sorted
+    list, so a word prefix is a bisect, and a trigram -> names map finds
+    substrings and close spellings without comparing against every name.
+    """
+
+    def __init__(self, rows):
+        self.entries = [(normalize(name), name, kind, entity_id) for name, kind, entity_id in rows]
+        self.keys = sorted((key, i) for i, entry in enumerate(self.entries) for key in word_suffixes(entry[0]))
+        self.postings = defaultdict(list)
+        for i, entry in enumerate(self.entries):
+            for gram in trigrams(entry[0]):
+                self.postings[gram].append(i)
+
+    @classmethod
+    def load(cls, conn):
+        return cls(conn.execute("SELECT name, kind, entity_id FROM name_search").fetchall())
+
+    def prefix_matches(self, query):
+        """Entries with a word starting with query"""
+        matches = set()
+        for key, i in self.keys[bisect.bisect_left(self.keys, (query,)):]:
+            if not key.startswith(query):
+                break
+            matches.add(i)
+        return matches
+
+    def trigram_matches(self, query):
+        """Entries sharing at least half of the query's trigrams, most shared first"""
+        grams = trigrams(query)
+        counts = Counter()
+        for gram in grams:
+            counts.update(self.postings.get(gram, ()))
+        needed = (len(grams) + 1) // 2
+        return [i for i, shared in counts.most_common(CANDIDATES) if shared >= needed]
+
+    def find(self, text, limit=10, kinds=None):
+        """Players and teams matching text by word prefix, substring or close spelling.
+
+        Returns dicts with kind, id, name, match ('exact', 'prefix',
+        'substring' or 'fuzzy') and score (0-1), best first.
+        """
+        query = normalize(text)
+        kinds = set(kinds or KINDS)
+        if not query:
+            return []
+
+        hits = []
+        for i in self.prefix_matches(query) | set(self.trigram_matches(query)):
+            normalized, name, kind, entity_id = self.entries[i]
+            if kind not in kinds:
+                continue
+            match, score = classify(query, normalized)
+            if match == 'fuzzy':
+                score = similarity(query, normalized)
+                if score < MIN_SIMILARITY:
+                    continue
+            hits.append({'kind': kind, 'id': entity_id, 'name': name, 'match': match, 'score': round(score, 3)})
+        hits.sort(key=lambda hit: (MATCH_ORDER[hit['match']], -hit['score'], hit['name']))
+        return hits[:limit]
+
+def entity_seasons(conn, kind, entity_id):
+    """Every season a player or team led a stat: Year, League, Player, Team and a column per stat"""
+    long_df = pd.read_sql_query(SEASONS_QUERY.format(kind=kind), conn, params=[entity_id])
+    if long_df.empty:
+        return pd.DataFrame(columns=['Year', 'League', 'Player', 'Team'])
+    wide = long_df.set_index(['Year', 'League', 'Player', 'Team', 'Stat'])['Value'].unstack('Stat')
+    wide = wide.reindex(columns=[stat_name for stat_name in STATS if stat_name in wide.columns])
+    for stat_name in wide.columns:
+        if STATS[stat_name]['dtype'].lower().startswith('int'):
+            wide[stat_name] = wide[stat_name].astype('Int64')
+    wide.columns.name = None
+    return wide.reset_index()
+
+def name_index(cache=None):
+    """The NameIndex of the current import, served from the shared cache"""
+    return (cache or dashboard_data.shared_cache()).get('name_index', NameIndex.load)
+
+def search(text, limit=10, kinds=None, cache=None):
+    """Best matching players and teams with what they led.
+
+    kinds: 'player' and/or 'team' (default both). Every hit (see
+    NameIndex.find) also carries seasons (entity_seasons), leagues and
+    stats. The index and the seasons are memoised until the next import;
+    the seasons frames are shared and must not be modified in place.
+    """
+    cache = cache or dashboard_data.shared_cache()
+    hits = name_index(cache).find(text, limit, kinds)
+    for hit in hits:
+        seasons = cache.get(('seasons', hit['kind'], hit['id']),
+                            lambda conn, hit=hit: entity_seasons(conn, hit['kind'], hit['id']))
+        hit['seasons'] = seasons
+        hit['leagues'] = sorted(seasons['League'].unique())
+        hit['stats'] = [stat_name for stat_name in STATS if stat_name in seasons.columns]
+    return hits
@@ -0,0 +1,48 @@
+# Stat registry: every tracked yearly leader stat and where it comes from.
+# Adding a stat is one entry here - the scraper registers its page, the
+# cleaner produces yearly_<stat>_<league> tables for it and the combined
+# AL view gets a column for it.
+#
+#   page:      scraped page name, also the prefix of the cleaned table names
+#   path:      Baseball Almanac page holding AL (left) and NL (right) leaders
+#   dtype:     pandas dtype of the cleaned value column
+#   direction: 'desc' if the highest value leads, 'asc' if the lowest does
+#   bounds:    plausible (min, max) for a league leader, checked by data_quality
+STATS = {
+    'Strikeouts': {
+        'page': 'yearly_strikeouts',
+        'path': '/pitching/pistrik4.shtml',
+        'dtype': 'Int64',
+        'direction': 'desc',
+        'bounds': (0, 600)
+    },
+    'Wins': {
+        'page': 'yearly_wins',
+        'path': '/pitching/piwins4.shtml',
+        'dtype': 'Int64',
+        'direction': 'desc',
+        'bounds': (0, 60)
+    },
+    'ERA': {
+        'page': 'yearly_era',
+        'path': '/pitching/piera4.shtml',
+        'dtype': 'float64',
+        'direction': 'asc',
+        'bounds': (0, 10)
+    }
+}
+
+# League column prefix on the scraped pages -> suffix of the cleaned table names.
+# Order matches the left-to-right order of the league halves on each page.
+LEAGUES = {'AL': 'american_league', 'NL': 'national_league'}
+
+LEAGUE_NAMES = {'AL': 'American League', 'NL': 'National League'}
+
+def table_name(stat_name, league):
+    """Cleaned table holding one stat for one league, e.g. yearly_era_american_league"""
+    return f"{STATS[stat_name]['page']}_{LEAGUES[league]}"
+
+def stat_league_tables():
+    """Map every per-league table name to its (stat, league)"""
+    return {table_name(stat_name, league): (stat_name, league)
+            for stat_name in STATS for league in LEAGUES}
@@ -0,0 +1,55 @@
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, 'tests', 'fixtures')
+sys.path.insert(0, ROOT)
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), 'rb') as f:
+        return f.read()
+
+@pytest.fixture
+def fixture_requests():
+    """(path, request headers) of every request fixture_server received, in order"""
+    return []
+
+@pytest.fixture
+def fixture_server(fixture_requests):
+    """Local HTTP server: path -> (body bytes, Content-Type[, ETag]) registered by the test; yields (base_url, pages).
+
+    A page with an ETag is answered 304 when the request's If-None-Match matches it.
+    """
+    pages = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            fixture_requests.append((self.path, dict(self.headers)))
+            if self.path not in pages:
+                self.send_error(404)
+                return
+            body, content_type, *etag = pages[self.path]
+            if etag and self.headers.get('If-None-Match') == etag[0]:
+                self.send_response(304)
+                self.send_header('ETag', etag[0])
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            if etag:
+                self.send_header('ETag', etag[0])
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", pages
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,74 @@
+import pandas as pd
+import data_cleaner
+import mlb_scraper
+from conftest import read_fixture
+from data_quality import validate_tables
+from stats import STATS, table_name
+
+RAW_ROWS = [
+    ['1899', 'Cy Young', '2.58', 'St. Louis'],
+    ['1901', 'Cy Young', '1.62', 'Boston'],
+    ['1902', 'Ed Siever', '', 'Detroit'],
+    ['1903', 'Earl Moore', '1.74', 'Cleveland'],
+]
+
+def test_delta_cleaning_matches_full_pages(tmp_path):
+    delta_dir = tmp_path / 'delta'
+    output_dir = tmp_path / 'cleaned'
+    delta_dir.mkdir()
+    raw = pd.DataFrame(RAW_ROWS, columns=['Year', 'Player', 'ERA', 'Team'])
+    raw.to_csv(delta_dir / f"{table_name('ERA', 'AL')}.csv", index=False)
+
+    data_cleaner.clean_delta_data(str(delta_dir), str(output_dir))
+
+    cleaned = pd.read_csv(output_dir / f"{table_name('ERA', 'AL')}.csv")
+    page = pd.DataFrame([[*row, '-', '', '', ''] for row in RAW_ROWS])
+    expected = data_cleaner.split_long_format(data_cleaner.clean_long_format(
+        data_cleaner.page_to_long(page, 'ERA')))[table_name('ERA', 'AL')]
+    assert cleaned.values.tolist() == expected.astype(object).values.tolist()
+    assert not list(delta_dir.iterdir())
+
+def test_fractional_integer_stat_reaches_the_quality_rules():
+    page = pd.DataFrame([['2001', 'Mark Mulder', '21', 'Oakland', '2001', 'Matt Morris', '22', 'St. Louis'],
+                         ['2002', 'Barry Zito', '20.5', 'Oakland', '2002', 'Randy Johnson', '24', 'Arizona']])
+    combined = pd.DataFrame([['2002', 'Barry Zito', 'Oakland', '2.75', '182', '20.5']],
+                            columns=['Year_AL', 'AL_Player', 'AL_Team', 'ERA', 'Strikeouts', 'Wins'])
+    header = pd.DataFrame([page.columns], columns=page.columns)
+    pages = {'yearly_wins': pd.concat([header, page, header], ignore_index=True),
+             'combined_pitching': pd.concat([combined.iloc[:1], combined, combined.iloc[:1]], ignore_index=True)}
+
+    tables = data_cleaner.clean_page_data(pages)
+    report = validate_tables(tables, max_error_rate=1.0, required=())
+
+    assert tables[table_name('Wins', 'AL')]['Wins'].tolist() == [21, 20.5]
+    assert tables[table_name('Wins', 'NL')]['Wins'].dtype == 'Int64'
+    for name in [table_name('Wins', 'AL'), 'combined_pitching_clean']:
+        checks = {(check['rule'], check['column']): check for check in report['tables'][name]['checks']}
+        assert checks[('whole_number', 'Wins')]['examples'] == [2002]
+
+def fixture_pages():
+    """Raw page frames as the scraper builds them from the fixture (header rows included)"""
+    rows = mlb_scraper.parse_leader_table(read_fixture('leaders_page.html').decode('utf-8'))
+    pages = {}
+    for page in mlb_scraper.PAGES:
+        df = pd.DataFrame(rows * 3, columns=page['headers'])
+        stat_name = page['headers'][2][len('AL_'):]
+        if STATS[stat_name]['dtype'].lower().startswith('int'):
+            for column in [f'AL_{stat_name}', f'NL_{stat_name}']:
+                is_value = df[column].str.fullmatch(r'[\d.]+')
+                df.loc[is_value, column] = (df.loc[is_value, column].astype(float) * 100).round().astype(int).astype(str)
+        pages[page['name']] = df
+    return pages
+
+def test_streaming_output_matches_batch_byte_for_byte(tmp_path):
+    data_dir = tmp_path / 'data'
+    mlb_scraper.save_page_data(fixture_pages(), str(data_dir))
+
+    data_cleaner.clean_all_data(str(data_dir), str(tmp_path / 'batch'))
+    data_cleaner.clean_all_data_streaming(str(data_dir), str(tmp_path / 'stream'), chunksize=4)
+
+    batch_files = sorted(path.name for path in (tmp_path / 'batch').iterdir())
+    assert batch_files == sorted(path.name for path in (tmp_path / 'stream').iterdir())
+    assert 'combined_pitching_clean.csv' in batch_files and len(batch_files) == 1 + 2 * len(STATS)
+    for name in batch_files:
+        assert (tmp_path / 'stream' / name).read_bytes() == (tmp_path / 'batch' / name).read_bytes(), name
@@ -0,0 +1,48 @@
+import shutil
+import sqlite3
+import pandas as pd
+import pytest
+import database_import
+from conftest import ROOT
+from data_quality import DataQualityError, read_tables, validate_tables
+from stats import stat_league_tables, table_name
+
+def cleaned_tables():
+    return read_tables(f"{ROOT}/cleaned_data")
+
+def test_cleaned_data_passes():
+    assert validate_tables(cleaned_tables())['passed']
+
+@pytest.mark.parametrize('drop', [None, table_name('ERA', 'NL')])
+def test_missing_tables_fail(drop):
+    tables = {} if drop is None else {name: df for name, df in cleaned_tables().items() if name != drop}
+    report = validate_tables(tables)
+    assert not report['passed']
+    missing = [name for name, table in report['tables'].items() if "table is missing" in table['table_errors']]
+    assert missing == (list(stat_league_tables()) if drop is None else [drop])
+
+def test_combined_season_missing_one_stat_is_a_warning():
+    tables = cleaned_tables()
+    combined = tables['combined_pitching_clean']
+    combined.loc[combined.index[0], 'ERA'] = None
+    table = validate_tables(tables)['tables']['combined_pitching_clean']
+    assert table['passed']
+    assert [(c['severity'], c['failures']) for c in table['checks']
+            if c['rule'] == 'not_null' and c['column'] == 'ERA'] == [('warning', 1)]
+
+def test_invalid_delta_is_not_applied(tmp_path):
+    db_path = tmp_path / 'baseball.db'
+    shutil.copy(f"{ROOT}/baseball_cleaned.db", db_path)
+    delta_dir = tmp_path / 'delta'
+    delta_dir.mkdir()
+    delta_file = delta_dir / f"{table_name('ERA', 'AL')}.csv"
+    pd.DataFrame([[2023, 'Gerrit Cole', 26.3, 'New York']],
+                 columns=['Year', 'Player', 'ERA', 'Team']).to_csv(delta_file, index=False)
+
+    conn = sqlite3.connect(db_path)
+    before = conn.execute("SELECT COUNT(*), SUM(value) FROM leaders").fetchone()
+    with pytest.raises(DataQualityError):
+        database_import.apply_delta(conn, str(delta_dir))
+    assert conn.execute("SELECT COUNT(*), SUM(value) FROM leaders").fetchone() == before
+    assert delta_file.exists()
+    conn.close()
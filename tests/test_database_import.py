@@ -0,0 +1,130 @@
+import shutil
+import sqlite3
+import pandas as pd
+import pytest
+import database_import
+from analytics import ANALYTICS_TABLES, refresh_analytics
+from conftest import ROOT
+from data_quality import read_tables
+from stats import stat_league_tables, table_name
+
+@pytest.fixture
+def conn(tmp_path):
+    shutil.copy(f"{ROOT}/baseball_cleaned.db", tmp_path / 'baseball.db')
+    conn = sqlite3.connect(tmp_path / 'baseball.db')
+    yield conn
+    conn.close()
+
+def leader_rows(conn):
+    return conn.execute("SELECT * FROM leaders ORDER BY stat_id, league_id, year").fetchall()
+
+@pytest.mark.parametrize('broken', ['missing', 'empty', 'nothing'])
+def test_incomplete_full_load_is_refused(conn, broken):
+    tables = read_tables(f"{ROOT}/cleaned_data")
+    name = table_name('Wins', 'NL')
+    if broken == 'missing':
+        del tables[name]
+    elif broken == 'empty':
+        tables[name] = tables[name].iloc[0:0]
+    else:
+        tables = {}
+    before = leader_rows(conn)
+
+    with pytest.raises(ValueError):
+        database_import.bulk_load_tables(conn, tables)
+    assert leader_rows(conn) == before
+    assert conn.execute("SELECT COUNT(*) FROM agg_player_titles").fetchone()[0] > 0
+
+def derived_rows(conn):
+    tables = ['agg_team_stats', *ANALYTICS_TABLES]
+    rows = {table: conn.execute(f"SELECT * FROM {table} ORDER BY 1, 2, 3, 4").fetchall() for table in tables}
+    rows['name_search'] = conn.execute("SELECT name, kind, entity_id FROM name_search ORDER BY 2, 3").fetchall()
+    return rows
+
+def test_delta_refresh_matches_full_rebuild(conn, tmp_path):
+    # One pitcher (existing or new) takes every AL stat of two seasons, for an existing and a new team
+    delta_dir = tmp_path / 'delta'
+    delta_dir.mkdir()
+    values = {'Strikeouts': 300, 'Wins': 25, 'ERA': 1.9}
+    for stat_name, value in values.items():
+        pd.DataFrame([[1995, 'Pedro Martinez', value, 'Boston'], [1996, 'New Pitcher', value, 'New Team']],
+                     columns=['Year', 'Player', stat_name, 'Team']).to_csv(
+            delta_dir / f"{table_name(stat_name, 'AL')}.csv", index=False)
+
+    assert database_import.apply_delta(conn, str(delta_dir)) == 6
+    incremental = derived_rows(conn)
+
+    cursor = conn.cursor()
+    database_import.refresh_aggregates(cursor)
+    refresh_analytics(cursor)
+    assert derived_rows(conn) == incremental
+    assert ('New Team', 'team') in {row[:2] for row in incremental['name_search']}
+
+@pytest.mark.parametrize('since_year', [1901, 1950, 2005])
+def test_analytics_refresh_from_a_season_matches_full_rebuild(conn, since_year):
+    # The last leader before since_year keeps every title for four more seasons, and some later seasons go
+    cursor = conn.cursor()
+    player_id = cursor.execute("SELECT player_id FROM leaders WHERE year = ? LIMIT 1", (since_year - 1,)).fetchone()[0]
+    cursor.execute("UPDATE leaders SET player_id = ? WHERE year BETWEEN ? AND ?", (player_id, since_year, since_year + 3))
+    cursor.execute("DELETE FROM leaders WHERE year > ? AND year % 7 = 0", (since_year + 3,))
+
+    refresh_analytics(cursor, since_year)
+    incremental = derived_rows(conn)
+    refresh_analytics(cursor)
+    assert derived_rows(conn) == incremental
+
+def test_full_load_keeps_wal_with_a_reader_connected(conn, tmp_path):
+    conn.execute("PRAGMA journal_mode=WAL")
+    reader = sqlite3.connect(tmp_path / 'baseball.db')
+    before = reader.execute("SELECT COUNT(*) FROM leaders").fetchone()[0]
+
+    database_import.bulk_load_tables(conn, read_tables(f"{ROOT}/cleaned_data"))
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 2
+    assert reader.execute("SELECT COUNT(*) FROM leaders").fetchone()[0] == before
+    reader.close()
+
+def test_incremental_import_upserts_changed_and_deletes_removed_seasons(conn, tmp_path):
+    cleaned_dir = tmp_path / 'cleaned'
+    shutil.copytree(f"{ROOT}/cleaned_data", cleaned_dir, ignore=shutil.ignore_patterns('delta'))
+    database_import.incremental_import(conn, str(cleaned_dir))
+    assert database_import.incremental_import(conn, str(cleaned_dir)) == 0
+
+    # Revise one ERA season and drop the last Wins season
+    era_path = cleaned_dir / f"{table_name('ERA', 'AL')}.csv"
+    era = pd.read_csv(era_path)
+    era.loc[era['Year'] == 1950, 'ERA'] = 1.23
+    era.to_csv(era_path, index=False)
+    wins_path = cleaned_dir / f"{table_name('Wins', 'NL')}.csv"
+    wins = pd.read_csv(wins_path)
+    last_year = int(wins['Year'].max())
+    wins[wins['Year'] != last_year].to_csv(wins_path, index=False)
+
+    # Only the two touched decades are rewritten
+    assert 0 < database_import.incremental_import(conn, str(cleaned_dir)) <= 2 * database_import.BATCH_YEARS
+    for name, df in read_tables(str(cleaned_dir)).items():
+        if name in stat_league_tables():
+            stored = conn.execute(f"SELECT * FROM {name} ORDER BY 1").fetchall()
+            assert stored == [tuple(row) for row in df.sort_values('Year').astype(object).values.tolist()], name
+    incremental = derived_rows(conn)
+    cursor = conn.cursor()
+    database_import.refresh_aggregates(cursor)
+    refresh_analytics(cursor)
+    assert derived_rows(conn) == incremental
+
+    assert database_import.incremental_import(conn, str(cleaned_dir)) == 0
+
+def test_full_load_forgets_incremental_hashes(conn, tmp_path):
+    cleaned_dir = tmp_path / 'cleaned'
+    shutil.copytree(f"{ROOT}/cleaned_data", cleaned_dir, ignore=shutil.ignore_patterns('delta'))
+    database_import.incremental_import(conn, str(cleaned_dir))
+    expected = leader_rows(conn)
+
+    # A full load of different data (as pipeline.py does), then the same files again
+    tables = read_tables(str(cleaned_dir))
+    name = table_name('ERA', 'AL')
+    tables[name] = tables[name].assign(ERA=tables[name]['ERA'] + 1)
+    database_import.bulk_load_tables(conn, tables)
+
+    assert database_import.incremental_import(conn, str(cleaned_dir)) > 0
+    assert leader_rows(conn) == expected
@@ -0,0 +1,27 @@
+import pytest
+import dashboard_data
+import leaderboard
+from conftest import ROOT
+
+@pytest.fixture
+def cache():
+    cache = dashboard_data.DataCache(f"{ROOT}/baseball_cleaned.db")
+    yield cache
+    if cache.conn is not None:
+        cache.conn.close()
+
+@pytest.mark.parametrize('k', [0, -1])
+def test_non_positive_k_is_rejected(cache, k):
+    with pytest.raises(ValueError):
+        leaderboard.top_k('ERA', k=k, cache=cache)
+
+@pytest.mark.parametrize('leagues', [['AL,NL'], ['XX'], ['AL', 'al']])
+def test_unknown_leagues_are_rejected(cache, leagues):
+    with pytest.raises(ValueError, match="unknown leagues"):
+        leaderboard.top_k('ERA', leagues=leagues, cache=cache)
+
+def test_per_league_top_k(cache):
+    leaders = leaderboard.top_k('ERA', years=(2000, 2000), k=5, per_league=True, cache=cache)
+    assert leaders[['League', 'Player', 'ERA']].values.tolist() == [['AL', 'Pedro Martinez', 1.74],
+                                                                   ['NL', 'Kevin Brown', 2.58]]
+    assert list(leaders.columns) == [*leaderboard.COLUMNS, 'ERA']
@@ -0,0 +1,36 @@
+import sqlite3
+import pytest
+import query_batch
+
+pa = pytest.importorskip('pyarrow')
+pq = pytest.importorskip('pyarrow.parquet')
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = sqlite3.connect(tmp_path / 'numbers.db')
+    conn.execute("CREATE TABLE numbers (n INTEGER, value NUMERIC, note TEXT)")
+    # Whole values are stored as integers in a NUMERIC column; the first fetch batch has only those
+    rows = [(i, i if i < 5 else i + 0.5, None if i < 7 else 'late') for i in range(10)]
+    conn.executemany("INSERT INTO numbers VALUES (?, ?, ?)", rows)
+    conn.commit()
+    yield conn
+    conn.close()
+
+def test_parquet_promotes_types_that_widen_after_the_first_batch(conn, tmp_path):
+    result = query_batch.run_named_query(conn, 'numbers', "SELECT * FROM numbers ORDER BY n", tmp_path, 'parquet',
+                                         fetch_size=3)
+
+    table = pq.read_table(result['output'])
+    assert result['rows'] == 10
+    assert table.schema.field('n').type == pa.int64()
+    assert table.schema.field('value').type == pa.float64()
+    assert table.column('value').to_pylist() == [0, 1, 2, 3, 4, 5.5, 6.5, 7.5, 8.5, 9.5]
+    assert table.column('note').to_pylist() == [None] * 7 + ['late'] * 3
+
+def test_failed_query_leaves_no_output(conn, tmp_path):
+    # abs() of the smallest integer overflows, after the first batches are written
+    conn.execute("INSERT INTO numbers VALUES (10, -9223372036854775808, NULL)")
+    with pytest.raises(sqlite3.OperationalError):
+        query_batch.run_named_query(conn, 'numbers', "SELECT n, abs(value) FROM numbers", tmp_path, 'csv',
+                                    fetch_size=3)
+    assert not (tmp_path / 'numbers.csv').exists()
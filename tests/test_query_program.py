@@ -0,0 +1,45 @@
+import os
+import signal
+import sqlite3
+import pytest
+import query_program
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE numbers (n INTEGER)")
+    conn.executemany("INSERT INTO numbers VALUES (?)", [(i,) for i in range(100)])
+    yield conn
+    conn.close()
+
+def test_row_cap_notice_when_cap_is_not_a_page_multiple(conn, capsys, tmp_path):
+    shown = query_program.run_query(conn, "SELECT n FROM numbers", page_size=25, max_rows=30,
+                                    interactive=False, slow_log=str(tmp_path / 'slow.jsonl'))
+    assert shown == 30
+    assert "Stopped at the row cap of 30 rows" in capsys.readouterr().out
+
+def test_ctrl_c_at_the_pager_prompt_stops_output(conn, capsys, monkeypatch, tmp_path):
+    def interrupted_prompt(prompt):
+        os.kill(os.getpid(), signal.SIGINT)
+        return ''
+    monkeypatch.setattr('builtins.input', interrupted_prompt)
+
+    shown = query_program.run_query(conn, "SELECT n FROM numbers", page_size=25,
+                                    interactive=True, slow_log=str(tmp_path / 'slow.jsonl'))
+    assert shown == 25
+    assert "Query cancelled after 25 rows" in capsys.readouterr().out
+
+@pytest.mark.parametrize('statement', ["CREATE TABLE squares AS SELECT n * n AS sq FROM numbers",
+                                       "DROP TABLE numbers"])
+def test_profiling_schema_changes_reports_without_a_plan(conn, capsys, tmp_path, statement):
+    query_program.run_query(conn, statement, interactive=False, profile=True,
+                            slow_log=str(tmp_path / 'slow.jsonl'))
+    out = capsys.readouterr().out
+    assert "Statement executed" in out
+    assert "Time:" in out and "QUERY PLAN" not in out
+
+def test_profiling_a_select_prints_its_plan(conn, capsys, tmp_path):
+    query_program.run_query(conn, "SELECT n FROM numbers ORDER BY n DESC", interactive=False, profile=True,
+                            slow_log=str(tmp_path / 'slow.jsonl'))
+    out = capsys.readouterr().out
+    assert "QUERY PLAN" in out and "SCAN numbers" in out
@@ -0,0 +1,79 @@
+import http.client
+import json
+import shutil
+import sqlite3
+import threading
+import time
+import pytest
+import query_service
+from conftest import ROOT
+
+@pytest.fixture
+def server():
+    server = query_service.make_server(f"{ROOT}/baseball_cleaned.db", port=0, workers=2)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    server.service.close()
+
+def get(conn, path):
+    conn.request('GET', path)
+    response = conn.getresponse()
+    return response.status, response.read()
+
+@pytest.mark.parametrize('k', ['-1', '0', str(query_service.MAX_K + 1), 'ten'])
+def test_leaderboard_rejects_bad_k(server, k):
+    conn = http.client.HTTPConnection(query_service.HOST, server.server_address[1], timeout=5)
+    assert get(conn, f"/leaderboard?stat=ERA&k={k}")[0] == 400
+    conn.close()
+
+def test_idle_keep_alive_clients_do_not_block_others(server):
+    idle = [http.client.HTTPConnection(query_service.HOST, server.server_address[1], timeout=5) for _ in range(3)]
+    for conn in idle:
+        assert get(conn, "/leaderboard?stat=ERA&k=3")[0] == 200
+
+    start = time.perf_counter()
+    conn = http.client.HTTPConnection(query_service.HOST, server.server_address[1], timeout=5)
+    assert get(conn, "/team-stats?leagues=AL")[0] == 200
+    assert time.perf_counter() - start < 1
+    for conn in [*idle, conn]:
+        conn.close()
+
+def test_connections_over_the_cap_are_refused():
+    server = query_service.make_server(f"{ROOT}/baseball_cleaned.db", port=0, workers=1, max_connections=1)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        first = http.client.HTTPConnection(query_service.HOST, server.server_address[1], timeout=5)
+        assert get(first, "/health")[0] == 200
+        second = http.client.HTTPConnection(query_service.HOST, server.server_address[1], timeout=5)
+        assert get(second, "/health")[0] == 503
+        first.close()
+        second.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+        server.service.close()
+
+def test_cache_is_emptied_by_any_commit(tmp_path):
+    shutil.copy(f"{ROOT}/baseball_cleaned.db", tmp_path / 'baseball.db')
+    service = query_service.QueryService(str(tmp_path / 'baseball.db'), pool_size=3)
+    params = {'stat': ['Wins'], 'leagues': ['AL'], 'first': ['1913'], 'last': ['1913'], 'k': ['1']}
+    try:
+        # Warm every pooled connection so each has a data_version to compare against
+        for _ in range(3):
+            etag, body = service.handle('/leaderboard', params, query_service.JSON_TYPE)
+        assert service.handle('/leaderboard', params, query_service.JSON_TYPE) == (etag, body)
+
+        # Plain DML, as from the SQL consoles: no import generation bump
+        writer = sqlite3.connect(tmp_path / 'baseball.db')
+        writer.execute("UPDATE leaders SET value = value + 1 WHERE year = 1913")
+        writer.commit()
+        writer.close()
+
+        for _ in range(3):
+            new_etag, new_body = service.handle('/leaderboard', params, query_service.JSON_TYPE)
+            assert new_etag != etag
+            assert json.loads(new_body)['data'][0][-1] == json.loads(body)['data'][0][-1] + 1
+    finally:
+        service.close()
@@ -0,0 +1,145 @@
+import threading
+import time
+import pytest
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options
+import mlb_scraper
+from conftest import read_fixture
+from page_cache import PageCache
+
+# Data rows of tests/fixtures/leaders_page.html as the per-cell Selenium loop reads them
+EXPECTED_ROWS = [
+    ['Year', 'Name(s)', 'ERA', 'Team(s)', 'Year', 'Name(s)', 'ERA', 'Team(s)'],
+    ['2023', 'Gerrit Cole', '2.63', 'New York', '2023', 'Blake Snell', '2.25', 'San Diego'],
+    ['2024', 'Tarik Skubal', '2.39', 'Detroit', '2024', 'Chris Sale', '2.38', 'Atlanta'],
+    ['1981', 'Steve McCatty', '2.33', 'Oakland', '1981', 'Nolan Ryan', '1.69', 'Houston'],
+    ['2005', 'Kevin Millwood', '2.86', 'Cleveland', '2005', 'Roger Clemens', '1.87', 'Houston'],
+    ['1977', 'Frank Tanana', '2.54', 'California', '1977', 'John Candelaria', '2.34', 'Pittsburgh'],
+    ['2022', 'Justin Verlander', '1.75', 'Houston', '2022', 'Julio Urías', '2.16', 'Los Angeles'],
+    ['1986', 'Roger Clemens', '2.48', 'Boston', '1986', 'Mike Scott', '2.22', 'Houston'],
+    ['2013', 'Aníbal Sánchez', '2.57', 'Detroit', '2013', 'Clayton Kershaw', '1.83', 'Los Angeles'],
+    ['2010', 'Félix Hernández', '2.27', 'Seattle', '2010', 'Josh Johnson', '2.30', 'Florida'],
+    ['Year', 'Name(s)', 'ERA', 'Team(s)', 'Year', 'Name(s)', 'ERA', 'Team(s)'],
+]
+
+def fixture_text():
+    return read_fixture('leaders_page.html').decode('utf-8')
+
+def test_parse_leader_table_matches_fixture():
+    assert mlb_scraper.parse_leader_table(fixture_text()) == EXPECTED_ROWS
+
+def test_static_fetch_uses_header_charset(fixture_server):
+    base_url, pages = fixture_server
+    # Charset only in the header: UTF-8 and latin-1 bodies must both decode correctly
+    pages['/utf8.shtml'] = (fixture_text().encode('utf-8'), 'text/html; charset=utf-8')
+    pages['/latin1.shtml'] = (fixture_text().encode('latin-1'), 'text/html; charset=ISO-8859-1')
+    session = mlb_scraper.setup_session()
+    for path in pages:
+        assert mlb_scraper.scrape_page_static(session, base_url + path) == EXPECTED_ROWS
+
+def test_static_fetch_without_charset_reads_utf8(fixture_server):
+    base_url, pages = fixture_server
+    pages['/plain.shtml'] = (fixture_text().encode('utf-8'), 'text/html')
+    rows = mlb_scraper.scrape_page_static(mlb_scraper.setup_session(), base_url + '/plain.shtml')
+    assert rows[9][1] == 'Félix Hernández'
+
+def test_scrape_page_static_mode_builds_frame(fixture_server):
+    base_url, pages = fixture_server
+    page = mlb_scraper.PAGES[0]
+    pages[page['path']] = (fixture_text().encode('utf-8'), 'text/html; charset=utf-8')
+    df = mlb_scraper.scrape_page(page, base_url, 'static', threading.local(), mlb_scraper.SharedDriver(10),
+                                 mlb_scraper.HostRateLimiter(0), retries=0, timeout=10)
+    assert list(df.columns) == page['headers']
+    assert df.values.tolist() == EXPECTED_ROWS
+
+def test_scrape_archives_one_snapshot_per_run(fixture_server, tmp_path):
+    base_url, pages = fixture_server
+    for page in mlb_scraper.PAGES:
+        pages[page['path']] = (fixture_text().encode('utf-8'), 'text/html; charset=utf-8')
+    data = mlb_scraper.scrape_pitching_leaders(base_url=base_url, delay=0, retries=0, timeout=10,
+                                               archive_dir=str(tmp_path))
+    assert len(data) == len(mlb_scraper.PAGES)
+
+    replayed = mlb_scraper.replay_archive(base_url, str(tmp_path), all_snapshots=True, workers=1)
+    assert len(replayed) == 1
+    assert set(next(iter(replayed.values()))) == {page['name'] for page in mlb_scraper.PAGES}
+
+@pytest.fixture
+def chrome():
+    """Headless Chrome, or skip when no browser/driver is installed"""
+    options = Options()
+    options.add_argument('--headless=new')
+    try:
+        driver = webdriver.Chrome(options=options)
+    except WebDriverException as e:
+        pytest.skip(f"Chrome not available: {e.msg}")
+    yield driver
+    driver.quit()
+
+def test_bulk_extraction_matches_per_cell(fixture_server, chrome):
+    base_url, pages = fixture_server
+    pages['/leaders.shtml'] = (fixture_text().encode('utf-8'), 'text/html; charset=utf-8')
+    chrome.get(base_url + '/leaders.shtml')
+
+    per_cell = mlb_scraper.extract_table_per_cell(chrome)
+    assert mlb_scraper.extract_table_bulk(chrome) == per_cell
+    assert per_cell == EXPECTED_ROWS
+
+def no_parsing(page_html):
+    raise AssertionError("cached page was parsed again")
+
+def test_not_modified_page_reuses_cached_rows(fixture_server, fixture_requests, tmp_path, monkeypatch):
+    base_url, pages = fixture_server
+    pages['/era.shtml'] = (fixture_text().encode('utf-8'), 'text/html; charset=utf-8', '"v1"')
+    cache = PageCache(str(tmp_path))
+    session = mlb_scraper.setup_session()
+    assert mlb_scraper.scrape_page_static(session, base_url + '/era.shtml', cache=cache) == EXPECTED_ROWS
+
+    monkeypatch.setattr(mlb_scraper, 'parse_leader_table', no_parsing)
+    timings = {}
+    assert mlb_scraper.scrape_page_static(session, base_url + '/era.shtml', timings=timings,
+                                          cache=cache) == EXPECTED_ROWS
+    assert fixture_requests[-1][1].get('If-None-Match') == '"v1"'
+    assert 'cached' in timings and 'parse' not in timings
+
+def test_unchanged_body_without_validators_is_not_parsed(fixture_server, tmp_path, monkeypatch):
+    base_url, pages = fixture_server
+    pages['/era.shtml'] = (fixture_text().encode('utf-8'), 'text/html; charset=utf-8')
+    cache = PageCache(str(tmp_path))
+    session = mlb_scraper.setup_session()
+    mlb_scraper.scrape_page_static(session, base_url + '/era.shtml', cache=cache)
+
+    monkeypatch.setattr(mlb_scraper, 'parse_leader_table', no_parsing)
+    assert mlb_scraper.scrape_page_static(session, base_url + '/era.shtml', cache=cache) == EXPECTED_ROWS
+
+def test_refresh_ignores_the_cache(fixture_server, fixture_requests, tmp_path):
+    base_url, pages = fixture_server
+    pages['/era.shtml'] = (fixture_text().encode('utf-8'), 'text/html; charset=utf-8', '"v1"')
+    cache = PageCache(str(tmp_path))
+    session = mlb_scraper.setup_session()
+    mlb_scraper.scrape_page_static(session, base_url + '/era.shtml', cache=cache)
+
+    timings = {}
+    mlb_scraper.scrape_page_static(session, base_url + '/era.shtml', timings=timings, cache=cache, refresh=True)
+    assert 'If-None-Match' not in fixture_requests[-1][1]
+    assert 'parse' in timings
+
+def test_least_recently_used_pages_are_evicted(fixture_server, tmp_path):
+    base_url, pages = fixture_server
+    for name in ['a', 'b', 'c']:
+        pages[f'/{name}.shtml'] = (fixture_text().encode('utf-8'), 'text/html; charset=utf-8', f'"{name}"')
+    session = mlb_scraper.setup_session()
+    cache = PageCache(str(tmp_path))
+    mlb_scraper.scrape_page_static(session, base_url + '/a.shtml', cache=cache)
+    entry_bytes = sum(path.stat().st_size for path in tmp_path.iterdir())
+
+    # Room for two entries: reading a keeps it, so b is the one evicted when c arrives
+    cache.max_bytes = entry_bytes * 2 + entry_bytes // 2
+    mlb_scraper.scrape_page_static(session, base_url + '/b.shtml', cache=cache)
+    time.sleep(0.01)
+    assert cache.get(base_url + '/a.shtml') is not None
+    time.sleep(0.01)
+    mlb_scraper.scrape_page_static(session, base_url + '/c.shtml', cache=cache)
+    assert cache.get(base_url + '/b.shtml') is None
+    assert cache.get(base_url + '/a.shtml') is not None and cache.get(base_url + '/c.shtml') is not None
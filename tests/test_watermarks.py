@@ -0,0 +1,45 @@
+import pandas as pd
+import watermarks
+
+ROWS = [['2021', 'Robbie Ray', '2.84', 'Toronto'],
+        ['2022', 'Justin Verlander', '1.75', 'Houston'],
+        ['2023', 'Gerrit Cole', '2.63', 'New York']]
+
+def frame(rows):
+    return pd.DataFrame(rows, columns=['Year', 'Player', 'ERA', 'Team'])
+
+def test_first_scrape_hands_over_every_season():
+    changed, mark = watermarks.changed_seasons(frame(ROWS), {})
+    assert changed == {2021, 2022, 2023}
+    assert mark['last_season'] == 2023 and set(mark['seasons']) == {'2021', '2022', '2023'}
+
+def test_appended_season_takes_the_prefix_hash_fast_path():
+    _, mark = watermarks.changed_seasons(frame(ROWS), {})
+    # Without per-season hashes only the prefix hash can tell the old seasons are unchanged
+    mark = {key: value for key, value in mark.items() if key != 'seasons'}
+    changed, new_mark = watermarks.changed_seasons(frame(ROWS + [['2024', 'Tarik Skubal', '2.39', 'Detroit']]), mark)
+    assert changed == {2024}
+    assert new_mark['last_season'] == 2024
+
+def test_revised_historical_season_is_found_by_per_season_compare():
+    _, mark = watermarks.changed_seasons(frame(ROWS), {})
+    revised = [row[:] for row in ROWS] + [['2024', 'Tarik Skubal', '2.39', 'Detroit']]
+    revised[0][2] = '2.85'
+    changed, new_mark = watermarks.changed_seasons(frame(revised), mark)
+    assert changed == {2021, 2024}
+    assert watermarks.changed_seasons(frame(revised), new_mark)[0] == set()
+
+def test_league_rows_drop_headers_and_placeholders():
+    page = pd.DataFrame([['Year', 'Name(s)', 'ERA', 'Team(s)', 'Year', 'Name(s)', 'ERA', 'Team(s)'],
+                         ['-', '', '', '', '1876', 'George Bradley', '1.23', 'St. Louis'],
+                         ['1901', 'Cy Young', '1.62', 'Boston', '1901', 'Jack Taylor', '1.33', 'Chicago']],
+                        columns=['Year_AL', 'AL_Player', 'AL_ERA', 'AL_Team', 'Year_NL', 'NL_Player', 'NL_ERA', 'NL_Team'])
+    assert watermarks.league_rows(page, 'AL', 'ERA').values.tolist() == [['1901', 'Cy Young', '1.62', 'Boston']]
+    assert watermarks.league_rows(page, 'NL', 'ERA')['Year'].tolist() == ['1876', '1901']
+
+def test_merge_delta_keeps_the_newest_row_per_season(tmp_path):
+    path = tmp_path / 'delta.csv'
+    watermarks.merge_delta(path, frame(ROWS[:2]))
+    assert watermarks.merge_delta(path, frame([['2022', 'Justin Verlander', '1.76', 'Houston'], ROWS[2]])) == 3
+    assert pd.read_csv(path, dtype=str).values.tolist() == [ROWS[0], ['2022', 'Justin Verlander', '1.76', 'Houston'],
+                                                            ROWS[2]]
@@ -0,0 +1,74 @@
+import hashlib
+import json
+import os
+import pandas as pd
+
+WATERMARK_FILE = os.path.join('data', 'watermarks.json')
+DELTA_DIR = os.path.join('data', 'delta')
+
+def row_hash(cells):
+    """Short stable hash of one scraped row"""
+    return hashlib.sha1('\x1f'.join(str(c) for c in cells).encode('utf-8')).hexdigest()[:16]
+
+def prefix_hash(season_hashes, last_season):
+    """Hash of every season up to and including last_season"""
+    digest = hashlib.sha1()
+    for year in sorted(int(y) for y in season_hashes if int(y) <= last_season):
+        digest.update(f"{year}:{season_hashes[str(year)]};".encode('utf-8'))
+    return digest.hexdigest()
+
+def league_rows(page_df, league, stat_name):
+    """One league's half of a scraped page with raw strings, real seasons only"""
+    columns = [f'Year_{league}', f'{league}_Player', f'{league}_{stat_name}', f'{league}_Team']
+    rows = page_df[columns].copy()
+    rows.columns = ['Year', 'Player', stat_name, 'Team']
+    # Drops the repeated header rows and '-' placeholders for seasons a league did not exist
+    return rows[rows['Year'].astype(str).str.fullmatch(r'\d{4}')]
+
+def load_watermarks(path=WATERMARK_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def save_watermarks(marks, path=WATERMARK_FILE):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(marks, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def changed_seasons(rows, mark):
+    """Seasons in rows that are new or differ from the watermark, plus the updated watermark.
+
+    If the hash of everything up to the stored last season still matches,
+    only seasons after it can be new; otherwise every season is compared
+    against its stored hash to find the ones that were revised upstream.
+    """
+    season_hashes = {str(int(row[0])): row_hash(row) for row in rows.itertuples(index=False)}
+    last_season = max((int(y) for y in season_hashes), default=None)
+    new_mark = {
+        'last_season': last_season,
+        'hash': prefix_hash(season_hashes, last_season) if last_season is not None else None,
+        'seasons': season_hashes
+    }
+
+    if not mark or mark.get('last_season') is None:
+        return {int(y) for y in season_hashes}, new_mark
+
+    old_last = mark['last_season']
+    if prefix_hash(season_hashes, old_last) == mark['hash']:
+        changed = {int(y) for y in season_hashes if int(y) > old_last}
+    else:
+        old_seasons = mark.get('seasons', {})
+        changed = {int(y) for y, h in season_hashes.items() if old_seasons.get(y) != h}
+    return changed, new_mark
+
+def merge_delta(path, rows, key='Year'):
+    """Add rows to a pending delta file, newer rows replacing older ones for the same season"""
+    if os.path.exists(path):
+        pending = pd.read_csv(path, dtype=str)
+        rows = pd.concat([pending, rows.astype(str)])
+    rows = rows.drop_duplicates(subset=[key], keep='last').sort_values(key)
+    rows.to_csv(path, index=False)
+    return len(rows)